@@ -1,6 +1,11 @@
 """
 Initialization Module
+
+Games are made through the registry, e.g. `nes_ai.make("tetris")`, which only imports
+    the emulator on first use.
 """
 
+from nes_ai.registry import games, make, register
+
 __version__ = "0.0.1"
 __version_info__ = tuple(__version__.split("."))
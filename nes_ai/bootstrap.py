@@ -0,0 +1,269 @@
+"""
+Worker bootstrap: imports and game ready emulators, with their roms, are loaded once in
+    the parent process and every forked worker inherits them copy-on-write, instead of
+    paying the import, read and boot costs again for each worker or individual
+"""
+
+import importlib
+import multiprocessing
+import os
+import random
+from multiprocessing.pool import Pool
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from nes_ai.registry import games as registered_games
+from nes_ai.registry import make, spec
+from nes_ai.util import sampling  # noqa: F401, samples workers with NES_AI_SAMPLE
+from nes_ai.util.memory import current_rss
+from nes_ai.util.prerequisites import require
+
+if TYPE_CHECKING:
+    from nes_ai.env import BaseEnv
+
+# modules imported before the workers are created, apart from the games' modules
+PRELOAD_MODULES = ("numpy", "nes_py", "nes_py.wrappers", "nes_ai.input")
+
+# seed of the reset before the boot, every boot of a game reaches the same snapshot
+BOOT_SEED = 0
+
+# booted emulators by game and constructor options
+_envs: Dict[Tuple, "BaseEnv"] = dict()
+
+
+def preload(
+    games: Sequence[str] = registered_games(),
+    boot: bool = True,
+    modules: Sequence[str] = PRELOAD_MODULES,
+):
+    """
+    Imports the modules and, if `boot` is True, creates an emulator per game that is
+        played until the game is ready and then snapshotted
+
+    Parameters
+    ----------
+    games : Sequence of str
+        Names of registered games to preload.
+    boot : bool
+        Whether to also boot an emulator per game.
+    modules : Sequence of str
+        Modules to import.
+
+    """
+    for module in modules:
+        importlib.import_module(module)
+
+    for game in games:
+        game_spec = spec(game)
+        importlib.import_module(game_spec.module)
+
+        if boot and (game,) not in _envs:
+            _envs[(game,)] = boot_env(game)
+
+
+def booted_env(
+    game: str, seed: Optional[int] = None, reset: bool = True, **options
+) -> "BaseEnv":
+    """
+    Returns the emulator of the game reset to its game ready snapshot, with the episode
+        seed if given, or as the last episode left it if `reset` is False.
+
+    In a bootstrapped worker the emulator is the one inherited from the parent,
+        otherwise it is booted once and reused by the following calls in the same
+        process. The emulator is shared, so it must not be closed by the caller.
+        Options are passed to the constructor of the game, each combination has its
+        own emulator, for example a Super Mario one per stage.
+    """
+    key = (game, *sorted(options.items()))
+    env = _envs.get(key)
+
+    if env is None:
+        preload((game,), boot=False, modules=())
+        env = _envs[key] = boot_env(game, **options)
+
+    if reset:
+        env.reset(seed=seed)
+    return env
+
+
+def bootstrap_pool(
+    processes: Optional[int] = None,
+    games: Sequence[str] = registered_games(),
+    boot: bool = True,
+    method: str = "fork",
+    initializer: Optional[Callable] = None,
+    initargs: Sequence = (),
+    **kwargs,
+) -> Pool:
+    """
+    Creates a pool of workers from a bootstrapped process.
+
+    With the `fork` method the workers inherit the modules, roms and booted emulators
+        of the current process. With `forkserver` the modules are imported once in the
+        fork server and each worker boots its emulators on the first `booted_env`.
+
+    Parameters
+    ----------
+    processes : int, optional
+        Number of workers, defaults to the number of cpus.
+    games : Sequence of str
+        Names of the games to preload.
+    boot : bool
+        Whether to boot an emulator per game before forking.
+    method : str
+        Multiprocessing start method, either `fork` or `forkserver`.
+    initializer : Callable, optional
+        Function called at the start of every worker.
+    initargs : Sequence
+        Arguments of the initializer.
+    kwargs
+        Other arguments passed to the pool.
+
+    Returns
+    -------
+    Pool
+        A multiprocessing pool that can be reused across generations.
+
+    """
+    require(
+        method in ("fork", "forkserver"),
+        f"Bootstrap needs the fork or forkserver start method, got {method}",
+    )
+    context = multiprocessing.get_context(method)
+
+    if method == "forkserver":
+        game_modules = [spec(game).module for game in games]
+        context.set_forkserver_preload(list(PRELOAD_MODULES) + game_modules)
+        preload(games, boot=False)
+    else:
+        preload(games, boot=boot)
+
+    return context.Pool(
+        processes,
+        initializer=_init_worker,
+        initargs=(initializer, tuple(initargs)),
+        **kwargs,
+    )
+
+
+class RecyclingPool:
+    """
+    A bootstrapped pool for long runs, whose workers are replaced once they completed
+        `max_tasks` tasks or, checked after every map, once one of them passed `max_rss`
+        bytes. Replacements are forked again from the bootstrapped process, so they start
+        with the game ready emulators and a flat memory profile.
+
+    Parameters
+    ----------
+    processes : int, optional
+        Number of workers, defaults to the number of cpus.
+    games : Sequence of str
+        Names of the games to preload.
+    max_rss : int, optional
+        Resident set size of a worker, in bytes, above which the workers are replaced.
+    max_tasks : int, optional
+        Tasks after which a worker is replaced.
+    kwargs
+        Other arguments passed to `bootstrap_pool`.
+
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        games: Sequence[str] = registered_games(),
+        max_rss: Optional[int] = None,
+        max_tasks: Optional[int] = None,
+        **kwargs,
+    ):
+        self._processes = processes
+        self._games = games
+        self._max_rss = max_rss
+        self._max_tasks = max_tasks
+        self._kwargs = kwargs
+
+        # rss of every worker at the end of its last task in the last map
+        self.worker_rss: Dict[int, int] = dict()
+        self.recycled = 0
+        self._pool = self._new_pool()
+
+    def _new_pool(self) -> Pool:
+        return bootstrap_pool(
+            self._processes,
+            self._games,
+            maxtasksperchild=self._max_tasks,
+            **self._kwargs,
+        )
+
+    def map(
+        self, func: Callable, iterable: Iterable, chunksize: Optional[int] = None
+    ) -> List:
+        results = self._pool.map(
+            _run_tracked, [(func, item) for item in iterable], chunksize
+        )
+        self.worker_rss = {pid: rss for _, pid, rss in results}
+
+        if self._max_rss and max(self.worker_rss.values(), default=0) > self._max_rss:
+            self.recycle()
+
+        return [result for result, _, _ in results]
+
+    def recycle(self):
+        """
+        Lets the current workers finish and exit, then forks new ones
+        """
+        self._pool.close()
+        self._pool.join()
+        self._pool = self._new_pool()
+        self.recycled += 1
+
+    def close(self):
+        self._pool.close()
+
+    def join(self):
+        self._pool.join()
+
+    def terminate(self):
+        self._pool.terminate()
+
+    def __enter__(self) -> "RecyclingPool":
+        return self
+
+    def __exit__(self, *_):
+        self.terminate()
+
+
+def _run_tracked(task: Sequence) -> Sequence[Any]:
+    func, item = task
+    return func(item), os.getpid(), current_rss()
+
+
+def _init_worker(initializer: Optional[Callable], initargs: Sequence):
+    # forked workers inherit the random state, which seeds the games on reset
+    random.seed()
+
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def boot_env(game: str, **options) -> "BaseEnv":
+    """
+    A new emulator of the game, played until the game is ready and snapshotted, that
+        is not shared like the ones of `booted_env`
+    """
+    env = make(game, **options)
+    # the recipes of `nes_ai.recipes` replay on any boot
+    env.reset(seed=BOOT_SEED)
+    env.start()
+    env.snapshot()
+
+    return env
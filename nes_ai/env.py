@@ -3,13 +3,22 @@ Base env for every nes game
 """
 
 from enum import Enum
-from typing import Dict, Optional, Sequence, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 from nes_py import NESEnv
 
+from nes_ai.pixels import FrameStack, PixelSpec
+from nes_ai.render import DisplaySlot
 from nes_ai.util.prerequisites import require_type
 
 
+class FrameBudgetExceeded(RuntimeError):
+    """
+    Raised when an env emulates more frames between resets than its budget allows
+    """
+
+
 class BaseEnv(NESEnv):
     """
     A class that makes a custom NesEnv
@@ -19,6 +28,136 @@ class BaseEnv(NESEnv):
     # should have a enum as key and either a hex address or sequence as values
     RAM_INPUT_MAP: Dict = dict()
 
+    # set by the watchdog in its workers: the most frames stepped between resets and a
+    # buffer that mirrors the RAM after every step, read by the parent if the worker hangs
+    frame_budget: Optional[int] = None
+    ram_mirror: Optional[np.ndarray] = None
+
+    frame_count = 0
+    _snapshot_frames = 0
+
+    # seed of the current episode, set by `reset(seed=...)`
+    episode_seed: Optional[int] = None
+
+    # when set to a bytearray, the controller byte of every step since the last reset,
+    # with the seed it is the recipe that replays the episode, see `nes_ai.recipes`
+    recording: Optional[bytearray] = None
+
+    # last frames of the screen, downsampled, kept by every step once set by
+    # `observe_pixels`
+    pixels: Optional[FrameStack] = None
+
+    # slot of a render service the screen is pushed to instead of rendered, see
+    # `RenderService.attach`
+    display: Optional[DisplaySlot] = None
+
+    @classmethod
+    def from_ram(cls, ram: np.ndarray) -> "BaseEnv":
+        """
+        Creates an env without emulator that reads a recorded RAM, only the properties
+            and features that depend solely on the RAM can be used
+        """
+        env = cls.__new__(cls)
+        env.ram = ram
+
+        return env
+
+    def start(self):
+        """
+        Plays through the title screens until the game is ready to be played
+        """
+        raise NotImplementedError
+
+    def snapshot(self):
+        """
+        Stores the current emulator state, every following `reset` restores it
+            instead of booting the game from scratch
+        """
+        self._backup()
+        self._snapshot_frames = self.frame_count
+
+    def rewind(self):
+        """
+        Restores the last snapshot as it was taken, in the middle of an episode, unlike
+            `reset` the game does not set up a new episode
+        """
+        self._restore()
+        self.frame_count = self._snapshot_frames
+        self.done = False
+        self._did_rewind()
+
+        if self.pixels is not None:
+            self.pixels.clear()
+            self.pixels.push(self.screen)
+
+    def _did_rewind(self):
+        """
+        Drops what the env derived from the frames played after the snapshot
+        """
+
+    def seed(self, seed: Optional[int] = None) -> List[int]:
+        """
+        Seeds `np_random` and sets the seed of the episode started by the reset that
+            calls it, episodes reset with the same seed and played with the same inputs
+            are identical
+        """
+        seeds = super().seed(seed)
+        self.episode_seed = seed
+
+        return seeds
+
+    def observe_pixels(self, spec: PixelSpec = PixelSpec()) -> FrameStack:
+        """
+        Keeps the last frames of the screen in a stack from now on, starting with the
+            current one
+        """
+        self.pixels = FrameStack(spec, self.screen.shape)
+        self.pixels.push(self.screen)
+
+        return self.pixels
+
+    def state_tags(self) -> Dict[str, int]:
+        """
+        Tags that describe the current state of the game, to index state recipes
+        """
+        return dict()
+
+    def step(self, action: int):
+        if self.recording is not None:
+            self.recording.append(action)
+        return super().step(action)
+
+    def reset(self, *args, **kwargs):
+        screen = super().reset(*args, **kwargs)
+
+        if self.pixels is not None:
+            self.pixels.clear()
+            self.pixels.push(self.screen)
+        return screen
+
+    def _will_reset(self):
+        self.frame_count = 0
+
+        if self.recording is not None:
+            self.recording.clear()
+
+    def _did_step(self, done: bool):
+        self.frame_count += 1
+
+        if self.ram_mirror is not None:
+            self.ram_mirror[:] = self.ram
+
+        if self.pixels is not None:
+            self.pixels.push(self.screen)
+
+        if self.display is not None:
+            self.display.push(self.screen)
+
+        if self.frame_budget is not None and self.frame_count > self.frame_budget:
+            raise FrameBudgetExceeded(
+                f"Stepped {self.frame_count} frames, the budget is {self.frame_budget}"
+            )
+
     def _read_byte(self, key: Enum) -> Optional[int]:
         """
         Reads a single address from the RAM, given that the address is in the enum
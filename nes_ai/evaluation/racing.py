@@ -0,0 +1,129 @@
+"""
+Racing evaluation: every individual plays the first seed, then each round drops the
+    worst part of the population and only the contenders play the next seed.
+
+All individuals play the same seeds in the same order, common random numbers, so that
+    the individuals of a round are compared on identical games. The fitness of an
+    individual aggregates the seeds it actually played.
+"""
+
+import functools
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Sequence
+
+from nes_ai.util.prerequisites import require
+
+
+def mean(values: Sequence[float]) -> float:
+    return sum(values) / len(values)
+
+
+AGGREGATIONS: Dict[str, Callable[[Sequence[float]], float]] = {
+    "mean": mean,
+    "min": min,
+}
+
+
+@dataclass
+class RaceResult:
+    # noinspection PyUnresolvedReferences
+    """
+    Outcome of a race
+
+    Parameters
+    ----------
+    fitness : list of float
+        Aggregated fitness of every individual, in population order.
+    seeds_played : list of int
+        Number of seeds every individual played.
+    episodes : int
+        Episodes played.
+    full_episodes : int
+        Episodes that playing every seed for every individual would take.
+
+    """
+
+    fitness: List[float]
+    seeds_played: List[int]
+    episodes: int
+    full_episodes: int
+
+    @property
+    def saved(self) -> int:
+        return self.full_episodes - self.episodes
+
+
+def race(
+    pool: Any,
+    episode: Callable[[Any, int], float],
+    population: Sequence,
+    seeds: Sequence[int],
+    aggregation: str = "mean",
+    keep: float = 0.5,
+    min_survivors: int = 1,
+) -> RaceResult:
+    """
+    Plays the seeds for the population by successive halving
+
+    Parameters
+    ----------
+    pool : Pool or Watchdog
+        Anything with a `map(func, iterable)` that returns the results in order, a
+            watchdog must have a penalty so that failed episodes still get a fitness.
+    episode : Callable
+        Module level function that plays an individual on a seed and returns a fitness.
+    population : Sequence
+        Individuals to evaluate.
+    seeds : Sequence of int
+        Seeds in the order they are played, one per round.
+    aggregation : str
+        How the fitness of the played seeds is combined, `mean` or `min`.
+    keep : float
+        Fraction of the contenders, by aggregated fitness, that play the next seed.
+    min_survivors : int
+        Contenders never drop below this number.
+
+    Returns
+    -------
+    RaceResult
+        Fitness and seeds played by every individual.
+
+    """
+    require(len(seeds) > 0, "A race needs at least one seed")
+    require(0 < keep <= 1, f"The kept fraction must be in (0, 1], got {keep}")
+    require(
+        aggregation in AGGREGATIONS,
+        f"Unknown aggregation {aggregation}, expected one of {list(AGGREGATIONS)}",
+    )
+    aggregate = AGGREGATIONS[aggregation]
+
+    scores: List[List[float]] = [list() for _ in population]
+    contenders = list(range(len(population)))
+    play = functools.partial(_play, episode)
+    episodes = 0
+
+    for round_, seed in enumerate(seeds):
+        if round_ > 0:
+            # contenders played the same seeds, so their aggregates are comparable
+            contenders.sort(key=lambda index: aggregate(scores[index]), reverse=True)
+            survivors = max(min_survivors, math.ceil(keep * len(contenders)))
+            contenders = contenders[:survivors]
+
+        results = pool.map(play, [(population[index], seed) for index in contenders])
+
+        for index, fitness in zip(contenders, results):
+            scores[index].append(fitness)
+        episodes += len(contenders)
+
+    return RaceResult(
+        fitness=[aggregate(values) for values in scores],
+        seeds_played=[len(values) for values in scores],
+        episodes=episodes,
+        full_episodes=len(population) * len(seeds),
+    )
+
+
+def _play(episode: Callable[[Any, int], float], task: Sequence) -> float:
+    individual, seed = task
+    return episode(individual, seed)
@@ -0,0 +1,241 @@
+"""
+Evaluation of a population through the trie of its decision prefixes.
+
+The individuals start together on one emulator and, while they agree on the next press,
+    the press is emulated once for all of them. When they disagree the group splits:
+    the process forks once per extra decision and every branch continues with its own
+    subgroup. A fork is a copy-on-write snapshot of the whole emulator, as nes_py keeps
+    a single backup slot per env that `reset` already uses, and the branches run in
+    parallel. Games and decisions are deterministic, so every individual gets the
+    fitness it would get playing alone, for a fraction of the emulated frames.
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from nes_py.wrappers import JoypadSpace
+
+from nes_ai.bootstrap import booted_env
+from nes_ai.env import BaseEnv
+from nes_ai.input import MOVEMENT, Button, Joypad
+
+logger = logging.getLogger(__name__)
+
+Decision = Tuple[Button, ...]
+
+
+@dataclass
+class SharedEvaluation:
+    # noinspection PyUnresolvedReferences
+    """
+    Outcome of an evaluation through the prefix trie
+
+    Parameters
+    ----------
+    fitness : list of float
+        Fitness of every individual, in population order.
+    frames : int
+        Frames emulated by all branches.
+    individual_frames : int
+        Frames that playing every individual alone would emulate.
+    branches : int
+        Processes forked where the population diverged.
+
+    """
+
+    fitness: List[float]
+    frames: int
+    individual_frames: int
+    branches: int
+
+    @property
+    def sharing(self) -> float:
+        return self.individual_frames / self.frames if self.frames else 1.0
+
+
+class _Trie:
+    def __init__(
+        self,
+        population: Sequence,
+        decide: Callable[[Any, BaseEnv], Decision],
+        done: Callable[[BaseEnv], bool],
+        fitness: Callable[[BaseEnv], float],
+        delay: int,
+        max_processes: int,
+    ):
+        self.population = population
+        self.decide = decide
+        self.done = done
+        self.fitness = fitness
+        self.delay = delay
+
+        # written by the branches, indexed by individual
+        context = multiprocessing.get_context("fork")
+        self.results = np.frombuffer(context.RawArray("d", len(population)))
+        self.individual_frames = np.frombuffer(
+            context.RawArray("q", len(population)), dtype=np.int64
+        )
+        self.frames = np.frombuffer(
+            context.RawArray("q", len(population)), dtype=np.int64
+        )
+        self.branches = np.frombuffer(
+            context.RawArray("q", len(population)), dtype=np.int64
+        )
+        self.results[:] = np.nan
+
+        # processes that emulate at the same time
+        self.slots = context.Semaphore(max_processes)
+
+    def descend(self, env: BaseEnv, group: List[int]):
+        """
+        Plays the group until the game is done, forking where it diverges, and waits
+            for the branches
+
+        The process holds a slot while it emulates. A branch is only forked with a
+            free slot of its own or, without one, with the slot of this process, which
+            then waits for the branch to end before it takes a slot again, so no branch
+            is forked to wait for a slot.
+        """
+        player = Joypad(JoypadSpace(env, MOVEMENT))
+        start = env.frame_count
+        children: List[int] = list()
+        branches = 0
+        holding = True
+        failed = True
+
+        try:
+            while not self.done(env):
+                decisions: Dict[Decision, List[int]] = defaultdict(list)
+
+                for index in group:
+                    decisions[self.decide(self.population[index], env)].append(index)
+
+                (decision, group), *others = decisions.items()
+
+                for other_decision, other_group in others:
+                    handed_over = not self.slots.acquire(block=False)
+                    pid = os.fork()
+
+                    if pid == 0:
+                        self._branch(env, player, other_decision, other_group)
+                    children.append(pid)
+                    branches += 1
+
+                    if handed_over:
+                        holding = False
+                        os.waitpid(pid, 0)
+                        children.remove(pid)
+
+                        self.slots.acquire()
+                        holding = True
+
+                player.press(decision, delay=self.delay)
+
+            for index in group:
+                self.results[index] = self.fitness(env)
+                self.individual_frames[index] = env.frame_count
+            self.frames[group[0]] = env.frame_count - start
+            self.branches[group[0]] = branches
+            failed = False
+        finally:
+            # the slot is free while this process only waits for its branches
+            if holding:
+                self.slots.release()
+
+            # the branches of a failed process are stopped, they stop their own
+            for pid in children if failed else ():
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+            for pid in children:
+                os.waitpid(pid, 0)
+
+    def _branch(self, env: BaseEnv, player: Joypad, decision: Decision, group: List):
+        # the child process never returns to the caller of its parent, it owns the slot
+        # taken for it
+        code = 0
+        signal.signal(signal.SIGTERM, _stop_branch)
+
+        try:
+            player.press(decision, delay=self.delay)
+            self.descend(env, group)
+        except SystemExit:
+            code = 1
+        except BaseException:
+            logger.exception(f"Branch of individuals {group} failed")
+            code = 1
+        finally:
+            os._exit(code)
+
+
+def _stop_branch(signum: int, frame: Any):
+    # once, the branch then stops its own branches
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    raise SystemExit(1)
+
+
+def evaluate_shared(
+    game: str,
+    population: Sequence,
+    decide: Callable[[Any, BaseEnv], Decision],
+    done: Callable[[BaseEnv], bool],
+    fitness: Callable[[BaseEnv], float],
+    seed: Optional[int] = None,
+    delay: int = 2,
+    max_processes: Optional[int] = None,
+) -> SharedEvaluation:
+    """
+    Evaluates the population on one episode of the game, sharing the emulation of the
+        decision prefixes the individuals have in common
+
+    Parameters
+    ----------
+    game : str
+        Name of the game.
+    population : Sequence
+        Individuals to evaluate.
+    decide : Callable
+        Buttons an individual presses on the current state, it must only depend on the
+            individual and the state.
+    done : Callable
+        Whether the episode is over.
+    fitness : Callable
+        Fitness of the individuals that end the episode in the state.
+    seed : int, optional
+        Episode seed, the same for every individual.
+    delay : int
+        Frames each press is held after the first one.
+    max_processes : int, optional
+        Branches emulating at the same time, defaults to the number of cpus.
+
+    Returns
+    -------
+    SharedEvaluation
+        Fitness of every individual and the frames saved.
+
+    """
+    trie = _Trie(
+        population, decide, done, fitness, delay, max_processes or os.cpu_count() or 1
+    )
+
+    trie.slots.acquire()
+    trie.descend(booted_env(game, seed), list(range(len(population))))
+
+    failed = np.flatnonzero(np.isnan(trie.results))
+    if len(failed):
+        raise RuntimeError(f"Individuals {failed.tolist()} were not evaluated")
+
+    return SharedEvaluation(
+        fitness=trie.results.tolist(),
+        frames=int(trie.frames.sum()),
+        individual_frames=int(trie.individual_frames.sum()),
+        branches=int(trie.branches.sum()),
+    )
@@ -0,0 +1,353 @@
+"""
+Evaluation of a population on bootstrapped workers that are watched by the parent.
+
+Every episode runs under a wall clock deadline and, optionally, a frame budget. A worker
+    that passes its deadline, stuck in a python loop or inside the emulator, is killed
+    and replaced by a new fork of the bootstrapped parent, and its genome is queued
+    again or penalized. The rest of the generation is not lost, and the failure is
+    logged with the last RAM the worker emulated, so that the state that made the agent
+    or the game hang can be reproduced.
+"""
+
+import logging
+import multiprocessing
+import os
+import random
+import time
+import traceback
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from nes_ai.bootstrap import preload
+from nes_ai.env import BaseEnv, FrameBudgetExceeded
+from nes_ai.registry import games as registered_games
+from nes_ai.util import memory
+from nes_ai.util.corpus import RAM_SIZE
+from nes_ai.util.memory import current_rss
+from nes_ai.util.prerequisites import require
+
+logger = logging.getLogger(__name__)
+
+# reasons of a failed episode
+DEADLINE = "deadline"
+FRAMES = "frames"
+CRASH = "crash"
+ERROR = "error"
+
+
+@dataclass
+class Failure:
+    # noinspection PyUnresolvedReferences
+    """
+    An episode that did not finish
+
+    Parameters
+    ----------
+    index : int
+        Position of the item in the evaluated population.
+    reason : str
+        `deadline`, `frames`, `crash` when the worker died or `error` for an exception.
+    attempt : int
+        Number of the attempt, starting at 1.
+    seconds : float
+        Wall time of the episode until it failed.
+    ram : np.ndarray, optional
+        Last RAM emulated by the worker, None when it did not step any frame.
+    details : str
+        Error message or traceback.
+
+    """
+
+    index: int
+    reason: str
+    attempt: int
+    seconds: float
+    ram: Optional[np.ndarray]
+    details: str = ""
+
+    def describe(self) -> str:
+        ram = "none" if self.ram is None else self.ram.tobytes().hex()
+        return (
+            f"item {self.index} failed by {self.reason} on attempt {self.attempt} "
+            f"after {self.seconds:.1f}s: {self.details or '-'}\nlast ram: {ram}"
+        )
+
+
+class _Worker:
+    def __init__(self, context, frame_budget: Optional[int], initializer, initargs):
+        # shared with the child, which mirrors the RAM after every step
+        self.ram = context.RawArray("B", RAM_SIZE)
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_work,
+            args=(child_connection, self.ram, frame_budget, initializer, initargs),
+            daemon=True,
+        )
+        self.process.start()
+        child_connection.close()
+
+        self.tasks = 0
+        self.index: Optional[int] = None
+        self.started = 0.0
+
+    @property
+    def busy(self) -> bool:
+        return self.index is not None
+
+    def send(self, index: int, func: Callable, item: Any):
+        self.index = index
+        self.started = time.monotonic()
+        self.mirror[:] = 0
+        self.connection.send((func, item))
+
+    @property
+    def mirror(self) -> np.ndarray:
+        return np.frombuffer(self.ram, dtype=np.uint8)
+
+    def failure(self, reason: str, details: str, attempt: int) -> Failure:
+        ram = self.mirror.copy()
+
+        return Failure(
+            index=self.index,
+            reason=reason,
+            attempt=attempt,
+            seconds=time.monotonic() - self.started,
+            ram=ram if ram.any() else None,
+            details=details,
+        )
+
+    def kill(self):
+        memory.record_kill(self.process.pid)
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join()
+        self.connection.close()
+
+
+class Watchdog:
+    """
+    A group of bootstrapped workers that evaluate one item per task under a deadline.
+
+    Parameters
+    ----------
+    processes : int, optional
+        Number of workers, defaults to the number of cpus.
+    games : Sequence of str
+        Names of the games to preload before forking.
+    deadline : float
+        Wall time, in seconds, after which the worker of an episode is killed.
+    frame_budget : int, optional
+        Frames an env may step between resets, an episode that steps more fails.
+    retries : int
+        Times a failed item is queued again before it is penalized.
+    penalty : Callable, optional
+        Called in the parent with a failed item, returns its result, for example the
+            genome with the lowest fitness. Without it, failed items result in None.
+    max_rss : int, optional
+        Resident set size of a worker, in bytes, above which it is replaced.
+    max_tasks : int, optional
+        Tasks after which a worker is replaced.
+    initializer : Callable, optional
+        Function called at the start of every worker.
+    initargs : Sequence
+        Arguments of the initializer.
+
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        games: Sequence[str] = registered_games(),
+        deadline: float = 60.0,
+        frame_budget: Optional[int] = None,
+        retries: int = 1,
+        penalty: Optional[Callable[[Any], Any]] = None,
+        max_rss: Optional[int] = None,
+        max_tasks: Optional[int] = None,
+        initializer: Optional[Callable] = None,
+        initargs: Sequence = (),
+    ):
+        require(deadline > 0, f"The deadline must be positive, got {deadline}")
+        require(retries >= 0, f"Retries cannot be negative, got {retries}")
+
+        self._processes = processes or os.cpu_count() or 1
+        self._deadline = deadline
+        self._frame_budget = frame_budget
+        self._retries = retries
+        self._penalty = penalty
+        self._max_rss = max_rss
+        self._max_tasks = max_tasks
+        self._initializer = initializer
+        self._initargs = tuple(initargs)
+
+        # failures of the last map and counters over the whole run
+        self.failures: List[Failure] = list()
+        self.killed = 0
+        self.recycled = 0
+        self.worker_rss: Dict[int, int] = dict()
+
+        preload(games)
+        self._context = multiprocessing.get_context("fork")
+        self._workers = [self._new_worker() for _ in range(self._processes)]
+
+    def _new_worker(self) -> _Worker:
+        return _Worker(
+            self._context, self._frame_budget, self._initializer, self._initargs
+        )
+
+    def _replace(self, worker: _Worker, kill: bool):
+        if kill:
+            worker.kill()
+            self.killed += 1
+        else:
+            worker.stop()
+            self.recycled += 1
+
+        self._workers[self._workers.index(worker)] = self._new_worker()
+
+    def map(self, func: Callable, iterable: Iterable) -> List:
+        """
+        Evaluates `func` on every item, in parallel, and returns the results in order.
+            Failed items are queued again up to `retries` times and then penalized.
+        """
+        items = list(iterable)
+        results: List[Any] = [None] * len(items)
+        attempts = [0] * len(items)
+        queue = list(reversed(range(len(items))))
+        pending = len(items)
+        self.failures = list()
+
+        while pending:
+            for worker in self._workers:
+                if queue and not worker.busy:
+                    index = queue.pop()
+                    attempts[index] += 1
+                    worker.send(index, func, items[index])
+
+            busy = [worker for worker in self._workers if worker.busy]
+            now = time.monotonic()
+            timeout = max(
+                0.0, min(worker.started for worker in busy) + self._deadline - now
+            )
+            ready = wait(
+                [worker.connection for worker in busy]
+                + [worker.process.sentinel for worker in busy],
+                timeout,
+            )
+
+            for worker in busy:
+                index = worker.index
+                failure = None
+
+                if worker.connection in ready:
+                    try:
+                        message = worker.connection.recv()
+                    except EOFError:
+                        message = None
+
+                    if message is None:
+                        failure = worker.failure(
+                            CRASH, "worker exited", attempts[index]
+                        )
+                        self._replace(worker, kill=True)
+                    else:
+                        worker.tasks += 1
+                        ok, value, pid, rss = message
+                        self.worker_rss[pid] = rss
+
+                        if ok:
+                            results[index] = value
+                            pending -= 1
+                        else:
+                            reason, details = value
+                            failure = worker.failure(reason, details, attempts[index])
+
+                        worker.index = None
+
+                        if (self._max_tasks and worker.tasks >= self._max_tasks) or (
+                            self._max_rss and rss > self._max_rss
+                        ):
+                            self._replace(worker, kill=False)
+                elif worker.process.sentinel in ready:
+                    failure = worker.failure(
+                        CRASH, f"exit code {worker.process.exitcode}", attempts[index]
+                    )
+                    self._replace(worker, kill=True)
+                elif time.monotonic() - worker.started >= self._deadline:
+                    failure = worker.failure(
+                        DEADLINE, f"no result in {self._deadline}s", attempts[index]
+                    )
+                    self._replace(worker, kill=True)
+
+                if failure is None:
+                    continue
+
+                self.failures.append(failure)
+                logger.warning(failure.describe())
+
+                if attempts[index] <= self._retries:
+                    queue.append(index)
+                else:
+                    results[index] = (
+                        self._penalty(items[index]) if self._penalty else None
+                    )
+                    pending -= 1
+
+        return results
+
+    def close(self):
+        for worker in self._workers:
+            worker.stop()
+
+    def terminate(self):
+        for worker in self._workers:
+            worker.kill()
+
+    def __enter__(self) -> "Watchdog":
+        return self
+
+    def __exit__(self, *_):
+        self.terminate()
+
+
+def _work(
+    connection: Connection,
+    ram,
+    frame_budget: Optional[int],
+    initializer: Optional[Callable],
+    initargs: Sequence,
+):
+    # forked workers inherit the random state, which seeds the games on reset
+    random.seed()
+    BaseEnv.frame_budget = frame_budget
+    BaseEnv.ram_mirror = np.frombuffer(ram, dtype=np.uint8)
+
+    if initializer is not None:
+        initializer(*initargs)
+
+    while True:
+        task = connection.recv()
+
+        if task is None:
+            break
+
+        func, item = task
+
+        try:
+            message = True, func(item)
+        except FrameBudgetExceeded as error:
+            message = False, (FRAMES, str(error))
+        except Exception:
+            message = False, (ERROR, traceback.format_exc())
+
+        connection.send((*message, os.getpid(), current_rss()))
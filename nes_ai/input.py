@@ -4,9 +4,12 @@ A representation of a joypad
 
 from enum import Enum
 from itertools import combinations
-from typing import Dict, Sequence, Tuple
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
 
-from nes_py.wrappers import JoypadSpace
+from nes_ai.util.trace import DECODING, EMULATION, timed
+
+if TYPE_CHECKING:
+    from nes_py.wrappers import JoypadSpace
 
 # possible movements
 VALUES = ["left", "right", "A", "B", "down", "NOOP"]
@@ -44,22 +47,35 @@ class Joypad:
 
     NONE_PRESS = BUTTON_DICT[(Button.NONE,)]
 
-    def __init__(self, env: JoypadSpace):
+    def __init__(self, env: "JoypadSpace"):
         self._env = env
 
+    @timed(EMULATION)
     def press(
         self,
         buttons: Tuple[Button, ...],
         delay: int = BUTTON_DELAY,
         replay: bool = False,
     ):
-        press_button = self.BUTTON_DICT[buttons]
-        self._env.step(press_button)
+        for action in self.actions(buttons, delay, replay):
+            self._env.step(action)
 
-        for _ in range(delay):
-            self._env.step(press_button if replay else self.NONE_PRESS)
+    @classmethod
+    def actions(
+        cls,
+        buttons: Tuple[Button, ...],
+        delay: int = BUTTON_DELAY,
+        replay: bool = False,
+    ) -> List[int]:
+        """
+        The action of every frame of a press, for an env wrapped in a `JoypadSpace`
+            of `MOVEMENT`
+        """
+        press_button = cls.BUTTON_DICT[buttons]
+        return [press_button] + [press_button if replay else cls.NONE_PRESS] * delay
 
 
+@timed(DECODING)
 def neat_result_to_buttons(
     result: Sequence[float], buttons_map: Dict[int, Button], threshold: float
 ) -> Tuple[Button, ...]:
@@ -2,14 +2,29 @@
 Super Mario Bros represented as an openai nes environment.
 """
 
-import math
-from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Tuple
+
+import numpy as np
+from nes_py.wrappers import JoypadSpace
 
 from nes_ai.env import BaseEnv
+from nes_ai.input import MOVEMENT, Button, Joypad
+from nes_ai.mario.level import ROWS, TILE, LevelMap
+from nes_ai.mario.observation import ObservationSpec, SparseObservation
+from nes_ai.registry import rom_path
+from nes_ai.util.prerequisites import require
+from nes_ai.util.trace import FEATURES, timed
 
 RANGE_RADIUS = 16
-BOX_RADIUS = 6
+
+# value of the address 0x0009 from which the level is in play
+INITIAL_THRESHOLD = 100
+
+# worlds whose second stage onwards start after an intro area
+INTRO_WORLDS = (1, 2, 4, 7)
+
+# width of the horizontal bands that tag state recipes, a screen
+X_BAND = 0x100
 
 
 class SuperMario(BaseEnv):
@@ -17,10 +32,58 @@ class SuperMario(BaseEnv):
     A class that makes a custom NesEnv for super mario.
     """
 
-    def __init__(self):
-        super().__init__(str(Path(__file__).parents[1] / "roms" / "super_mario.nes"))
+    def __init__(
+        self,
+        world: int = 1,
+        stage: int = 1,
+        observation: ObservationSpec = ObservationSpec(),
+    ):
+        require(1 <= world <= 8, f"World must be between 1 and 8, got {world}")
+        require(1 <= stage <= 4, f"Stage must be between 1 and 4, got {stage}")
+
+        super().__init__(str(rom_path("super_mario")))
+        self.world = world
+        self.stage = stage
+        self._observe(observation)
         self.reset()
 
+    @classmethod
+    def from_ram(
+        cls, ram: np.ndarray, observation: ObservationSpec = ObservationSpec()
+    ) -> "SuperMario":
+        env = super().from_ram(ram)
+        env._observe(observation)
+
+        return env
+
+    def _observe(self, observation: ObservationSpec):
+        self.observation = observation
+        self.level_map = LevelMap()
+        # offsets of the cells from Mario, in pixels
+        self._cells_y, self._cells_x = observation.offsets()
+
+    @property
+    def n_inputs(self) -> int:
+        return self.observation.n_inputs
+
+    def start(self):
+        """
+        Presses start on the title screen, with the world and stage written to the RAM,
+            until the stage is in play
+        """
+        player = Joypad(JoypadSpace(self, MOVEMENT))
+        area = (
+            self.stage + 1
+            if self.world in INTRO_WORLDS and self.stage > 1
+            else self.stage
+        )
+
+        while self.ram[0x0009] < INITIAL_THRESHOLD:
+            self.ram[0x075F] = self.world - 1
+            self.ram[0x075C] = self.stage - 1
+            self.ram[0x0760] = area - 1
+            player.press((Button.START,), delay=INITIAL_THRESHOLD)
+
     @property
     def is_dying(self) -> bool:
         """
@@ -28,39 +91,70 @@ class SuperMario(BaseEnv):
         """
         return self._player_state == 0x0B or self.ram[0x00B5] > 1
 
+    def _did_reset(self):
+        self.level_map.clear()
+
+    def _did_rewind(self):
+        self.level_map.clear()
+
+    def state_tags(self) -> Dict[str, int]:
+        return {
+            "world": int(self.ram[0x075F]) + 1,
+            "stage": int(self.ram[0x075C]) + 1,
+            "x_band": int(self.get_mario()[0]) // X_BAND,
+        }
+
+    @timed(FEATURES)
     def get_input_array(self) -> List[int]:
         """
-        Return a 13 by 13 array:
+        Return the cells of the observation around Mario, flattened by rows: 1 for a
+            solid tile, -1 for an enemy and 0 otherwise, or with separate channels of
+            tiles and enemies
+        """
+        return self._observation_cells().tolist()
+
+    @timed(FEATURES)
+    def get_sparse_input(self) -> SparseObservation:
         """
-        mario_x, mario_y = self.get_mario()
-        sprites = self._get_stripes()
-
-        inputs = list()
-        range_ = range(
-            -BOX_RADIUS * RANGE_RADIUS,
-            BOX_RADIUS * RANGE_RADIUS + RANGE_RADIUS,
-            RANGE_RADIUS,
+        The cells of `get_input_array` that are not 0, most of them are on any frame
+        """
+        cells = self._observation_cells()
+        indices = np.flatnonzero(cells)
+
+        return SparseObservation(indices, cells[indices], len(cells))
+
+    def _observation_cells(self) -> np.ndarray:
+        mario_x, mario_y = (int(value) for value in self.get_mario())
+        self.level_map.update(self.ram)
+
+        cells_y = mario_y + self._cells_y
+        cells_x = mario_x + self._cells_x
+        tiles = self.level_map.gather(
+            (cells_y - 3 * TILE) // TILE, (cells_x + TILE // 2) // TILE
         )
+        tiles *= (cells_y < 0x1B0)[:, np.newaxis]
 
-        for dy in range_:
-            for dx in range_:
-                input_ = 0
+        enemies = np.zeros_like(tiles)
+        reach = self.observation.cell / 2
 
-                if (
-                    self._get_tile(mario_x, mario_y, dx, dy) == 1
-                    and mario_y + dy < 0x1B0
-                ):
-                    input_ = 1
+        for sprite_x, sprite_y in self._get_stripes():
+            rows = np.abs(sprite_y - cells_y) <= reach
+            columns = np.abs(sprite_x - cells_x) <= reach
+            enemies[np.ix_(rows, columns)] = 1
 
-                for sprite in sprites:
-                    dist_x = abs(sprite[0] - (mario_x + dx))
-                    dist_y = abs(sprite[1] - (mario_y + dy))
-                    if dist_x <= RANGE_RADIUS / 2 and dist_y <= RANGE_RADIUS / 2:
-                        input_ = -1
+        if self.observation.channels:
+            return np.concatenate((tiles.ravel(), enemies.ravel()))
+        return np.where(enemies, -1, tiles).ravel()
 
-                inputs.append(input_)
+    def level_window(self, behind: int, ahead: int) -> np.ndarray:
+        """
+        Solid tiles of the full height of the level, from `behind` columns before the
+            one of Mario to `ahead` columns after, the columns not parsed yet are 0
+        """
+        self.level_map.update(self.ram)
+        column = (int(self.get_mario()[0]) + TILE // 2) // TILE
 
-        return inputs
+        return self.level_map.window(0, column - behind, ROWS, behind + ahead + 1)
 
     def get_mario(self) -> Tuple[int, ...]:
         """
@@ -72,22 +166,6 @@ class SuperMario(BaseEnv):
 
         return mario_x, mario_y
 
-    def _get_tile(self, mario_x: int, mario_y: int, dx: int, dy: int) -> int:
-        x = mario_x + dx + 8
-        y = mario_y + dy - RANGE_RADIUS
-        page = math.floor(x / 256) % 2
-
-        sub_x = math.floor((x % 256) / RANGE_RADIUS)
-        sub_y = math.floor((y - 32) / RANGE_RADIUS)
-        addr = 0x500 + page * 13 * RANGE_RADIUS + sub_y * RANGE_RADIUS + sub_x
-
-        if sub_y >= 13 or sub_y < 0:
-            return 0
-
-        if self.ram[addr] != 0:
-            return 1
-        return 0
-
     def _get_stripes(self) -> List[Tuple[int, int]]:
         sprites = list()
 
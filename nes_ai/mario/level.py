@@ -0,0 +1,109 @@
+"""
+Map of the level geometry of a Super Mario episode, built from the tile buffer as the
+    screen scrolls.
+
+The game keeps the metatiles of the last 32 columns it parsed in two pages at 0x0500,
+    13 rows of 16 columns each, and reuses a page once it scrolled out. The map copies
+    the buffered columns by absolute column on every update, so that observations are
+    sliced from it instead of read tile by tile from the RAM, and the columns that left
+    the buffer are still known. A pipe or an area change restarts the parser at the
+    first column of the new area, the map is cleared then.
+"""
+
+import numpy as np
+
+TILE_BUFFER = 0x0500
+# size of a tile in pixels
+TILE = 16
+ROWS = 13
+PAGE_COLUMNS = 16
+BUFFER_COLUMNS = 2 * PAGE_COLUMNS
+
+# page and column of the area parser, the next column it writes to the buffer
+PARSER_PAGE = 0x0725
+PARSER_COLUMN = 0x0726
+# pointer of the area being played, it changes with the pipes and the areas of a stage
+AREA_POINTER = 0x0750
+
+# columns of a stage are about 3000 pixels wide, the map grows past it if needed
+INITIAL_COLUMNS = 256
+
+_ROW_OFFSETS = PAGE_COLUMNS * np.arange(ROWS)[:, np.newaxis]
+
+
+class LevelMap:
+    """
+    Solid tiles of the columns seen so far, 1 for a tile and 0 otherwise
+    """
+
+    def __init__(self):
+        self.tiles = np.zeros((ROWS, INITIAL_COLUMNS), dtype=np.int8)
+        self.columns = 0
+        self.area = None
+        self._end = 0
+
+    def clear(self):
+        self.tiles[:, : self.columns] = 0
+        self.columns = 0
+        self.area = None
+        self._end = 0
+
+    def update(self, ram: np.ndarray):
+        """
+        Copies the columns held in the tile buffer, the columns of a previous area are
+            dropped
+        """
+        end = int(ram[PARSER_PAGE]) * PAGE_COLUMNS + int(ram[PARSER_COLUMN])
+        area = int(ram[AREA_POINTER])
+
+        # the parser only goes backwards when it starts over a new area
+        if area != self.area or end < self._end:
+            self.clear()
+            self.area = area
+
+        self._end = end
+        start = max(0, end - BUFFER_COLUMNS)
+
+        if end > self.tiles.shape[1]:
+            grown = np.zeros((ROWS, 2 * end), dtype=self.tiles.dtype)
+            grown[:, : self.columns] = self.tiles[:, : self.columns]
+            self.tiles = grown
+
+        columns = np.arange(start, end)
+        addrs = (
+            TILE_BUFFER
+            + columns // PAGE_COLUMNS % 2 * ROWS * PAGE_COLUMNS
+            + columns % PAGE_COLUMNS
+        )
+        self.tiles[:, start:end] = ram[addrs + _ROW_OFFSETS] != 0
+        self.columns = max(self.columns, end)
+
+    def gather(self, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """
+        Tiles at every row and column given, the cells outside the level or in columns
+            not parsed yet are 0
+        """
+        valid_rows = (rows >= 0) & (rows < ROWS)
+        valid_columns = (columns >= 0) & (columns < self.columns)
+        tiles = self.tiles[
+            np.ix_(np.where(valid_rows, rows, 0), np.where(valid_columns, columns, 0))
+        ]
+
+        return tiles * (valid_rows[:, np.newaxis] & valid_columns)
+
+    def window(self, row: int, column: int, rows: int, columns: int) -> np.ndarray:
+        """
+        Tiles of the window whose top left cell is at the row and column, the cells
+            outside the level or in columns not parsed yet are 0
+        """
+        window = np.zeros((rows, columns), dtype=self.tiles.dtype)
+
+        top, bottom = max(row, 0), min(row + rows, ROWS)
+        left, right = max(column, 0), min(column + columns, self.columns)
+
+        if top < bottom and left < right:
+            window[
+                top - row : bottom - row, left - column : right - column
+            ] = self.tiles[top:bottom, left:right]
+
+        return window
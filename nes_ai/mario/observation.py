@@ -0,0 +1,111 @@
+"""
+Geometry of the Super Mario observation: a grid of cells around Mario, each one 1 for a
+    solid tile and -1 for an enemy, or both in separate channels.
+
+Most cells are 0 on any frame, so the observation can also be given sparse, as the
+    indices and values of the other cells, and the input layer of a network then only
+    sums the weights of those.
+"""
+
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+from nes_ai.util.prerequisites import require
+
+
+class ObservationSpec(NamedTuple):
+    # noinspection PyUnresolvedReferences
+    """
+    Cells of the observation, the default is a 13 by 13 grid of 16 pixel cells
+
+    Parameters
+    ----------
+    behind : int
+        Cells before Mario, to the left.
+    ahead : int
+        Cells after Mario, to the right.
+    above : int
+        Cells above Mario.
+    below : int
+        Cells below Mario.
+    cell : int
+        Size of a cell in pixels, a tile is 16.
+    channels : bool
+        Whether tiles and enemies are two channels of 0 and 1, one after the other,
+            instead of a single one where enemies are -1.
+
+    """
+
+    behind: int = 6
+    ahead: int = 6
+    above: int = 6
+    below: int = 6
+    cell: int = 16
+    channels: bool = False
+
+    @property
+    def rows(self) -> int:
+        return self.above + self.below + 1
+
+    @property
+    def columns(self) -> int:
+        return self.behind + self.ahead + 1
+
+    @property
+    def n_inputs(self) -> int:
+        return self.rows * self.columns * (2 if self.channels else 1)
+
+    def offsets(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vertical and horizontal offsets of the cells from Mario, in pixels
+        """
+        require(self.cell > 0, f"Cells must have a positive size, got {self.cell}")
+        require(
+            min(self.behind, self.ahead, self.above, self.below) >= 0,
+            "Cells around Mario cannot be negative",
+        )
+
+        return (
+            self.cell * np.arange(-self.above, self.below + 1),
+            self.cell * np.arange(-self.behind, self.ahead + 1),
+        )
+
+
+class SparseObservation(NamedTuple):
+    # noinspection PyUnresolvedReferences
+    """
+    Cells of an observation that are not 0
+
+    Parameters
+    ----------
+    indices : np.ndarray
+        Indices of the cells in the flattened observation, in increasing order.
+    values : np.ndarray
+        Values of the cells.
+    size : int
+        Number of cells of the dense observation.
+
+    """
+
+    indices: np.ndarray
+    values: np.ndarray
+    size: int
+
+    def dense(self) -> np.ndarray:
+        cells = np.zeros(self.size, dtype=self.values.dtype)
+        cells[self.indices] = self.values
+
+        return cells
+
+
+def input_layer(weights: np.ndarray, observation: SparseObservation) -> np.ndarray:
+    """
+    Weighted sums of the input layer, `weights` has a row per input and a column per
+        neuron, only the rows of the cells that are not 0 are read
+    """
+    require(
+        len(weights) == observation.size,
+        f"Weights have {len(weights)} inputs, the observation {observation.size}",
+    )
+    return observation.values @ weights[observation.indices]
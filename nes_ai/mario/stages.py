@@ -0,0 +1,88 @@
+"""
+Evaluation of Super Mario individuals over several stages, each played from its own
+    game ready emulator instead of walking through the title screen and earlier stages
+"""
+
+import functools
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from nes_ai.bootstrap import booted_env
+from nes_ai.evaluation.racing import AGGREGATIONS
+from nes_ai.mario.env import SuperMario
+from nes_ai.util.prerequisites import require
+
+# world and stage, starting at 1
+Stage = Tuple[int, int]
+
+
+def boot_stages(stages: Sequence[Stage], **options):
+    """
+    Boots an emulator per stage, before forking the workers so that they inherit them,
+        the options, like the observation, are passed to `SuperMario`
+    """
+    for world, stage in stages:
+        booted_env("mario", reset=False, world=world, stage=stage, **options)
+
+
+def stage_env(world: int, stage: int, **options) -> SuperMario:
+    """
+    The emulator of the stage, reset to the start of the stage
+    """
+    return booted_env("mario", world=world, stage=stage, **options)
+
+
+def play_stage(
+    episode: Callable[[Any, SuperMario], float], options: Dict, task: Sequence
+) -> float:
+    individual, (world, stage) = task
+    return episode(individual, stage_env(world, stage, **options))
+
+
+def play_stages(
+    pool: Any,
+    episode: Callable[[Any, SuperMario], float],
+    population: Sequence,
+    stages: Sequence[Stage],
+    aggregation: str = "mean",
+    **options,
+) -> List[float]:
+    """
+    Plays every individual on every stage, spread over the workers of the pool
+
+    Parameters
+    ----------
+    pool : Pool or Watchdog
+        Anything with a `map(func, iterable)` that returns the results in order, its
+            workers should be forked after `boot_stages`.
+    episode : Callable
+        Module level function that plays an individual on a stage ready emulator and
+            returns a fitness.
+    population : Sequence
+        Individuals to evaluate.
+    stages : Sequence of Stage
+        World and stage of every stage to play.
+    aggregation : str
+        How the fitness of the stages is combined, `mean` or `min`.
+    options
+        Options of the emulators, as given to `boot_stages`.
+
+    Returns
+    -------
+    list of float
+        Combined fitness of every individual, in population order.
+
+    """
+    require(len(stages) > 0, "Individuals must play at least one stage")
+    require(
+        aggregation in AGGREGATIONS,
+        f"Unknown aggregation {aggregation}, expected one of {list(AGGREGATIONS)}",
+    )
+    aggregate = AGGREGATIONS[aggregation]
+
+    tasks = [(individual, stage) for individual in population for stage in stages]
+    results = pool.map(functools.partial(play_stage, episode, options), tasks)
+
+    return [
+        aggregate(results[index : index + len(stages)])
+        for index in range(0, len(results), len(stages))
+    ]
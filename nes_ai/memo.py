@@ -0,0 +1,117 @@
+"""
+Memoization of the decisions of an episode.
+
+While a Tetris piece falls or Mario waits, consecutive observations are often the
+    same, and a network that is a function of its inputs takes the same decision on
+    them. The decisions of an episode are kept in a small LRU keyed by the bytes of the
+    observation, so repeated observations skip the evaluation. The hit rates of the
+    episodes of every worker add up in shared counters, created by the parent before
+    the workers are forked.
+"""
+
+import multiprocessing
+from collections import OrderedDict
+from typing import Any, Callable, Generic, NamedTuple, Sequence, TypeVar
+
+import numpy as np
+
+from nes_ai.util.prerequisites import require
+
+DEFAULT_SIZE = 64
+
+Decision = TypeVar("Decision")
+
+_MISSING = object()
+
+
+class CacheStats(NamedTuple):
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __add__(self, other: "CacheStats") -> "CacheStats":
+        return CacheStats(self.hits + other.hits, self.misses + other.misses)
+
+    def describe(self) -> str:
+        return (
+            f"{self.hits} of {self.hits + self.misses} decisions cached, "
+            f"hit rate {100 * self.hit_rate:.1f}%"
+        )
+
+
+class DecisionCache(Generic[Decision]):
+    """
+    Decisions of the observations of an episode, the least recently used are dropped
+        past `size`
+
+    Parameters
+    ----------
+    decide : Callable
+        Decision of an observation, it must only depend on the observation.
+    size : int
+        Decisions kept.
+
+    """
+
+    def __init__(self, decide: Callable[[Any], Decision], size: int = DEFAULT_SIZE):
+        require(size > 0, f"The cache must keep at least a decision, got {size}")
+
+        self.decide = decide
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._decisions: "OrderedDict[bytes, Decision]" = OrderedDict()
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses)
+
+    def clear(self):
+        self._decisions.clear()
+        self.hits = self.misses = 0
+
+    def __call__(self, observation: Sequence) -> Decision:
+        key = np.asarray(observation, dtype=np.float32).tobytes()
+        decision = self._decisions.get(key, _MISSING)
+
+        if decision is not _MISSING:
+            self._decisions.move_to_end(key)
+            self.hits += 1
+            return decision
+
+        decision = self.decide(observation)
+        self._decisions[key] = decision
+        self.misses += 1
+
+        if len(self._decisions) > self.size:
+            self._decisions.popitem(last=False)
+
+        return decision
+
+
+class CacheTotals:
+    """
+    Hits and misses of the caches of every process, shared with the workers forked
+        after it is created
+    """
+
+    def __init__(self):
+        self._counts = multiprocessing.get_context("fork").Array("q", 2)
+
+    def add(self, stats: CacheStats):
+        with self._counts.get_lock():
+            self._counts[0] += stats.hits
+            self._counts[1] += stats.misses
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._counts.get_lock():
+            return CacheStats(*self._counts)
+
+    def reset(self):
+        with self._counts.get_lock():
+            self._counts[:] = [0, 0]
@@ -0,0 +1,142 @@
+"""
+Pipelined decision loop: the next decision is evaluated in a thread while the emulator
+    plays the frames the current press is held for.
+
+After the first frames of a press the observation is snapshotted and the policy
+    evaluates it in the background. When the press is over the observation is taken
+    again and, if it is the same as the snapshot, the speculative decision is the one
+    the policy would take now and it is committed without waiting. Otherwise it is
+    dropped and the policy evaluates the new observation. Decisions only ever come
+    from the observation at the decision frame, so the episode is exactly the one of
+    the sequential loop and deterministic replays are kept.
+
+The emulator releases the GIL while it runs a frame, so a python policy overlaps with
+    the emulation. The policy is never evaluated twice at the same time, it does not
+    need to be thread safe.
+"""
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+from nes_py.wrappers import JoypadSpace
+
+from nes_ai.env import BaseEnv
+from nes_ai.input import MOVEMENT, Joypad
+from nes_ai.realtime import Press
+from nes_ai.util.prerequisites import require
+
+
+@dataclass
+class PipelineStats:
+    # noinspection PyUnresolvedReferences
+    """
+    Outcome of a pipelined episode
+
+    Parameters
+    ----------
+    decisions : int
+        Decisions taken.
+    speculations : int
+        Decisions evaluated ahead, while a press was held.
+    hits : int
+        Speculative decisions committed, their observation had not changed.
+    latencies : np.ndarray
+        Seconds from the end of every press to its next decision.
+
+    """
+
+    decisions: int
+    speculations: int
+    hits: int
+    latencies: np.ndarray
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.speculations if self.speculations else 0.0
+
+
+def play_pipelined(
+    env: BaseEnv,
+    observe: Callable[[BaseEnv], Any],
+    policy: Callable[[Any], Press],
+    done: Callable[[BaseEnv], bool],
+    snapshot_frame: int = 1,
+    max_decisions: Optional[int] = None,
+) -> PipelineStats:
+    """
+    Plays the env until it is done, evaluating the next decision while a press is held
+
+    Parameters
+    ----------
+    env : BaseEnv
+        Env ready to be played.
+    observe : Callable
+        Observation of the current state, like `get_input_array`, it must not be a
+            view of the env that changes with the next frames.
+    policy : Callable
+        Press of an observation, it must only depend on the observation.
+    done : Callable
+        Whether the episode is over.
+    snapshot_frame : int
+        Frames of a press played before its observation is snapshotted, the later the
+            more likely it is unchanged at the decision and the less time the policy
+            has to evaluate it.
+    max_decisions : int, optional
+        Decisions after which the episode stops.
+
+    Returns
+    -------
+    PipelineStats
+        Decisions committed from the speculation and latency of the decisions.
+
+    """
+    require(
+        snapshot_frame > 0, f"The snapshot must follow a frame, got {snapshot_frame}"
+    )
+
+    wrapped = JoypadSpace(env, MOVEMENT)
+    latencies: List[float] = list()
+    speculations = hits = 0
+    snapshot: Any = None
+    speculation: Optional[Future] = None
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        while not done(env) and (
+            max_decisions is None or len(latencies) < max_decisions
+        ):
+            start = time.perf_counter()
+            observation = observe(env)
+
+            if speculation is not None and np.array_equal(observation, snapshot):
+                press = speculation.result()
+                hits += 1
+            else:
+                if speculation is not None:
+                    # the policy is not evaluated twice at the same time
+                    speculation.result()
+                press = policy(observation)
+
+            latencies.append(time.perf_counter() - start)
+            speculation = None
+            actions = Joypad.actions(*press)
+
+            for frame, action in enumerate(actions, start=1):
+                wrapped.step(action)
+
+                if frame == snapshot_frame and frame < len(actions):
+                    snapshot = observe(env)
+                    speculation = executor.submit(policy, snapshot)
+                    speculations += 1
+
+        if speculation is not None:
+            speculation.result()
+
+    return PipelineStats(
+        decisions=len(latencies),
+        speculations=speculations,
+        hits=hits,
+        latencies=np.array(latencies),
+    )
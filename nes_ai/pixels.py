@@ -0,0 +1,130 @@
+"""
+Pixel observations of the emulator screen, for agents that play from pixels instead of
+    RAM features.
+
+nes_py exposes the screen as a numpy view of the emulator's 32 bit frame buffer, so the
+    screen is never copied: every frame it is downsampled by striding that view and
+    converted to grayscale with integer weights straight into the slot of a ring buffer
+    of the last frames. The frames are only put in order when the stack is read, and
+    not at all while the newest frame is the last slot.
+"""
+
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from nes_ai.util.prerequisites import require
+
+# luma weights of red, green and blue, out of 256
+GRAY_WEIGHTS = (77, 150, 29)
+GRAY_SHIFT = 8
+
+
+class PixelSpec(NamedTuple):
+    # noinspection PyUnresolvedReferences
+    """
+    Pixel observation of an env
+
+    Parameters
+    ----------
+    scale : int
+        Downsampling factor, one pixel out of `scale` is kept in both directions.
+    frames : int
+        Frames in the stack, the newest last.
+    grayscale : bool
+        Whether frames are converted to grayscale, otherwise they keep the 3 channels.
+
+    """
+
+    scale: int = 2
+    frames: int = 4
+    grayscale: bool = True
+
+    def frame_shape(self, screen_shape: Tuple[int, ...]) -> Tuple[int, ...]:
+        height, width = (-(-size // self.scale) for size in screen_shape[:2])
+        return (height, width) if self.grayscale else (height, width, 3)
+
+
+class FrameStack:
+    """
+    The last frames of a screen, downsampled and converted into a preallocated ring
+        buffer
+
+    Parameters
+    ----------
+    spec : PixelSpec
+        Downsampling, number of frames and channels.
+    screen_shape : tuple of int
+        Height, width and channels of the screen.
+
+    """
+
+    def __init__(self, spec: PixelSpec, screen_shape: Tuple[int, ...]):
+        require(spec.scale > 0, f"Scale must be positive, got {spec.scale}")
+        require(spec.frames > 0, f"The stack needs at least a frame, got {spec.frames}")
+
+        self.spec = spec
+        self.ring = np.zeros((spec.frames, *spec.frame_shape(screen_shape)), np.uint8)
+        # slot of the newest frame and number of frames pushed since the last clear
+        self.head = spec.frames - 1
+        self.count = 0
+
+        self._luma = np.zeros(self.ring.shape[1:3], np.uint16)
+        self._channel = np.zeros_like(self._luma)
+        self._ordered: Optional[np.ndarray] = None
+
+    def clear(self):
+        self.head = self.spec.frames - 1
+        self.count = 0
+
+    def push(self, screen: np.ndarray):
+        """
+        Converts the screen into the slot after the newest frame, the first frame
+            after a clear fills the whole stack
+        """
+        view = screen[:: self.spec.scale, :: self.spec.scale]
+        self.head = (self.head + 1) % self.spec.frames
+        slot = self.ring[self.head]
+
+        if self.spec.grayscale:
+            red, green, blue = GRAY_WEIGHTS
+            np.multiply(view[..., 0], red, out=self._luma, dtype=np.uint16)
+            np.multiply(view[..., 1], green, out=self._channel, dtype=np.uint16)
+            self._luma += self._channel
+            np.multiply(view[..., 2], blue, out=self._channel, dtype=np.uint16)
+            self._luma += self._channel
+            self._luma >>= GRAY_SHIFT
+            np.copyto(slot, self._luma, casting="unsafe")
+        else:
+            np.copyto(slot, view)
+
+        if self.count == 0:
+            self.ring[:] = slot
+        self.count += 1
+
+    @property
+    def latest(self) -> np.ndarray:
+        """
+        The newest frame, a view of its slot
+        """
+        return self.ring[self.head]
+
+    def stacked(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        The frames from the oldest to the newest. It is a view of the ring while the
+            newest frame is in the last slot, otherwise the two halves of the ring are
+            copied into `out`, or into a buffer allocated on the first call. Either
+            way it is only valid until the next push.
+        """
+        start = (self.head + 1) % self.spec.frames
+
+        if start == 0:
+            return self.ring
+
+        if out is None:
+            if self._ordered is None:
+                self._ordered = np.empty_like(self.ring)
+            out = self._ordered
+
+        np.concatenate((self.ring[start:], self.ring[:start]), out=out)
+        return out
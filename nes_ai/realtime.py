@@ -0,0 +1,199 @@
+"""
+Real-time playback: every emulated frame is scheduled against the clock of the NES, to
+    tell whether a policy is fast enough to drive the game live.
+
+A decision is taken between two frames, so it must fit in the budget of a frame. One
+    that does not pushes the next frame past its deadline: the frame is counted as
+    missed and the schedule restarts from it, like a console that drops a frame,
+    instead of playing the late frames in a burst to catch up.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from nes_py.wrappers import JoypadSpace
+
+from nes_ai.env import BaseEnv
+from nes_ai.input import BUTTON_DELAY, MOVEMENT, Button, Joypad
+from nes_ai.util.prerequisites import require
+
+# frames per second of the NTSC NES
+NES_FPS = 60.0988
+
+
+class Press(NamedTuple):
+    buttons: Tuple[Button, ...]
+    delay: int = BUTTON_DELAY
+    replay: bool = False
+
+
+@dataclass
+class RealTimeStats:
+    # noinspection PyUnresolvedReferences
+    """
+    Timing of a real-time playback
+
+    Parameters
+    ----------
+    latencies : np.ndarray
+        Seconds taken by every decision.
+    budget : float
+        Seconds of a frame.
+    frames : int
+        Frames played.
+    missed_frames : int
+        Frames stepped after their deadline.
+    missed_decisions : int
+        Decisions that took longer than a frame.
+
+    """
+
+    latencies: np.ndarray
+    budget: float
+    frames: int
+    missed_frames: int
+    missed_decisions: int
+
+    @property
+    def p50(self) -> float:
+        return float(np.percentile(self.latencies, 50)) if len(self.latencies) else 0.0
+
+    @property
+    def p99(self) -> float:
+        return float(np.percentile(self.latencies, 99)) if len(self.latencies) else 0.0
+
+    def histogram(self, bins: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Counts of the decision latencies and the edges of their bins, in seconds, the
+            last bin ends at the frame budget or the slowest decision
+        """
+        top = max(self.budget, float(self.latencies.max(initial=0.0)))
+        return np.histogram(self.latencies, bins=bins, range=(0.0, top))
+
+    def describe(self) -> str:
+        return (
+            f"{len(self.latencies)} decisions, p50 {1e3 * self.p50:.2f}ms, "
+            f"p99 {1e3 * self.p99:.2f}ms, budget {1e3 * self.budget:.2f}ms, "
+            f"{self.missed_decisions} over budget, "
+            f"{self.missed_frames} of {self.frames} frames missed"
+        )
+
+
+class FrameClock:
+    """
+    Deadlines of consecutive frames at a fixed rate
+
+    Parameters
+    ----------
+    fps : float
+        Frames per second.
+    clock : Callable
+        Current time in seconds.
+    sleep : Callable
+        Waits for a number of seconds.
+
+    """
+
+    def __init__(
+        self,
+        fps: float = NES_FPS,
+        clock: Callable[[], float] = time.perf_counter,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        require(fps > 0, f"Frames per second must be positive, got {fps}")
+
+        self.period = 1 / fps
+        self._clock = clock
+        self._sleep = sleep
+        self._deadline: Optional[float] = None
+
+    def tick(self) -> bool:
+        """
+        Waits for the deadline of the next frame, returns False if it already passed,
+            the following deadlines then count from now
+        """
+        now = self._clock()
+
+        if self._deadline is None:
+            self._deadline = now
+        else:
+            self._deadline += self.period
+
+        if now > self._deadline:
+            self._deadline = now
+            return False
+
+        self._sleep(self._deadline - now)
+        return True
+
+
+def play_realtime(
+    env: BaseEnv,
+    decide: Callable[[BaseEnv], Press],
+    done: Callable[[BaseEnv], bool],
+    fps: float = NES_FPS,
+    render: bool = False,
+    max_decisions: Optional[int] = None,
+    clock: Callable[[], float] = time.perf_counter,
+    sleep: Callable[[float], None] = time.sleep,
+) -> RealTimeStats:
+    """
+    Plays the env in real time until it is done, deciding a press between frames
+
+    Parameters
+    ----------
+    env : BaseEnv
+        Env ready to be played.
+    decide : Callable
+        Press of the current state, typically the evaluation of a network.
+    done : Callable
+        Whether the playback is over.
+    fps : float
+        Frames per second, the NES clock by default.
+    render : bool
+        Whether every frame is rendered, the rendering counts against the frame.
+    max_decisions : int, optional
+        Decisions after which the playback stops.
+    clock : Callable
+        Current time in seconds.
+    sleep : Callable
+        Waits for a number of seconds.
+
+    Returns
+    -------
+    RealTimeStats
+        Latency of the decisions and missed deadlines.
+
+    """
+    frame_clock = FrameClock(fps, clock, sleep)
+    wrapped = JoypadSpace(env, MOVEMENT)
+    latencies: List[float] = list()
+    frames = missed_frames = missed_decisions = 0
+
+    while not done(env) and (max_decisions is None or len(latencies) < max_decisions):
+        start = clock()
+        press = decide(env)
+        latencies.append(clock() - start)
+
+        if latencies[-1] > frame_clock.period:
+            missed_decisions += 1
+
+        for action in Joypad.actions(*press):
+            if not frame_clock.tick():
+                missed_frames += 1
+
+            wrapped.step(action)
+            frames += 1
+
+            if render:
+                env.render()
+
+    return RealTimeStats(
+        latencies=np.array(latencies),
+        budget=frame_clock.period,
+        frames=frames,
+        missed_frames=missed_frames,
+        missed_decisions=missed_decisions,
+    )
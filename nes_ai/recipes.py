@@ -0,0 +1,244 @@
+"""
+Library of state recipes on disk, to find and replay tagged points of a game.
+
+It is not a savestate library: nes_py cannot serialize its emulator and the RAM alone
+    does not hold the state of the cpu and ppu, so a state is stored as the recipe that
+    reaches it, the episode seed and the controller byte of every frame since the game
+    ready snapshot. Replaying a recipe is exact but costs as much emulation as the
+    approach it records. To start episodes at a state in microseconds, `start` replays
+    its recipe once per process on an emulator of its own and snapshots it there, the
+    following starts rewind that emulator. The emulators of the states started last are
+    kept, up to a bound. The RAM at the end of the recipe is stored too, to index and
+    inspect the states without replaying them.
+
+The states live in a single file of zlib compressed blobs, deduplicated by digest,
+    followed by a json index. The file is memory mapped, so a library opened before the
+    workers are forked is shared by all of them.
+"""
+
+import hashlib
+import json
+import mmap
+import random
+import struct
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from nes_ai.bootstrap import boot_env
+from nes_ai.env import BaseEnv
+from nes_ai.util.prerequisites import require
+
+MAGIC = b"NESAISV1"
+FOOTER = struct.Struct("<Q")
+
+# emulators snapshotted at a state kept by each process
+DEFAULT_ENVS = 8
+
+# offset and length of a compressed blob in the file
+Location = Tuple[int, int]
+
+
+class StateRecipe(NamedTuple):
+    game: str
+    seed: Optional[int]
+    frames: int
+    tags: Dict[str, int]
+    ram: Location
+    recipe: Location
+
+
+class RecipeLibrary:
+    """
+    State recipes of any game, stored in one file
+
+    Parameters
+    ----------
+    path : str or Path
+        File of the library, it is created by the first `save` if it does not exist.
+    envs : int
+        Emulators snapshotted at a state kept by `start`, the least recently started
+            are closed past it.
+
+    """
+
+    def __init__(self, path: Union[str, Path], envs: int = DEFAULT_ENVS):
+        require(envs > 0, f"The library must keep at least an emulator, got {envs}")
+
+        self.path = Path(path)
+        self.states: List[StateRecipe] = list()
+        self.envs = envs
+
+        self._blobs: Dict[str, Location] = dict()
+        self._keys: Dict[Tuple[str, Location], StateRecipe] = dict()
+        self._pending: Dict[int, bytes] = dict()
+        self._end = len(MAGIC)
+        self._map: Optional[mmap.mmap] = None
+        # of this process, by game and recipe
+        self._envs: "OrderedDict[Tuple[str, Location], BaseEnv]" = OrderedDict()
+
+        if self.path.exists():
+            self._open()
+
+    def _open(self):
+        if self._map is not None:
+            self._map.close()
+
+        with self.path.open("rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        require(
+            self._map[: len(MAGIC)] == MAGIC, f"{self.path} is not a recipe library"
+        )
+        (self._end,) = FOOTER.unpack_from(self._map, len(self._map) - FOOTER.size)
+        index = json.loads(self._map[self._end : len(self._map) - FOOTER.size])
+
+        self._blobs = {digest: tuple(blob) for digest, blob in index["blobs"].items()}
+        self.states = [
+            StateRecipe(
+                game=state["game"],
+                seed=state["seed"],
+                frames=state["frames"],
+                tags=state["tags"],
+                ram=tuple(state["ram"]),
+                recipe=tuple(state["recipe"]),
+            )
+            for state in index["states"]
+        ]
+        self._keys = {(state.game, state.ram): state for state in self.states}
+
+    def _store(self, data: bytes) -> Location:
+        digest = hashlib.sha1(data).hexdigest()
+
+        if digest not in self._blobs:
+            blob = zlib.compress(data)
+            self._pending[self._end] = blob
+            self._blobs[digest] = (self._end, len(blob))
+            self._end += len(blob)
+
+        return self._blobs[digest]
+
+    def _read(self, location: Location) -> bytes:
+        offset, length = location
+
+        if offset in self._pending:
+            return zlib.decompress(self._pending[offset])
+        return zlib.decompress(self._map[offset : offset + length])
+
+    def add(self, game: str, env: BaseEnv, **tags: int) -> StateRecipe:
+        """
+        Adds the current state of an env that records its episode, tagged with the
+            tags of the game and the ones given. A state already in the library is
+            returned instead of added again.
+        """
+        require(
+            env.recording is not None,
+            "The env must record its episode, set `env.recording = bytearray()` "
+            "before the reset",
+        )
+        ram = self._store(env.ram.tobytes())
+
+        if (game, ram) in self._keys:
+            return self._keys[(game, ram)]
+
+        state = StateRecipe(
+            game=game,
+            seed=env.episode_seed,
+            frames=len(env.recording),
+            tags={**env.state_tags(), **tags},
+            ram=ram,
+            recipe=self._store(bytes(env.recording)),
+        )
+        self.states.append(state)
+        self._keys[(game, ram)] = state
+
+        return state
+
+    def save(self):
+        """
+        Appends the new blobs and rewrites the index
+        """
+        if not self.path.exists():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_bytes(MAGIC)
+
+        index = {
+            "blobs": self._blobs,
+            "states": [state._asdict() for state in self.states],
+        }
+
+        with self.path.open("r+b") as file:
+            # the old index is overwritten by the new blobs
+            file.seek(min(self._pending, default=self._end))
+            file.writelines(self._pending[offset] for offset in sorted(self._pending))
+            file.write(json.dumps(index).encode())
+            file.write(FOOTER.pack(self._end))
+            file.truncate()
+
+        self._pending.clear()
+        self._open()
+
+    def find(self, game: str, **tags: int) -> List[StateRecipe]:
+        """
+        States of the game with all the given tags
+        """
+        return [
+            state
+            for state in self.states
+            if state.game == game
+            and all(state.tags.get(key) == value for key, value in tags.items())
+        ]
+
+    def sample(
+        self, game: str, count: int, rng: random.Random = random, **tags: int
+    ) -> List[StateRecipe]:
+        """
+        Draws states of the game with the given tags, with replacement
+        """
+        states = self.find(game, **tags)
+        require(len(states) > 0, f"No {game} states with tags {tags}")
+
+        return rng.choices(states, k=count)
+
+    def ram(self, state: StateRecipe) -> np.ndarray:
+        return np.frombuffer(self._read(state.ram), dtype=np.uint8)
+
+    def recipe(self, state: StateRecipe) -> bytes:
+        return self._read(state.recipe)
+
+    def restore(self, env: BaseEnv, state: StateRecipe):
+        """
+        Brings a game ready env to the state by replaying its recipe, exactly and at
+            the cost of emulating every frame of it
+        """
+        env.reset(seed=state.seed)
+
+        for action in self.recipe(state):
+            env.step(action)
+
+    def start(self, state: StateRecipe) -> BaseEnv:
+        """
+        An emulator at the state, owned by the library: the first start of the state in
+            the process replays its recipe, the following ones rewind to it
+        """
+        key = (state.game, state.recipe)
+        env = self._envs.get(key)
+
+        if env is not None:
+            self._envs.move_to_end(key)
+            env.rewind()
+            return env
+
+        env = boot_env(state.game)
+        self.restore(env, state)
+        env.snapshot()
+        self._envs[key] = env
+
+        if len(self._envs) > self.envs:
+            _, evicted = self._envs.popitem(last=False)
+            evicted.close()
+
+        return env
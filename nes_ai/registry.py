@@ -0,0 +1,103 @@
+"""
+Registry of the supported games.
+
+The emulator and the game code are only imported when a game is first made, so that
+    importing `nes_ai` stays cheap for short lived workers and command line tools.
+"""
+
+import importlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, NamedTuple, Tuple, Type
+
+from nes_ai.util.prerequisites import require
+
+if TYPE_CHECKING:
+    from nes_ai.env import BaseEnv
+
+ROMS_FOLDER = Path(__file__).parent / "roms"
+
+
+# a named tuple rather than a dataclass, importing dataclasses is a large part of the
+# package import time
+class GameSpec(NamedTuple):
+    # noinspection PyUnresolvedReferences
+    """
+    Where to find a game
+
+    Parameters
+    ----------
+    name : str
+        Name used to make the game.
+    entry_point : str
+        Env class as `module:Class`.
+    rom : str
+        Name of the rom in the roms folder, without extension.
+
+    """
+
+    name: str
+    entry_point: str
+    rom: str
+
+    @property
+    def module(self) -> str:
+        return self.entry_point.split(":")[0]
+
+
+_games: Dict[str, GameSpec] = dict()
+
+
+def register(name: str, entry_point: str, rom: str):
+    """
+    Registers a game, without importing it
+    """
+    require(":" in entry_point, f"Entry point must be module:Class, got {entry_point}")
+    _games[name] = GameSpec(name=name, entry_point=entry_point, rom=rom)
+
+
+def spec(name: str) -> GameSpec:
+    require(name in _games, f"Unknown game {name}, expected one of {games()}")
+    return _games[name]
+
+
+def games() -> Tuple[str, ...]:
+    return tuple(_games)
+
+
+def load(name: str) -> Type["BaseEnv"]:
+    """
+    Imports and returns the env class of a game
+    """
+    module, class_name = spec(name).entry_point.split(":")
+    return getattr(importlib.import_module(module), class_name)
+
+
+def make(name: str, **kwargs) -> "BaseEnv":
+    """
+    Creates the env of a game, importing the emulator on first use
+
+    Parameters
+    ----------
+    name : str
+        Name of a registered game, like `tetris` or `mario`.
+    kwargs
+        Arguments passed to the env.
+
+    Returns
+    -------
+    BaseEnv
+        A new env of the game.
+
+    """
+    return load(name)(**kwargs)
+
+
+def rom_path(name: str) -> Path:
+    """
+    Path of a rom shipped with the package, given its name without extension
+    """
+    return ROMS_FOLDER / f"{name}.nes"
+
+
+register("tetris", "nes_ai.tetris.env:Tetris", "tetris")
+register("mario", "nes_ai.mario.env:SuperMario", "super_mario")
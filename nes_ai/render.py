@@ -0,0 +1,268 @@
+"""
+Render and record service that keeps display and video encoding out of the emulation.
+
+The service owns a shared buffer of one screen per slot. An env with a slot copies its
+    screen into it every `decimation` frames and goes on, it never waits for the
+    display: a per slot sequence counter, odd while a copy is in progress, lets the
+    background process skip a torn frame instead of locking. The background process
+    wakes up at its own frame rate, tiles the slots into a single view for the window
+    and writes the new frames of every slot to its own video.
+
+The service must be started before the workers are forked, so that they inherit the
+    shared buffer, and a worker claims a slot for the env it plays on.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from nes_ai.util.prerequisites import require
+
+if TYPE_CHECKING:
+    from nes_ai.env import BaseEnv
+
+logger = logging.getLogger(__name__)
+
+SCREEN_SHAPE = (240, 256, 3)
+
+
+class ViewerSink:
+    """
+    Window that shows the frames, with the image viewer of nes_py
+    """
+
+    def __init__(self, shape: Tuple[int, ...], caption: str = "nes_ai"):
+        from nes_py._image_viewer import ImageViewer
+
+        height, width = shape[:2]
+        self._viewer = ImageViewer(caption, height, width)
+
+    def write(self, frame: np.ndarray):
+        self._viewer.show(frame)
+
+    def close(self):
+        self._viewer.close()
+
+
+class VideoSink:
+    """
+    Video file encoded by an ffmpeg process from raw rgb frames
+    """
+
+    def __init__(self, shape: Tuple[int, ...], path: Union[str, Path], fps: float):
+        require(shutil.which("ffmpeg") is not None, "Recording videos needs ffmpeg")
+
+        height, width = shape[:2]
+        command = (
+            f"ffmpeg -loglevel error -y -f rawvideo -pix_fmt rgb24 -s {width}x{height} "
+            f"-r {fps} -i - -pix_fmt yuv420p {path}"
+        )
+        self._process = subprocess.Popen(command.split(), stdin=subprocess.PIPE)
+
+    def write(self, frame: np.ndarray):
+        self._process.stdin.write(np.ascontiguousarray(frame).tobytes())
+
+    def close(self):
+        self._process.stdin.close()
+        self._process.wait()
+
+
+class DisplaySlot:
+    """
+    The end of a slot of the service an env pushes its screen to, see
+        `BaseEnv.display`
+    """
+
+    def __init__(
+        self, frames: np.ndarray, sequences: np.ndarray, index: int, decimation: int
+    ):
+        self.index = index
+        self.decimation = decimation
+        self.frame_count = 0
+
+        self._frame = frames[index]
+        self._sequences = sequences
+
+    def push(self, screen: np.ndarray):
+        self.frame_count += 1
+
+        if self.frame_count % self.decimation:
+            return
+
+        self._sequences[self.index] += 1
+        np.copyto(self._frame, screen)
+        self._sequences[self.index] += 1
+
+
+class RenderService:
+    """
+    Background process that shows and records the screens pushed to its slots
+
+    Parameters
+    ----------
+    slots : int
+        Screens shown at the same time, tiled in a grid.
+    decimation : int
+        An env pushes one frame out of `decimation`.
+    fps : float
+        Frames per second of the window and of the videos.
+    show : bool
+        Whether to open a window with the tiled slots.
+    record : str or Path, optional
+        Folder of the videos, one per slot, nothing is recorded if not given.
+    sinks : Sequence of Callable, optional
+        Other outputs of the tiled view, created in the background process from the
+            shape of the view, anything with `write(frame)` and `close()`.
+
+    """
+
+    def __init__(
+        self,
+        slots: int = 1,
+        decimation: int = 4,
+        fps: float = 15.0,
+        show: bool = True,
+        record: Optional[Union[str, Path]] = None,
+        sinks: Sequence[Callable] = (),
+    ):
+        require(slots > 0, f"The service needs at least a slot, got {slots}")
+        require(decimation > 0, f"Decimation must be positive, got {decimation}")
+
+        self.slots = slots
+        self.decimation = decimation
+        self.fps = fps
+        self.columns = math.ceil(math.sqrt(slots))
+        self.rows = math.ceil(slots / self.columns)
+
+        self._factories: List[Callable] = list(sinks)
+        if show:
+            self._factories.append(ViewerSink)
+        self._record = Path(record) if record is not None else None
+        if self._record is not None:
+            require(shutil.which("ffmpeg") is not None, "Recording videos needs ffmpeg")
+            self._record.mkdir(parents=True, exist_ok=True)
+
+        context = multiprocessing.get_context("fork")
+        self._frames = np.frombuffer(
+            context.RawArray("B", slots * int(np.prod(SCREEN_SHAPE))), dtype=np.uint8
+        ).reshape((slots, *SCREEN_SHAPE))
+        self._sequences = np.frombuffer(context.RawArray("q", slots), dtype=np.int64)
+        self._claimed = context.Value("i", 0)
+        # slot of the process that last attached an env, claimed once per process
+        self._owner: Optional[int] = None
+        self._owned: Optional[DisplaySlot] = None
+        self._stop = context.Event()
+        self._process = context.Process(target=self._serve, daemon=True)
+
+    def start(self) -> "RenderService":
+        self._process.start()
+        return self
+
+    def slot(self, index: int) -> DisplaySlot:
+        require(0 <= index < self.slots, f"No slot {index}, there are {self.slots}")
+        return DisplaySlot(self._frames, self._sequences, index, self.decimation)
+
+    def claim(self) -> Optional[DisplaySlot]:
+        """
+        The next slot no process claimed yet, None once all are claimed
+        """
+        with self._claimed.get_lock():
+            index = self._claimed.value
+            self._claimed.value += 1
+
+        return self.slot(index) if index < self.slots else None
+
+    def attach(self, env: "BaseEnv"):
+        """
+        Pushes the screens of the env to the slot of the current process, claimed by
+            its first call, nothing is pushed once all slots are claimed
+        """
+        if self._owner != os.getpid():
+            self._owner = os.getpid()
+            self._owned = self.claim()
+
+        env.display = self._owned
+
+    def close(self):
+        """
+        Stops the background process once it wrote its last view
+        """
+        self._stop.set()
+        self._process.join()
+
+    def __enter__(self) -> "RenderService":
+        return self.start()
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _serve(self):
+        height, width, channels = SCREEN_SHAPE
+        view = np.zeros((self.rows * height, self.columns * width, channels), np.uint8)
+        tiles = [
+            view[
+                row * height : (row + 1) * height,
+                column * width : (column + 1) * width,
+            ]
+            for row in range(self.rows)
+            for column in range(self.columns)
+        ][: self.slots]
+
+        sinks = [factory(view.shape) for factory in self._factories]
+        videos = (
+            [
+                VideoSink(SCREEN_SHAPE, self._record / f"slot_{index}.mp4", self.fps)
+                for index in range(self.slots)
+            ]
+            if self._record is not None
+            else []
+        )
+        shown = np.zeros(self.slots, dtype=np.int64)
+
+        try:
+            while True:
+                start = time.perf_counter()
+                # the frames pushed before the stop are still written
+                stop = self._stop.is_set()
+                updated = self._copy_slots(tiles, shown)
+
+                if updated:
+                    for sink in sinks:
+                        sink.write(view)
+                for index in updated if videos else ():
+                    videos[index].write(tiles[index])
+
+                if stop:
+                    break
+                time.sleep(max(0.0, 1 / self.fps - (time.perf_counter() - start)))
+        except BaseException:
+            logger.exception("Render service failed")
+        finally:
+            for sink in sinks + videos:
+                sink.close()
+
+    def _copy_slots(self, tiles: List[np.ndarray], shown: np.ndarray) -> List[int]:
+        # copies the slots with a new complete frame, a torn one waits for the next view
+        updated = list()
+
+        for index, tile in enumerate(tiles):
+            sequence = int(self._sequences[index])
+
+            if sequence == shown[index] or sequence % 2:
+                continue
+
+            np.copyto(tile, self._frames[index])
+
+            if self._sequences[index] == sequence:
+                shown[index] = sequence
+                updated.append(index)
+
+        return updated
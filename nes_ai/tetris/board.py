@@ -0,0 +1,84 @@
+"""
+Boards to start Tetris episodes from, loaded straight into the RAM, so that curriculum
+    and regression sets are played in milliseconds per board instead of reaching each
+    board by playing a game
+"""
+
+import functools
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from nes_ai.bootstrap import booted_env
+from nes_ai.tetris.env import Tetris
+from nes_ai.tetris.field import CurrentPiece, Field
+from nes_ai.tetris.piece import Piece
+
+# boards sent to a worker in each task
+CHUNKSIZE = 64
+
+
+class Board(NamedTuple):
+    field: Field
+    piece: Optional[CurrentPiece] = None
+    next_piece: Optional[Piece] = None
+    level: Optional[int] = None
+    score: Optional[int] = None
+    lines: Optional[int] = None
+    seed: Optional[int] = None
+
+
+def board_from_ram(ram: np.ndarray) -> Board:
+    """
+    The board of a recorded RAM, for example of a corpus
+    """
+    tetris = Tetris.from_ram(ram)
+    stats = tetris.stats
+
+    return Board(
+        field=tetris.field,
+        piece=tetris.piece,
+        next_piece=tetris.next_piece,
+        level=stats.level,
+        score=stats.score,
+        lines=stats.lines,
+    )
+
+
+def play_board(episode: Callable[[Tetris], Any], board: Board) -> Any:
+    """
+    Loads the board on the game ready emulator of the process and plays the episode
+    """
+    tetris = booted_env("tetris", reset=False)
+    tetris.load_board(*board)
+
+    return episode(tetris)
+
+
+def play_boards(
+    pool: Any,
+    episode: Callable[[Tetris], Any],
+    boards: Sequence[Board],
+    chunksize: int = CHUNKSIZE,
+) -> List:
+    """
+    Plays the episode from every board on a bootstrapped pool
+
+    Parameters
+    ----------
+    pool : Pool
+        Pool of workers, from `bootstrap_pool` with the tetris game.
+    episode : Callable
+        Module level function that plays the loaded game and returns its result.
+    boards : Sequence of Board
+        Boards to play.
+    chunksize : int
+        Boards sent to a worker in each task.
+
+    Returns
+    -------
+    list
+        Result of every board, in order.
+
+    """
+    return pool.map(functools.partial(play_board, episode), boards, chunksize)
@@ -3,15 +3,18 @@ Tetris represented as an openai nes environment.
 """
 
 import random
-from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence, Tuple
 
 import numpy as np
+from nes_py.wrappers import JoypadSpace
 
 from nes_ai.env import BaseEnv
-from nes_ai.tetris.field import FIELD_SHAPE, CurrentPiece, Field, Point
-from nes_ai.tetris.info import GamePhase, Info, Statistics
+from nes_ai.input import MOVEMENT, Button, Joypad
+from nes_ai.registry import rom_path
+from nes_ai.tetris.field import FIELD_SHAPE, CurrentPiece, Field, FieldState, Point
+from nes_ai.tetris.info import Event, GamePhase, Info, Statistics
 from nes_ai.tetris.piece import Piece, build_pieces
+from nes_ai.util.prerequisites import require
 
 
 class Tetris(BaseEnv):
@@ -23,6 +26,7 @@ class Tetris(BaseEnv):
         Info.SCORE: (0x0053, 0x0054, 0x0055),
         Info.LINES: (0x0050, 0x0051),
         Info.PHASE: 0x00C0,
+        Info.PLAY_STATE: 0x0048,
         Info.PIECE_XY: (0x0040, 0x0041),
         Info.PIECE_ID: 0x0042,
         Info.PIECE_ID_NEXT: 0x0019,
@@ -31,6 +35,30 @@ class Tetris(BaseEnv):
         Info.FIELD: range(0x0400, 0x04C7 + 1),
     }
 
+    # every frame the game copies the player variables from 0x0060-0x007F to the
+    # current ones at 0x0040-0x005F
+    PLAYER_COPY_OFFSET = 0x20
+    FALL_TIMER = 0x0045
+    # row of the field the game draws next, from 0x20 on the field is drawn
+    DRAWN_ROW = 0x0049
+
+    # states of the piece in play, the others are the steps between a lock and the next
+    # spawn, checking and counting the lines
+    ACTIVE_PIECE = 0x01
+    LOCKING_PIECE = 0x02
+    CLEARING_LINES = 0x04
+    GAME_OVER = 0x0A
+
+    # counters read before and after every frame by `advance_until`
+    _EVENT_ADDRS = [
+        RAM_INPUT_MAP[Info.PIECES],
+        RAM_INPUT_MAP[Info.PHASE],
+        RAM_INPUT_MAP[Info.PLAY_STATE],
+    ]
+
+    EMPTY_CELL = 0xEF
+    FILLED_CELL = 0x7B
+
     GAME_PHASE_OUTPUT_MAP = {
         0x00: GamePhase.LEGAL,
         0x01: GamePhase.TITLE,
@@ -41,10 +69,189 @@ class Tetris(BaseEnv):
     }
 
     def __init__(self, pieces: Optional[Dict[int, Piece]] = None):
-        super().__init__(str(Path(__file__).parents[1] / "roms" / "tetris.nes"))
+        super().__init__(str(rom_path("tetris")))
+        self.field_state = FieldState()
         self.reset()
         self._pieces = pieces or build_pieces()
 
+    @classmethod
+    def from_ram(
+        cls, ram: np.ndarray, pieces: Optional[Dict[int, Piece]] = None
+    ) -> "Tetris":
+        env = super().from_ram(ram)
+        env._pieces = pieces or build_pieces()
+        env.field_state = FieldState()
+
+        return env
+
+    def start(self):
+        """
+        Goes through the title and menu screens until a game is in play
+        """
+        player = Joypad(JoypadSpace(self, MOVEMENT))
+
+        while self.game_phase != GamePhase.PLAY:
+            if self.game_phase == GamePhase.LEVEL_AND_HEIGHT:
+                player.press((Button.DOWN,), delay=5)
+                player.press((Button.RIGHT,), delay=5)
+                player.press((Button.RIGHT,), delay=5)
+                player.press((Button.RIGHT,), delay=5)
+                player.press((Button.RIGHT,), delay=5)
+                player.press((Button.START,), delay=5)
+            else:
+                player.press((Button.START,), delay=5)
+
+    def load_board(
+        self,
+        field: Field,
+        piece: Optional[CurrentPiece] = None,
+        next_piece: Optional[Piece] = None,
+        level: Optional[int] = None,
+        score: Optional[int] = None,
+        lines: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        Starts an episode on the board, written to the RAM over the game ready
+            snapshot, and steps until the game has drawn it
+
+        Parameters
+        ----------
+        field : Field
+            Cells of the field, 1 for a filled one.
+        piece : CurrentPiece, optional
+            Falling piece and its position, the one of the snapshot by default.
+        next_piece : Piece, optional
+            Next piece, the one of the snapshot by default.
+        level : int, optional
+            Level, which sets the falling speed.
+        score : int, optional
+            Score, up to 999999.
+        lines : int, optional
+            Lines cleared, up to 9999.
+        seed : int, optional
+            Seed of the pieces that follow, a random one by default.
+
+        """
+        require(self._has_backup, "Boards are loaded over a snapshot of a game in play")
+
+        self._will_reset()
+        self._restore()
+        self.done = False
+
+        rng = random if seed is None else random.Random(seed)
+        self.ram[0x0017:0x0019] = rng.randint(0, 255), rng.randint(0, 255)
+        addrs = self.RAM_INPUT_MAP[Info.FIELD]
+        self.ram[addrs[0] : addrs[-1] + 1] = np.where(
+            field.array.ravel(), self.FILLED_CELL, self.EMPTY_CELL
+        )
+
+        if next_piece is not None:
+            self.ram[self.RAM_INPUT_MAP[Info.PIECE_ID_NEXT]] = self._piece_id(
+                next_piece
+            )
+        if level is not None:
+            self._write_player(self.RAM_INPUT_MAP[Info.LEVEL_SPEED], level)
+        if score is not None:
+            self._write_bcd(Info.SCORE, score)
+        if lines is not None:
+            self._write_bcd(Info.LINES, lines)
+
+        self._write_piece(piece)
+        self._write_player(self.DRAWN_ROW, 0)
+
+        while self.ram[self.DRAWN_ROW] < 0x20:
+            self._frame_advance(0)
+
+        # the piece starts its fall once the board is drawn
+        self._write_piece(piece)
+        self._write_player(self.FALL_TIMER, 0)
+
+    def advance_until(
+        self, *events: Event, action: int = 0, max_frames: Optional[int] = None
+    ) -> Optional[Event]:
+        """
+        Steps with the action held until one of the events happens, the RAM is only
+            checked between frames so the agent wakes up at its next decision point
+
+        Parameters
+        ----------
+        events : Event
+            Events to stop at, all of them by default.
+        action : int
+            Controller byte held, no button by default.
+        max_frames : int, optional
+            Frames after which it stops even if no event happened.
+
+        Returns
+        -------
+        Event, optional
+            The event of the last frame, None if the frames ran out first or the
+                episode is done.
+
+        """
+        events = events or tuple(Event)
+        frames = 0
+
+        while not self.done and (max_frames is None or frames < max_frames):
+            before = self.ram[self._EVENT_ADDRS]
+            self.step(action)
+            frames += 1
+
+            if event := self._event(events, before, self.ram[self._EVENT_ADDRS]):
+                return event
+
+        return None
+
+    def _event(
+        self, events: Sequence[Event], before: np.ndarray, after: np.ndarray
+    ) -> Optional[Event]:
+        (pieces, phase, state), (new_pieces, new_phase, new_state) = before, after
+        happened = (
+            (Event.GAME_OVER, new_state == self.GAME_OVER != state),
+            (Event.PHASE_CHANGE, new_phase != phase),
+            (Event.NEW_PIECE, new_pieces != pieces),
+            (Event.PIECE_LOCKED, new_state == self.LOCKING_PIECE != state),
+            (Event.LINES_CLEARED, state == self.CLEARING_LINES != new_state),
+        )
+        return next((event for event, hit in happened if hit and event in events), None)
+
+    @property
+    def play_state(self) -> int:
+        return self._read_byte(Info.PLAY_STATE) or 0
+
+    @property
+    def is_game_over(self) -> bool:
+        """
+        Whether the game ended, from the start of the curtain animation on
+        """
+        return self.play_state == self.GAME_OVER or self.field.is_full
+
+    def _piece_id(self, piece: Piece) -> int:
+        return next(key for key, value in self._pieces.items() if value == piece)
+
+    def _write_player(self, addr: int, value: int):
+        self.ram[addr] = value
+        self.ram[addr + self.PLAYER_COPY_OFFSET] = value
+
+    def _write_piece(self, piece: Optional[CurrentPiece]):
+        if piece is None or piece.piece is None:
+            return
+
+        self._write_player(
+            self.RAM_INPUT_MAP[Info.PIECE_ID], self._piece_id(piece.piece)
+        )
+
+        if piece.position is not None:
+            x_addr, y_addr = self.RAM_INPUT_MAP[Info.PIECE_XY]
+            self._write_player(x_addr, piece.position.x)
+            self._write_player(y_addr, piece.position.y)
+
+    def _write_bcd(self, key: Info, value: int):
+        for addr in self.RAM_INPUT_MAP[key]:
+            self._write_player(addr, (value // 10 % 10) << 4 | value % 10)
+            value //= 100
+
     @property
     def stats(self) -> Statistics:
         return Statistics(
@@ -84,10 +291,33 @@ class Tetris(BaseEnv):
 
         return Field(np_field.reshape(FIELD_SHAPE))
 
+    def features(self) -> Optional[Tuple]:
+        """
+        `Field.features` of the current piece, with the features without the piece
+            kept up to date by the field state instead of computed from scratch
+        """
+        state = self.update_field_state()
+        return state.field.features(self.piece, self.next_piece, state.static)
+
+    def update_field_state(self) -> FieldState:
+        """
+        Brings the field state up to date with the cells in the RAM
+        """
+        addrs = self.RAM_INPUT_MAP[Info.FIELD]
+        cells = self.ram[addrs[0] : addrs[-1] + 1].reshape(FIELD_SHAPE)
+        self.field_state.update(cells != self.EMPTY_CELL)
+
+        return self.field_state
+
+    def state_tags(self) -> Dict[str, int]:
+        rows = np.flatnonzero(self.field.array.any(axis=1))
+        return {"height": int(FIELD_SHAPE[0] - rows[0]) if len(rows) else 0}
+
     def _did_reset(self):
         """Handle any RAM hacking after a reset occurs."""
-        # skip frames and seed the random number generator
-        seed = random.randint(0, 255), random.randint(0, 255)
+        # skip frames and seed the random number generator of the game
+        rng = random if self.episode_seed is None else random.Random(self.episode_seed)
+        seed = rng.randint(0, 255), rng.randint(0, 255)
         for _ in range(14):
             self.ram[0x0017:0x0019] = seed
             self._frame_advance(0)
@@ -3,12 +3,13 @@ Class and functions that illustrate a Tetris field
 """
 
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import NamedTuple, Optional, Tuple
 
 import numpy as np
 
 from nes_ai.tetris.piece import Piece
 from nes_ai.util.prerequisites import require
+from nes_ai.util.trace import FEATURES, timed
 
 FIELD_SHAPE = (20, 10)
 
@@ -69,38 +70,30 @@ class Field:
 
         return grid
 
-    def features(self, piece: "CurrentPiece", next_piece: Piece) -> Optional[Tuple]:
+    def static_features(self) -> "StaticFeatures":
         """
-        Returns the features to be consumed by the network
+        Features of the field without the piece, they only change when a piece locks
+            or lines are cleared
+        """
+        return StaticFeatures.from_columns(*heights_and_holes(self._array))
+
+    @timed(FEATURES)
+    def features(
+        self,
+        piece: "CurrentPiece",
+        next_piece: Piece,
+        static: Optional["StaticFeatures"] = None,
+    ) -> Optional[Tuple]:
+        """
+        Returns the features to be consumed by the network, the features without the
+            piece are computed if not given
         """
 
-        # without pieces
-        # heights: 10 features
-        heights = (self._array != 0).argmax(axis=0)
-        heights[heights == 0] = self._array.shape[0]
-
-        # holes: 10 features
-        holes = np.array(
-            [
-                int(column[heights[index] :].sum(0))
-                if heights[index] < self._array.shape[0]
-                else 0
-                for index, column in enumerate((1 - self._array).T)
-            ]
+        # without pieces: heights, holes, max_height, height difference and their sum
+        heights, holes, height_diff, max_height, sum_height_diff = (
+            static or self.static_features()
         )
 
-        heights = heights / FIELD_SHAPE[0]
-        holes = holes / FIELD_SHAPE[0]
-
-        # max_height: 1 feature
-        max_height = max(heights)
-
-        # height difference: 9 features
-        height_diff = np.diff(heights)
-
-        # sum_height_diff: 1 feature
-        sum_height_diff = sum(height_diff)
-
         # with pieces
         # features: pieces, offsets: 12 features
         if piece.piece and piece.position:
@@ -121,19 +114,8 @@ class Field:
         if array_w_piece is None:
             return None
 
-        # heights: 10 features
-        heights_w_piece = (array_w_piece != 0).argmax(axis=0)
-        heights_w_piece[heights_w_piece == 0] = array_w_piece.shape[0]
-
-        # holes: 10 features
-        holes_w_piece = np.array(
-            [
-                int(column[heights_w_piece[index] :].sum(0))
-                if heights_w_piece[index] < array_w_piece.shape[0]
-                else 0
-                for index, column in enumerate((1 - array_w_piece).T)
-            ]
-        )
+        # heights and holes: 10 features each
+        heights_w_piece, holes_w_piece = heights_and_holes(array_w_piece)
 
         heights_w_piece = heights_w_piece / FIELD_SHAPE[0]
         holes_w_piece = holes_w_piece / FIELD_SHAPE[0]
@@ -188,6 +170,100 @@ class Field:
         return self.array_with_piece(piece)
 
 
+def heights_and_holes(array: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row of the top cell of every column, the number of rows for an empty one or one
+        filled up to the first row, and the empty cells under it
+    """
+    heights = (array != 0).argmax(axis=0)
+    heights[heights == 0] = array.shape[0]
+
+    below = np.arange(array.shape[0])[:, np.newaxis] >= heights
+    holes = ((array == 0) & below).sum(axis=0)
+
+    return heights, holes
+
+
+class StaticFeatures(NamedTuple):
+    # noinspection PyUnresolvedReferences
+    """
+    Features of the field without the piece, see `Field.features`
+
+    Parameters
+    ----------
+    heights : np.ndarray
+        Height of every column, in rows from the top over the number of rows.
+    holes : np.ndarray
+        Holes of every column over the number of rows.
+    height_diff : np.ndarray
+        Differences of the heights of neighbouring columns.
+    max_height : float
+        Maximum of the heights.
+    sum_height_diff : float
+        Sum of the differences.
+
+    """
+
+    heights: np.ndarray
+    holes: np.ndarray
+    height_diff: np.ndarray
+    max_height: float
+    sum_height_diff: float
+
+    @classmethod
+    def from_columns(cls, heights: np.ndarray, holes: np.ndarray) -> "StaticFeatures":
+        heights = heights / FIELD_SHAPE[0]
+        height_diff = np.diff(heights)
+
+        return cls(
+            heights=heights,
+            holes=holes / FIELD_SHAPE[0],
+            height_diff=height_diff,
+            max_height=max(heights),
+            sum_height_diff=sum(height_diff),
+        )
+
+
+class FieldState:
+    """
+    The field of a game and its features without the piece, kept up to date from the
+        RAM. Every update diffs the cells with the previous ones and only recounts the
+        columns of the rows that changed, so between a lock and the next one it costs
+        a comparison and the features are returned as they are.
+    """
+
+    def __init__(self):
+        self.array = np.zeros(FIELD_SHAPE, dtype=np.int64)
+        self._heights, self._holes = heights_and_holes(self.array)
+        self._static = StaticFeatures.from_columns(self._heights, self._holes)
+
+    @property
+    def field(self) -> Field:
+        return Field(self.array)
+
+    @property
+    def static(self) -> StaticFeatures:
+        return self._static
+
+    def update(self, cells: np.ndarray) -> bool:
+        """
+        Takes the filled cells of the field, returns whether any changed
+        """
+        changed = cells != self.array
+
+        if not changed.any():
+            return False
+
+        columns = np.flatnonzero(changed.any(axis=0))
+        self.array = cells.astype(np.int64, copy=True)
+        self._heights[columns], self._holes[columns] = heights_and_holes(
+            self.array[:, columns]
+        )
+        self._static = StaticFeatures.from_columns(self._heights, self._holes)
+
+        return True
+
+
 @dataclass
 class Point:
     """
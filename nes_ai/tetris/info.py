@@ -19,6 +19,18 @@ class GamePhase(Enum):
     DEMO = auto()
 
 
+class Event(Enum):
+    """
+    Events of a game in play that `Tetris.advance_until` stops at
+    """
+
+    NEW_PIECE = auto()
+    PIECE_LOCKED = auto()
+    LINES_CLEARED = auto()
+    GAME_OVER = auto()
+    PHASE_CHANGE = auto()
+
+
 class Info(Enum):
     """
     Information that can be requested from the game's RAM
@@ -27,6 +39,7 @@ class Info(Enum):
     SCORE = auto()
     LINES = auto()
     PHASE = auto()
+    PLAY_STATE = auto()
     PIECE_X = auto()
     PIECE_Y = auto()
     PIECE_XY = auto()
@@ -0,0 +1,348 @@
+"""
+Search-based Tetris controller, a baseline for the networks: every placement of the
+    current piece is followed by every placement of the next one, and the leaves are
+    scored by an evaluator.
+
+A placement is an orientation and a column, the piece is dropped straight down from
+    the top. The boards after the first piece are scored too and only the best `beam`
+    are expanded, boards reached by different placements are expanded once, and the
+    scores of the leaves are kept in a transposition table by packed board. The search
+    stops expanding once its time budget is spent, which is checked before every
+    expansion, and returns the best placement found, the one of the best board after
+    the first piece if no board was expanded.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from nes_py.wrappers import JoypadSpace
+
+from nes_ai.input import MOVEMENT, Button, Joypad
+from nes_ai.tetris.env import Tetris
+from nes_ai.tetris.field import FIELD_SHAPE, StaticFeatures, heights_and_holes
+from nes_ai.tetris.info import Info
+from nes_ai.tetris.piece import Piece, build_pieces
+from nes_ai.util.prerequisites import require
+
+ROWS, COLUMNS = FIELD_SHAPE
+
+# piece ids of every tetromino, button A rotates to the next one of its group
+ROTATIONS = ((0x00, 0x01, 0x02, 0x03), (0x04, 0x05, 0x06, 0x07), (0x08, 0x09))
+ROTATIONS += ((0x0A,), (0x0B, 0x0C), (0x0D, 0x0E, 0x0F, 0x10), (0x11, 0x12))
+
+# weights of aggregate height, lines, holes and bumpiness of a well known hand tuned
+# heuristic
+HEURISTIC_WEIGHTS = (-0.510066, 0.760666, -0.35663, -0.184483)
+
+DEFAULT_BEAM = 8
+DEFAULT_BUDGET = 0.05
+
+# score of a board and the lines its placements cleared
+Evaluator = Callable[[np.ndarray, int], float]
+
+
+class Placement(NamedTuple):
+    piece_id: int
+    x: int
+    y: int
+
+
+@dataclass
+class SearchResult:
+    # noinspection PyUnresolvedReferences
+    """
+    Outcome of a search
+
+    Parameters
+    ----------
+    placement : Placement, optional
+        Best placement of the current piece, None if it fits nowhere.
+    score : float
+        Score of the best leaf under it.
+    nodes : int
+        Boards generated.
+    seconds : float
+        Duration of the search.
+    complete : bool
+        Whether every beam board was expanded within the budget.
+
+    """
+
+    placement: Optional[Placement]
+    score: float
+    nodes: int
+    seconds: float
+    complete: bool
+
+
+def heuristic(board: np.ndarray, lines: int) -> float:
+    """
+    Hand tuned linear score of the aggregate height, cleared lines, holes and
+        bumpiness
+    """
+    heights, holes = heights_and_holes(board)
+    heights = ROWS - heights
+
+    height, line, hole, bumpiness = HEURISTIC_WEIGHTS
+    return (
+        height * heights.sum()
+        + line * lines
+        + hole * holes.sum()
+        + bumpiness * np.abs(np.diff(heights)).sum()
+    )
+
+
+def network_evaluator(evaluate: Callable[[Sequence[float]], Sequence[float]]):
+    """
+    Evaluator of a network, for example a compiled individual, whose first output
+        scores the features of the board without the piece followed by the lines
+    """
+
+    def evaluator(board: np.ndarray, lines: int) -> float:
+        static = StaticFeatures.from_columns(*heights_and_holes(board))
+        inputs = np.concatenate(
+            (
+                static.heights,
+                static.holes,
+                static.height_diff,
+                [static.max_height, static.sum_height_diff, lines / 4],
+            )
+        )
+        return float(evaluate(inputs)[0])
+
+    return evaluator
+
+
+class _Shape(NamedTuple):
+    piece_id: int
+    rows: np.ndarray
+    columns: np.ndarray
+
+
+def _shapes(pieces: Dict[int, Piece]) -> Dict[int, _Shape]:
+    shapes = dict()
+
+    for piece_id, piece in pieces.items():
+        rows = np.array([0] + [offset.y for offset in piece.offsets])
+        columns = np.array([0] + [offset.x for offset in piece.offsets])
+        shapes[piece_id] = _Shape(piece_id, rows, columns)
+
+    return shapes
+
+
+def _surface(board: np.ndarray) -> np.ndarray:
+    # row of the top filled cell of every column, the number of rows when empty
+    filled = board.any(axis=0)
+    return np.where(filled, board.argmax(axis=0), ROWS)
+
+
+def _placements(
+    board: np.ndarray, piece_id: int, shapes: Dict[int, _Shape]
+) -> List[Tuple[Placement, np.ndarray, int]]:
+    """
+    Every placement of the piece dropped from the top, with the board it leaves and
+        the lines it clears
+    """
+    surface = _surface(board)
+    group = next(group for group in ROTATIONS if piece_id in group)
+    placements = list()
+
+    for rotation in group:
+        shape = shapes[rotation]
+
+        for x in range(-shape.columns.min(), COLUMNS - shape.columns.max()):
+            columns = x + shape.columns
+            y = int((surface[columns] - 1 - shape.rows).min())
+            rows = y + shape.rows
+
+            if rows.min() < 0:
+                continue
+
+            child = board.copy()
+            child[rows, columns] = True
+            full = child.all(axis=1)
+            lines = int(full.sum())
+
+            if lines:
+                child = np.concatenate(
+                    (np.zeros((lines, COLUMNS), dtype=bool), child[~full])
+                )
+
+            placements.append((Placement(rotation, x, y), child, lines))
+
+    return placements
+
+
+@dataclass
+class SearchAgent:
+    # noinspection PyUnresolvedReferences
+    """
+    Two piece lookahead controller
+
+    Parameters
+    ----------
+    evaluator : Callable
+        Score of a board and the lines cleared to reach it, the higher the better.
+    beam : int
+        Boards after the current piece that are expanded with the next one.
+    budget : float
+        Seconds a search may take, the expansion stops once they are spent.
+    table_size : int
+        Leaf scores kept in the transposition table, it is cleared when full.
+
+    """
+
+    evaluator: Evaluator = heuristic
+    beam: int = DEFAULT_BEAM
+    budget: float = DEFAULT_BUDGET
+    table_size: int = 2**16
+
+    pieces: Dict[int, Piece] = field(default_factory=build_pieces)
+    table: Dict[bytes, float] = field(default_factory=dict)
+
+    def __post_init__(self):
+        require(self.beam > 0, f"The beam must keep at least a board, got {self.beam}")
+        self._shapes = _shapes(self.pieces)
+
+    def _score(self, board: np.ndarray, lines: int) -> float:
+        key = np.packbits(board).tobytes() + bytes((lines,))
+
+        if (score := self.table.get(key)) is None:
+            if len(self.table) >= self.table_size:
+                self.table.clear()
+            score = self.table[key] = self.evaluator(board, lines)
+
+        return score
+
+    def search(
+        self, board: np.ndarray, piece_id: int, next_piece_id: Optional[int]
+    ) -> SearchResult:
+        """
+        Best placement of the piece on the board, looking at the next piece if known
+        """
+        require(piece_id in self.pieces, f"No piece of id {piece_id:#04x}")
+
+        start = time.perf_counter()
+        deadline = start + self.budget
+        board = board.astype(bool)
+
+        # first piece, scored for the beam, boards reached twice are expanded once
+        children: Dict[bytes, Tuple[float, Placement, np.ndarray, int]] = dict()
+        for placement, child, lines in _placements(board, piece_id, self._shapes):
+            key = np.packbits(child).tobytes()
+            score = self._score(child, lines)
+
+            if key not in children or children[key][0] < score:
+                children[key] = (score, placement, child, lines)
+
+        nodes = len(children)
+        ranked = sorted(children.values(), key=lambda child: -child[0])
+        best_score, best, *_ = ranked[0] if ranked else (-np.inf, None)
+        complete = True
+
+        if next_piece_id is not None:
+            lookahead_score, lookahead = -np.inf, best
+            expanded = False
+
+            for score, placement, child, lines in ranked[: self.beam]:
+                if time.perf_counter() > deadline:
+                    complete = False
+                    break
+
+                leaves = _placements(child, next_piece_id, self._shapes)
+                nodes += len(leaves)
+                leaf_score = max(
+                    (
+                        self._score(leaf, lines + leaf_lines)
+                        for _, leaf, leaf_lines in leaves
+                    ),
+                    default=-np.inf,
+                )
+
+                expanded = True
+
+                if leaf_score > lookahead_score:
+                    lookahead_score, lookahead = leaf_score, placement
+
+            # the first piece alone decides when the budget was spent before any board
+            # was expanded
+            if expanded:
+                best_score, best = lookahead_score, lookahead
+
+        return SearchResult(
+            placement=best,
+            score=float(best_score),
+            nodes=nodes,
+            seconds=time.perf_counter() - start,
+            complete=complete,
+        )
+
+    def decide(self, tetris: Tetris) -> SearchResult:
+        """
+        Searches the board of the game in play
+        """
+        ram = tetris.ram
+        next_id = int(ram[tetris.RAM_INPUT_MAP[Info.PIECE_ID_NEXT]])
+
+        return self.search(
+            tetris.update_field_state().array,
+            int(ram[tetris.RAM_INPUT_MAP[Info.PIECE_ID]]),
+            next_id if next_id in self.pieces else None,
+        )
+
+
+def steer(tetris: Tetris, placement: Placement) -> Tuple[Button, ...]:
+    """
+    Buttons that bring the falling piece towards the placement: rotate, then shift,
+        then soft drop
+    """
+    # from the RAM, `Tetris.piece` is empty for the piece of id 0
+    ram = tetris.ram
+    x = int(ram[tetris.RAM_INPUT_MAP[Info.PIECE_XY][0]])
+
+    if int(ram[tetris.RAM_INPUT_MAP[Info.PIECE_ID]]) != placement.piece_id:
+        return (Button.A,)
+    if x < placement.x:
+        return (Button.RIGHT,)
+    if x > placement.x:
+        return (Button.LEFT,)
+    return (Button.DOWN,)
+
+
+def play(tetris: Tetris, agent: SearchAgent, max_pieces: Optional[int] = None) -> List:
+    """
+    Plays a game in play until it is over or `max_pieces` were placed, searching once
+        per piece
+
+    Returns
+    -------
+    list of SearchResult
+        The search of every piece.
+
+    """
+    player = Joypad(JoypadSpace(tetris, MOVEMENT))
+    searches: List[SearchResult] = list()
+    pieces = None
+
+    while not tetris.is_game_over:
+        if tetris.play_state != tetris.ACTIVE_PIECE:
+            tetris.advance_until()
+            continue
+
+        if pieces != tetris.stats.pieces:
+            if max_pieces is not None and len(searches) >= max_pieces:
+                break
+
+            pieces = tetris.stats.pieces
+            searches.append(agent.decide(tetris))
+
+        placement = searches[-1].placement
+        if placement is None:
+            player.press((Button.DOWN,), replay=True)
+        else:
+            buttons = steer(tetris, placement)
+            player.press(buttons, replay=buttons == (Button.DOWN,))
+
+    return searches
@@ -0,0 +1,199 @@
+"""
+Transposition cache of the Tetris features, shared by the processes forked after it is
+    created.
+
+The same boards recur within an episode, across the episodes of an individual and
+    across the siblings of a population, and the features of a board only depend on
+    the field, the piece, its position and the next piece. The key packs the 200 cells
+    of the field into 25 bytes and adds the ids of the pieces and the position. The
+    table is direct mapped: a key has a single slot, picked by a digest of the key, and
+    a new key in a taken slot evicts the old one.
+
+Writers take the lock of the stripe of the slot. Readers take no lock: the version of
+    a slot is odd while it is written, and a read that sees the version change is a
+    miss. The hits and misses are counted by every process and added to the shared
+    counters by `flush`, at the end of an episode.
+"""
+
+import hashlib
+import multiprocessing
+import os
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from nes_ai.tetris.env import Tetris
+from nes_ai.tetris.info import Info
+from nes_ai.util.prerequisites import require
+
+# features of `Field.features`
+N_FEATURES = 74
+
+# packed field, piece, position and next piece, padded to 4 words
+KEY_SIZE = 32
+
+DEFAULT_CAPACITY = 2**14
+STRIPES = 64
+
+# columns of the counters of every stripe
+_HITS, _MISSES, _STORES, _EVICTIONS = range(4)
+
+
+class TranspositionStats(NamedTuple):
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def describe(self) -> str:
+        return (
+            f"{self.hits} of {self.hits + self.misses} features cached, "
+            f"hit rate {100 * self.hit_rate:.1f}%, {self.evictions} evictions"
+        )
+
+
+class FeatureCache:
+    """
+    Bounded table of feature vectors by board
+
+    Parameters
+    ----------
+    capacity : int
+        Slots of the table, each holds the features of one board.
+    n_features : int
+        Length of the feature vectors.
+    stripes : int
+        Locks shared by the writers of the slots.
+
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        n_features: int = N_FEATURES,
+        stripes: int = STRIPES,
+    ):
+        require(capacity > 0, f"The cache needs at least a slot, got {capacity}")
+        require(stripes > 0, f"The cache needs at least a lock, got {stripes}")
+
+        self.capacity = capacity
+        self.n_features = n_features
+
+        context = multiprocessing.get_context("fork")
+        self._keys = np.frombuffer(
+            context.RawArray("B", capacity * KEY_SIZE), dtype=np.uint8
+        ).reshape((capacity, KEY_SIZE))
+        self._values = np.frombuffer(
+            context.RawArray("d", capacity * n_features)
+        ).reshape((capacity, n_features))
+        # 0 for an empty slot, odd while a slot is written
+        self._versions = np.frombuffer(context.RawArray("q", capacity), dtype=np.int64)
+        self._counters = np.frombuffer(
+            context.RawArray("q", stripes * 4), dtype=np.int64
+        ).reshape((stripes, 4))
+        self._locks = [context.Lock() for _ in range(stripes)]
+
+        # of this process since its last flush
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def key(
+        field: np.ndarray, piece_id: int, x: int, y: int, next_piece_id: int
+    ) -> bytes:
+        packed = np.packbits(field.astype(bool)).tobytes()
+        return (packed + bytes((piece_id, x, y, next_piece_id))).ljust(KEY_SIZE, b"\0")
+
+    def _slot(self, key: bytes) -> int:
+        digest = hashlib.blake2b(key, digest_size=8).digest()
+        return int.from_bytes(digest, "little") % self.capacity
+
+    def get(self, key: bytes) -> Optional[Tuple[float, ...]]:
+        slot = self._slot(key)
+        version = self._versions[slot]
+        values = None
+
+        if version and not version % 2 and self._keys[slot].tobytes() == key:
+            values = tuple(self._values[slot].tolist())
+
+            if self._versions[slot] != version:
+                values = None
+
+        if values is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+
+        return values
+
+    def put(self, key: bytes, features: Tuple[float, ...]):
+        slot = self._slot(key)
+        stripe = slot % len(self._locks)
+
+        with self._locks[stripe]:
+            if self._versions[slot] and self._keys[slot].tobytes() != key:
+                self._counters[stripe, _EVICTIONS] += 1
+
+            self._versions[slot] += 1
+            self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+            self._values[slot] = features
+            self._versions[slot] += 1
+            self._counters[stripe, _STORES] += 1
+
+    def features(self, tetris: Tetris) -> Optional[Tuple[float, ...]]:
+        """
+        `Tetris.features` of the current board, from the cache when it was seen
+        """
+        ram = tetris.ram
+        x_addr, y_addr = tetris.RAM_INPUT_MAP[Info.PIECE_XY]
+        key = self.key(
+            tetris.update_field_state().array,
+            int(ram[tetris.RAM_INPUT_MAP[Info.PIECE_ID]]),
+            int(ram[x_addr]),
+            int(ram[y_addr]),
+            int(ram[tetris.RAM_INPUT_MAP[Info.PIECE_ID_NEXT]]),
+        )
+
+        if (features := self.get(key)) is not None:
+            return features
+
+        features = tetris.features()
+        if features is not None:
+            self.put(key, features)
+
+        return features
+
+    def flush(self):
+        """
+        Adds the hits and misses of this process to the shared counters
+        """
+        stripe = os.getpid() % len(self._locks)
+
+        with self._locks[stripe]:
+            self._counters[stripe, _HITS] += self._hits
+            self._counters[stripe, _MISSES] += self._misses
+
+        self._hits = self._misses = 0
+
+    @property
+    def stats(self) -> TranspositionStats:
+        """
+        Counts of all the processes since the last reset, the hits and misses of the
+            other processes as of their last flush
+        """
+        hits, misses, stores, evictions = self._counters.sum(axis=0).tolist()
+        return TranspositionStats(
+            hits + self._hits, misses + self._misses, stores, evictions
+        )
+
+    def reset_stats(self):
+        for stripe, lock in enumerate(self._locks):
+            with lock:
+                self._counters[stripe] = 0
+
+        self._hits = self._misses = 0
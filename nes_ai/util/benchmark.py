@@ -0,0 +1,187 @@
+"""
+Helpers to time benchmarks, store them as JSON and compare them against a baseline
+"""
+
+import json
+import platform
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+from nes_ai.util.prerequisites import require
+
+
+@dataclass
+class BenchmarkResult:
+    # noinspection PyUnresolvedReferences
+    """
+    Timings of a benchmark
+
+    Parameters
+    ----------
+    name : str
+        Name of the benchmark.
+    operations : int
+        Operations done in each timed run, like frames or decisions.
+    unit : str
+        What an operation is.
+    seconds : list of float
+        Duration of each timed run.
+
+    """
+
+    name: str
+    operations: int
+    unit: str = "ops"
+    seconds: List[float] = field(default_factory=list)
+
+    @property
+    def ops_per_second(self) -> float:
+        """
+        Throughput of the fastest run, the least disturbed by the rest of the machine
+        """
+        return self.operations / min(self.seconds)
+
+    def as_dict(self) -> Dict:
+        return {
+            "operations": self.operations,
+            "unit": self.unit,
+            "seconds": self.seconds,
+            "ops_per_second": self.ops_per_second,
+        }
+
+
+@dataclass
+class Regression:
+    name: str
+    baseline: float
+    current: float
+    threshold: float
+
+    @property
+    def change(self) -> float:
+        return self.current / self.baseline - 1
+
+    def __str__(self):
+        return (
+            f"{self.name}: {self.current:.1f} ops/s vs {self.baseline:.1f} ops/s "
+            f"({100 * self.change:+.1f}%, allowed -{100 * self.threshold:.0f}%)"
+        )
+
+
+def run_benchmark(
+    name: str,
+    func: Callable[[], None],
+    operations: int,
+    unit: str = "ops",
+    repeat: int = 5,
+    setup: Optional[Callable[[], None]] = None,
+) -> BenchmarkResult:
+    """
+    Times a function a few times
+
+    Parameters
+    ----------
+    name : str
+        Name of the benchmark.
+    func : Callable
+        Function that does `operations` operations.
+    operations : int
+        Operations done in each call of `func`.
+    unit : str
+        What an operation is.
+    repeat : int
+        Number of timed calls.
+    setup : Callable, optional
+        Function called, untimed, before each timed call.
+
+    Returns
+    -------
+    BenchmarkResult
+        The timings of every call.
+
+    """
+    require(repeat > 0, "A benchmark must run at least once")
+    result = BenchmarkResult(name=name, operations=operations, unit=unit)
+
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+
+        start = time.perf_counter()
+        func()
+        result.seconds.append(time.perf_counter() - start)
+
+    return result
+
+
+def save_results(results: Sequence[BenchmarkResult], path: Union[str, Path]):
+    content = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": {result.name: result.as_dict() for result in results},
+    }
+    Path(path).write_text(json.dumps(content, indent=2) + "\n")
+
+
+def load_results(path: Union[str, Path]) -> Dict[str, float]:
+    """
+    Loads the throughput of every benchmark in a file written by `save_results`
+    """
+    content = json.loads(Path(path).read_text())
+    return {
+        name: result["ops_per_second"] for name, result in content["results"].items()
+    }
+
+
+def compare(
+    current: Dict[str, float],
+    baseline: Dict[str, float],
+    threshold: float = 0.2,
+    thresholds: Optional[Dict[str, float]] = None,
+) -> List[Regression]:
+    """
+    Finds the benchmarks whose throughput dropped more than allowed
+
+    Parameters
+    ----------
+    current : dict
+        Throughput by benchmark name.
+    baseline : dict
+        Throughput by benchmark name to compare against, benchmarks missing in either
+            side are ignored.
+    threshold : float
+        Allowed relative drop, 0.2 means 20% slower is still fine.
+    thresholds : dict, optional
+        Allowed relative drop for specific benchmarks.
+
+    Returns
+    -------
+    list of Regression
+        The benchmarks that regressed.
+
+    """
+    thresholds = thresholds or dict()
+    regressions = list()
+
+    for name in sorted(current.keys() & baseline.keys()):
+        allowed = thresholds.get(name, threshold)
+
+        if current[name] < baseline[name] * (1 - allowed):
+            regressions.append(
+                Regression(
+                    name=name,
+                    baseline=baseline[name],
+                    current=current[name],
+                    threshold=allowed,
+                )
+            )
+
+    return regressions
@@ -0,0 +1,70 @@
+"""
+Recorded RAM corpora, so that features can be computed, tested and benchmarked without
+    running the emulator
+"""
+
+from pathlib import Path
+from typing import Callable, Tuple, Union
+
+import numpy as np
+
+from nes_ai.util.prerequisites import require
+
+RAM_SIZE = 0x800
+
+# corpora recorded by `scripts/benchmarks/record_corpus.py`, read by the benchmarks and
+# the tests
+CORPORA_FOLDER = Path(__file__).parents[2] / "scripts" / "benchmarks" / "corpora"
+
+
+def record(step: Callable[[], bool], ram: np.ndarray, frames: int) -> np.ndarray:
+    """
+    Records copies of the RAM
+
+    Parameters
+    ----------
+    step : Callable
+        Advances the game to the next state to record, returns False to skip recording
+            that state.
+    ram : np.ndarray
+        The RAM buffer of the env, it is read after every step.
+    frames : int
+        Number of RAM copies to record.
+
+    Returns
+    -------
+    np.ndarray
+        Array with shape (frames, 0x800) of uint8.
+
+    """
+    rams = np.empty((frames, RAM_SIZE), dtype=np.uint8)
+    index = 0
+
+    while index < frames:
+        if step():
+            rams[index] = ram
+            index += 1
+
+    return rams
+
+
+def save_corpus(path: Union[str, Path], game: str, rams: np.ndarray):
+    require(
+        rams.ndim == 2 and rams.shape[1] == RAM_SIZE,
+        f"Expected RAM copies with shape (n, {RAM_SIZE}), got {rams.shape}",
+    )
+    np.savez_compressed(str(path), game=np.array(game), ram=rams.astype(np.uint8))
+
+
+def load_corpus(path: Union[str, Path]) -> Tuple[str, np.ndarray]:
+    """
+    Loads a corpus saved with `save_corpus`
+
+    Returns
+    -------
+    tuple
+        The game name and the recorded RAM copies.
+
+    """
+    with np.load(str(path)) as corpus:
+        return str(corpus["game"]), corpus["ram"]
@@ -0,0 +1,278 @@
+"""
+Helpers to measure the memory used by the current process and to report how it grows
+    across the episodes of every worker.
+
+Reports are turned on with the `NES_AI_MEMORY` environment variable, set to a folder or
+    to `1` for a temporary one. Each `track` block appends the resident set size before
+    and after it to the process file, and with `NES_AI_TRACEMALLOC=1` also the lines that
+    allocated the most memory in between. A block that raises is recorded too, and the
+    block of a worker killed by the watchdog is recorded by the watchdog, from the
+    marker the block leaves while it runs.
+"""
+
+import json
+import os
+import resource
+import sys
+import tempfile
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+MEMORY_VARIABLE = "NES_AI_MEMORY"
+TRACEMALLOC_VARIABLE = "NES_AI_TRACEMALLOC"
+
+# allocation lines kept per tracked block
+TOP_ALLOCATIONS = 5
+
+_STATM = Path("/proc/self/statm")
+_SMAPS_ROLLUP = Path("/proc/self/smaps_rollup")
+
+_folder: Optional[Path] = None
+
+
+class MemoryRecord(NamedTuple):
+    pid: int
+    label: str
+    rss_before: int
+    rss_after: int
+    traced_growth: int
+    top: List[str]
+
+
+def current_rss() -> int:
+    """
+    Resident set size of the current process in bytes
+
+    Falls back to the peak resident set size on systems without procfs.
+    """
+    if _STATM.exists():
+        return int(_STATM.read_text().split()[1]) * resource.getpagesize()
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def process_rss(pid: int) -> Optional[int]:
+    """
+    Resident set size of another process in bytes, None if it is gone or procfs is
+        missing
+    """
+    try:
+        pages = int(Path(f"/proc/{pid}/statm").read_text().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    return pages * resource.getpagesize()
+
+
+def current_pss() -> int:
+    """
+    Proportional set size of the current process in bytes, where pages shared
+        copy-on-write with other processes are divided between them
+
+    Falls back to the resident set size when the kernel does not report it.
+    """
+    if _SMAPS_ROLLUP.exists():
+        for line in _SMAPS_ROLLUP.read_text().splitlines():
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) * 1024
+
+    return current_rss()
+
+
+def enable(folder: Optional[Path] = None, trace_allocations: bool = False) -> Path:
+    """
+    Turns the memory reports on in this process and in the workers it creates afterwards
+
+    Parameters
+    ----------
+    folder : Path, optional
+        Folder for the process files, a temporary one by default.
+    trace_allocations : bool
+        Whether to also take tracemalloc snapshots around each tracked block.
+
+    Returns
+    -------
+    Path
+        The folder in use.
+
+    """
+    global _folder
+
+    _folder = Path(folder or tempfile.mkdtemp(prefix="nes_ai_memory_"))
+    _folder.mkdir(parents=True, exist_ok=True)
+
+    # spawned workers read the settings from the environment
+    os.environ[MEMORY_VARIABLE] = str(_folder)
+
+    if trace_allocations:
+        os.environ[TRACEMALLOC_VARIABLE] = "1"
+
+    return _folder
+
+
+def disable():
+    global _folder
+
+    _folder = None
+    os.environ.pop(MEMORY_VARIABLE, None)
+    os.environ.pop(TRACEMALLOC_VARIABLE, None)
+
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def enabled() -> bool:
+    return _folder is not None
+
+
+@contextmanager
+def track(label: str = "episode") -> Iterator[None]:
+    """
+    Records the memory growth of a block, like the decision loop of an episode, it does
+        nothing when the reports are off
+    """
+    if _folder is None:
+        yield
+        return
+
+    trace_allocations = bool(os.environ.get(TRACEMALLOC_VARIABLE))
+
+    if trace_allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    before = tracemalloc.take_snapshot() if trace_allocations else None
+    rss_before = current_rss()
+
+    # read by `record_kill` if the process is killed within the block
+    marker = _folder / f"{os.getpid()}.open"
+    marker.write_text(json.dumps((label, rss_before)))
+
+    # an episode that raises, like one over its frame budget, reports its growth too
+    try:
+        yield
+    finally:
+        marker.unlink(missing_ok=True)
+        rss_after = current_rss()
+        traced_growth = 0
+        top: List[str] = list()
+
+        if before is not None:
+            stats = tracemalloc.take_snapshot().compare_to(before, "lineno")
+            traced_growth = sum(stat.size_diff for stat in stats)
+            top = [str(stat) for stat in stats[:TOP_ALLOCATIONS]]
+
+        record = MemoryRecord(
+            os.getpid(), label, rss_before, rss_after, traced_growth, top
+        )
+
+        _write(record)
+
+
+def _write(record: MemoryRecord):
+    with (_folder / f"{record.pid}.jsonl").open("a") as file:
+        file.write(json.dumps(record) + "\n")
+
+
+def record_kill(pid: int):
+    """
+    Records the block a process is in, if any, with its current rss as the rss after,
+        to be called right before the process is killed
+    """
+    if _folder is None:
+        return
+
+    marker = _folder / f"{pid}.open"
+
+    try:
+        label, rss_before = json.loads(marker.read_text())
+    except (OSError, ValueError):
+        return
+
+    rss_after = process_rss(pid)
+    marker.unlink(missing_ok=True)
+    _write(
+        MemoryRecord(
+            pid,
+            f"{label} (killed)",
+            rss_before,
+            rss_before if rss_after is None else rss_after,
+            0,
+            list(),
+        )
+    )
+
+
+def collect(remove: bool = True) -> List[MemoryRecord]:
+    """
+    Reads the records written by every process, in the order they were written
+
+    Parameters
+    ----------
+    remove : bool
+        Whether to delete the files read, so the next call only returns new records.
+
+    Returns
+    -------
+    list of MemoryRecord
+        The records.
+
+    """
+    if _folder is None:
+        return list()
+
+    records = list()
+
+    for path in _folder.glob("*.jsonl"):
+        with path.open() as file:
+            records.extend(MemoryRecord(*json.loads(line)) for line in file)
+
+        if remove:
+            path.unlink()
+
+    return records
+
+
+def format_report(records: Sequence[MemoryRecord], title: str = "") -> str:
+    """
+    Memory of every worker: tracked blocks, last and largest rss, growth over the
+        records, and the lines that allocated the most
+    """
+    by_pid: Dict[int, List[MemoryRecord]] = defaultdict(list)
+
+    for record in records:
+        by_pid[record.pid].append(record)
+
+    lines = [title] if title else list()
+    lines.append(
+        f"{'worker':>8} {'blocks':>7} {'rss':>10} {'max rss':>10} {'growth':>10} "
+        f"{'traced':>10}"
+    )
+
+    for pid, worker_records in sorted(by_pid.items()):
+        growth = worker_records[-1].rss_after - worker_records[0].rss_before
+        traced = sum(record.traced_growth for record in worker_records)
+        lines.append(
+            f"{pid:>8} {len(worker_records):>7} "
+            f"{_mib(worker_records[-1].rss_after):>10} "
+            f"{_mib(max(record.rss_after for record in worker_records)):>10} "
+            f"{_mib(growth):>10} {_mib(traced):>10}"
+        )
+        lines.extend(f"    {line}" for line in worker_records[-1].top)
+
+    return "\n".join(lines)
+
+
+def _mib(size: int) -> str:
+    return f"{size / 2 ** 20:.1f}Mi"
+
+
+if os.environ.get(MEMORY_VARIABLE):
+    enable(
+        None
+        if os.environ[MEMORY_VARIABLE] == "1"
+        else Path(os.environ[MEMORY_VARIABLE])
+    )
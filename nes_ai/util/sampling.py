@@ -0,0 +1,205 @@
+"""
+Sampling profiler for training runs, using only the standard library.
+
+Sampling is turned on with the `NES_AI_SAMPLE` environment variable, set to a folder
+    or to `1` for a temporary one; `NES_AI_SAMPLE_INTERVAL` sets the seconds of cpu time
+    between samples. Every process samples its own stacks on a profiling timer and
+    appends them, folded, to its own file in the folder. The parent collects and merges
+    them, for example once per generation, into a file for flamegraph.pl or speedscope.
+
+    NES_AI_SAMPLE=1 python -m scripts.other.tetris
+"""
+
+import os
+import signal
+import sys
+import tempfile
+import threading
+from collections import Counter
+from multiprocessing.util import Finalize, register_after_fork
+from pathlib import Path
+from types import FrameType
+from typing import List, Optional
+
+SAMPLE_VARIABLE = "NES_AI_SAMPLE"
+INTERVAL_VARIABLE = "NES_AI_SAMPLE_INTERVAL"
+
+# 100 samples per cpu second keep the overhead well under 1%
+DEFAULT_INTERVAL = 0.01
+
+
+def _label(frame: FrameType) -> str:
+    code = frame.f_code
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+def fold(frame: Optional[FrameType]) -> str:
+    """
+    Folds a stack into a single line, outermost frame first
+    """
+    labels: List[str] = list()
+
+    while frame is not None:
+        labels.append(_label(frame))
+        frame = frame.f_back
+
+    return ";".join(reversed(labels))
+
+
+class _Sampler:
+    def __init__(self):
+        self.folder: Optional[Path] = None
+        self.interval = DEFAULT_INTERVAL
+        self.stacks: Counter = Counter()
+        self.pid = os.getpid()
+
+        Finalize(None, self.flush, exitpriority=10)
+        register_after_fork(self, _Sampler._after_fork)
+
+    def _after_fork(self):
+        # timers are not inherited, every worker starts its own
+        self.stacks = Counter()
+        self.pid = os.getpid()
+        Finalize(None, self.flush, exitpriority=10)
+
+        if self.folder is not None:
+            self.start_timer()
+
+    @property
+    def running(self) -> bool:
+        return self.folder is not None
+
+    def start_timer(self):
+        signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop_timer(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+
+    def _sample(self, _signum: int, frame: Optional[FrameType]):
+        # the handler runs in the main thread, whose interrupted frame is given
+        self.stacks[fold(frame)] += 1
+        current = threading.get_ident()
+
+        for ident, thread_frame in sys._current_frames().items():
+            if ident != current:
+                self.stacks[fold(thread_frame)] += 1
+
+    def flush(self):
+        if self.folder is None or not self.stacks:
+            return
+
+        # swapped first, a sample may arrive while writing
+        stacks, self.stacks = self.stacks, Counter()
+
+        with (self.folder / f"{self.pid}.folded").open("a") as file:
+            file.writelines(f"{stack} {count}\n" for stack, count in stacks.items())
+
+
+_sampler = _Sampler()
+
+
+def start(folder: Optional[Path] = None, interval: float = DEFAULT_INTERVAL) -> Path:
+    """
+    Starts sampling this process and the workers it creates afterwards
+
+    Parameters
+    ----------
+    folder : Path, optional
+        Folder for the process files, a temporary one by default.
+    interval : float
+        Seconds of cpu time between samples.
+
+    Returns
+    -------
+    Path
+        The folder in use.
+
+    """
+    folder = Path(folder or tempfile.mkdtemp(prefix="nes_ai_sample_"))
+    folder.mkdir(parents=True, exist_ok=True)
+
+    # spawned workers read the settings from the environment
+    os.environ[SAMPLE_VARIABLE] = str(folder)
+    os.environ[INTERVAL_VARIABLE] = str(interval)
+
+    _sampler.folder = folder
+    _sampler.interval = interval
+    _sampler.start_timer()
+
+    return folder
+
+
+def stop():
+    _sampler.stop_timer()
+    _sampler.flush()
+    _sampler.folder = None
+    os.environ.pop(SAMPLE_VARIABLE, None)
+    os.environ.pop(INTERVAL_VARIABLE, None)
+
+
+def running() -> bool:
+    return _sampler.running
+
+
+def flush():
+    """
+    Appends the samples of this process to its file, workers should call it at the end
+        of each episode so that the parent can collect them
+    """
+    _sampler.flush()
+
+
+def collect(remove: bool = True) -> Counter:
+    """
+    Merges the folded stacks written by every process, including this one
+
+    Parameters
+    ----------
+    remove : bool
+        Whether to delete the files read, so the next call only returns new samples.
+
+    Returns
+    -------
+    Counter
+        Number of samples by folded stack.
+
+    """
+    stacks: Counter = Counter()
+
+    if not _sampler.running:
+        return stacks
+
+    _sampler.flush()
+
+    for path in _sampler.folder.glob("*.folded"):
+        with path.open() as file:
+            for line in file:
+                stack, count = line.rsplit(" ", 1)
+                stacks[stack] += int(count)
+
+        if remove:
+            path.unlink()
+
+    return stacks
+
+
+def write_folded(stacks: Counter, path: Path):
+    """
+    Writes the stacks in the folded format read by flamegraph.pl and speedscope
+    """
+    Path(path).write_text(
+        "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    )
+
+
+if os.environ.get(SAMPLE_VARIABLE):
+    start(
+        None
+        if os.environ[SAMPLE_VARIABLE] == "1"
+        else Path(os.environ[SAMPLE_VARIABLE]),
+        float(os.environ.get(INTERVAL_VARIABLE, DEFAULT_INTERVAL)),
+    )
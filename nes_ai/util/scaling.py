@@ -0,0 +1,281 @@
+"""
+Throughput of a fixed workload against the number of workers, to find where adding
+    workers stops paying off and to tune the pool of the scripts for the current machine
+"""
+
+import json
+import os
+import random
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from nes_ai.bootstrap import booted_env, bootstrap_pool
+from nes_ai.util.memory import current_rss
+from nes_ai.util.prerequisites import require
+
+TUNING_PATH = Path.home() / ".cache" / "nes_ai" / "tuning.json"
+
+DECISIONS_PER_TASK = 50
+TASKS_PER_WORKER = 4
+
+
+@dataclass
+class ScalingPoint:
+    # noinspection PyUnresolvedReferences
+    """
+    Measurement of the workload with a number of workers
+
+    Parameters
+    ----------
+    workers : int
+        Number of workers in the pool.
+    chunksize : int
+        Episodes sent to a worker in each task.
+    seconds : float
+        Wall time of the workload.
+    frames : int
+        Frames emulated by all workers.
+    decisions : int
+        Decisions taken by all workers.
+    rss : dict
+        Resident set size of every worker by pid, in bytes, at the end of its last
+            episode.
+    ipc_seconds : float
+        Mean time between a worker finishing an episode and the parent receiving it.
+
+    """
+
+    workers: int
+    chunksize: int
+    seconds: float
+    frames: int
+    decisions: int
+    rss: Dict[int, int]
+    ipc_seconds: float
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.seconds
+
+    @property
+    def decisions_per_second(self) -> float:
+        return self.decisions / self.seconds
+
+    @property
+    def max_rss(self) -> int:
+        return max(self.rss.values(), default=0)
+
+
+@dataclass
+class Tuning:
+    # noinspection PyUnresolvedReferences
+    """
+    Pool settings of a game
+
+    Parameters
+    ----------
+    workers : int
+        Number of workers.
+    chunksize : int
+        Episodes sent to a worker in each task. It stands in for the number of envs per
+            worker: a worker holds a single booted emulator per game and plays its
+            episodes one after the other, so the episodes it is given at once are what
+            amortizes the IPC instead.
+
+    """
+
+    workers: int
+    chunksize: int = 1
+
+
+def workload(task: Tuple[str, int, int]) -> Dict:
+    """
+    A fixed episode: random moves on the game ready emulator, with the features of each
+        decision computed as an agent would
+
+    Parameters
+    ----------
+    task : tuple
+        Name of the game, number of decisions and random seed.
+
+    Returns
+    -------
+    dict
+        Frames, decisions, pid and rss of the worker and the time the episode ended.
+
+    """
+    from nes_py.wrappers import JoypadSpace
+
+    from nes_ai.input import MOVEMENT, Button, Joypad
+
+    game, decisions, seed = task
+    rng = random.Random(seed)
+    env = booted_env(game)
+    player = Joypad(JoypadSpace(env, MOVEMENT))
+    frames = 0
+
+    for _ in range(decisions):
+        if game == "tetris":
+            if env.field.is_full:
+                env.reset()
+
+            env.field.features(env.piece, env.next_piece)
+            player.press((rng.choice((Button.LEFT, Button.RIGHT, Button.A)),))
+            frames += 3
+        else:
+            if env.is_dying:
+                env.reset()
+
+            env.get_input_array()
+            player.press((rng.choice((Button.RIGHT, Button.A)),), delay=5, replay=True)
+            frames += 6
+
+    return {
+        "frames": frames,
+        "decisions": decisions,
+        "pid": os.getpid(),
+        "rss": current_rss(),
+        "end": time.time(),
+    }
+
+
+def measure(
+    game: str,
+    workers: int,
+    chunksize: int = 1,
+    tasks: Optional[int] = None,
+    decisions: int = DECISIONS_PER_TASK,
+) -> ScalingPoint:
+    """
+    Runs the workload on a bootstrapped pool
+
+    Parameters
+    ----------
+    game : str
+        Name of the game.
+    workers : int
+        Number of workers.
+    chunksize : int
+        Episodes sent to a worker in each task.
+    tasks : int, optional
+        Number of episodes, defaults to `TASKS_PER_WORKER` per worker so that every
+            worker count does the same work per worker.
+    decisions : int
+        Decisions per episode.
+
+    Returns
+    -------
+    ScalingPoint
+        The measurement.
+
+    """
+    tasks = tasks or workers * TASKS_PER_WORKER * chunksize
+    episodes = [(game, decisions, seed) for seed in range(tasks)]
+    results = list()
+    ipc = list()
+
+    with bootstrap_pool(workers, games=(game,)) as pool:
+        start = time.perf_counter()
+
+        for result in pool.imap_unordered(workload, episodes, chunksize):
+            ipc.append(time.time() - result["end"])
+            results.append(result)
+
+        seconds = time.perf_counter() - start
+
+    return ScalingPoint(
+        workers=workers,
+        chunksize=chunksize,
+        seconds=seconds,
+        frames=sum(result["frames"] for result in results),
+        decisions=sum(result["decisions"] for result in results),
+        rss={result["pid"]: result["rss"] for result in results},
+        ipc_seconds=sum(ipc) / len(ipc),
+    )
+
+
+def scaling_curve(
+    game: str, max_workers: Optional[int] = None, chunksize: int = 1
+) -> List[ScalingPoint]:
+    """
+    Measures the workload with 1 up to `max_workers` workers, by default one per cpu
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    return [measure(game, workers, chunksize) for workers in range(1, max_workers + 1)]
+
+
+def knee(points: Sequence[ScalingPoint], min_gain: float = 0.1) -> ScalingPoint:
+    """
+    The point after which one more worker adds less than `min_gain` of the throughput
+        of a single worker
+
+    Parameters
+    ----------
+    points : Sequence of ScalingPoint
+        Measurements sorted by number of workers.
+    min_gain : float
+        Fraction of the single worker throughput an extra worker must add.
+
+    Returns
+    -------
+    ScalingPoint
+        The knee of the scaling curve.
+
+    """
+    require(len(points) > 0, "Cannot find the knee of an empty scaling curve")
+    unit = points[0].decisions_per_second / points[0].workers
+    best = points[0]
+
+    for point in points[1:]:
+        gain = (point.decisions_per_second - best.decisions_per_second) / (
+            point.workers - best.workers
+        )
+
+        if gain < min_gain * unit:
+            break
+        best = point
+
+    return best
+
+
+def tune(
+    game: str,
+    max_workers: Optional[int] = None,
+    chunksizes: Sequence[int] = (1, 2, 4),
+    path: Path = TUNING_PATH,
+) -> Tuning:
+    """
+    Picks the number of workers at the knee of the scaling curve and then the episodes
+        per task with the highest throughput, and stores them for `load_tuning`. The
+        episodes per task are tuned in place of a number of envs per worker, see
+        `Tuning`.
+    """
+    workers = knee(scaling_curve(game, max_workers)).workers
+    points = [measure(game, workers, chunksize) for chunksize in chunksizes]
+    best = max(points, key=lambda point: point.decisions_per_second)
+
+    tuning = Tuning(workers=workers, chunksize=best.chunksize)
+    save_tuning(game, tuning, path)
+
+    return tuning
+
+
+def save_tuning(game: str, tuning: Tuning, path: Path = TUNING_PATH):
+    content = json.loads(path.read_text()) if path.exists() else dict()
+    content[game] = asdict(tuning)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(content, indent=2) + "\n")
+
+
+def load_tuning(game: str, default: Tuning, path: Path = TUNING_PATH) -> Tuning:
+    """
+    The tuning stored by `tune` for the game, or the default when not tuned yet
+    """
+    if not path.exists():
+        return default
+
+    content = json.loads(path.read_text())
+    return Tuning(**content[game]) if game in content else default
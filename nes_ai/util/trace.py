@@ -0,0 +1,270 @@
+"""
+Low overhead phase timers for the decision loop.
+
+Tracing is turned on with the `NES_AI_TRACE` environment variable, set to a folder or to
+    `1` for a temporary one. Every process appends its timed phases to its own file in
+    that folder, the parent collects them, for example once per generation, and exports
+    them as a summary table or as a Chrome trace (chrome://tracing, Perfetto).
+
+    NES_AI_TRACE=1 python -m scripts.other.tetris
+"""
+
+import functools
+import json
+import os
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from multiprocessing.util import Finalize, register_after_fork
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+TRACE_VARIABLE = "NES_AI_TRACE"
+
+# phases of the decision loop
+EMULATION = "emulation"
+FEATURES = "features"
+NETWORK = "network"
+DECODING = "decoding"
+
+# events kept in memory before they are appended to the process file
+FLUSH_EVENTS = 4096
+
+_DISABLED = nullcontext()
+
+
+class Event(NamedTuple):
+    name: str
+    pid: int
+    start_ns: int
+    duration_ns: int
+
+
+class PhaseSummary(NamedTuple):
+    name: str
+    count: int
+    seconds: float
+    share: float
+
+    @property
+    def mean_us(self) -> float:
+        return 1e6 * self.seconds / self.count
+
+
+class _Recorder:
+    def __init__(self):
+        self.folder: Optional[Path] = None
+        self.events: List[Event] = list()
+        self.pid = os.getpid()
+
+        # workers flush when they exit, their finalizers are reset after the fork
+        Finalize(None, self.flush, exitpriority=10)
+        register_after_fork(self, _Recorder._after_fork)
+
+    def _after_fork(self):
+        # a forked worker must not write the events of its parent
+        self.events.clear()
+        self.pid = os.getpid()
+        Finalize(None, self.flush, exitpriority=10)
+
+    @property
+    def enabled(self) -> bool:
+        return self.folder is not None
+
+    def add(self, name: str, start_ns: int, end_ns: int):
+        self.events.append(Event(name, self.pid, start_ns, end_ns - start_ns))
+
+        if len(self.events) >= FLUSH_EVENTS:
+            self.flush()
+
+    def flush(self):
+        if self.folder is None or not self.events:
+            return
+
+        with (self.folder / f"{self.pid}.jsonl").open("a") as file:
+            file.writelines(json.dumps(event) + "\n" for event in self.events)
+
+        self.events.clear()
+
+
+_recorder = _Recorder()
+
+
+def enable(folder: Optional[Path] = None) -> Path:
+    """
+    Turns tracing on in this process and in the workers it creates afterwards
+
+    Parameters
+    ----------
+    folder : Path, optional
+        Folder for the process files, a temporary one by default.
+
+    Returns
+    -------
+    Path
+        The folder in use.
+
+    """
+    folder = Path(folder or tempfile.mkdtemp(prefix="nes_ai_trace_"))
+    folder.mkdir(parents=True, exist_ok=True)
+
+    # spawned workers read the folder from the environment
+    os.environ[TRACE_VARIABLE] = str(folder)
+    _recorder.folder = folder
+
+    return folder
+
+
+def disable():
+    _recorder.flush()
+    _recorder.folder = None
+    os.environ.pop(TRACE_VARIABLE, None)
+
+
+def enabled() -> bool:
+    return _recorder.enabled
+
+
+def phase(name: str):
+    """
+    Context manager that times a phase, it does nothing when tracing is off
+    """
+    if not _recorder.enabled:
+        return _DISABLED
+    return _timer(name)
+
+
+@contextmanager
+def _timer(name: str) -> Iterator[None]:
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        _recorder.add(name, start, time.perf_counter_ns())
+
+
+def timed(name: str) -> Callable:
+    """
+    Decorator that times every call of a function as a phase
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _recorder.enabled:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _recorder.add(name, start, time.perf_counter_ns())
+
+        return wrapper
+
+    return decorator
+
+
+def flush():
+    """
+    Appends the events of this process to its file, workers should call it at the end
+        of each episode so that the parent can collect them
+    """
+    _recorder.flush()
+
+
+def collect(remove: bool = True) -> List[Event]:
+    """
+    Reads the events written by every process, including this one
+
+    Parameters
+    ----------
+    remove : bool
+        Whether to delete the files read, so the next call only returns new events.
+
+    Returns
+    -------
+    list of Event
+        Events sorted by start time.
+
+    """
+    if not _recorder.enabled:
+        return list()
+
+    _recorder.flush()
+    events = list()
+
+    for path in _recorder.folder.glob("*.jsonl"):
+        with path.open() as file:
+            events.extend(Event(*json.loads(line)) for line in file)
+
+        if remove:
+            path.unlink()
+
+    return sorted(events, key=lambda event: event.start_ns)
+
+
+def summary(events: Sequence[Event]) -> List[PhaseSummary]:
+    """
+    Count, total time and share of the traced time of every phase
+    """
+    counts: Dict[str, int] = defaultdict(int)
+    durations: Dict[str, int] = defaultdict(int)
+
+    for event in events:
+        counts[event.name] += 1
+        durations[event.name] += event.duration_ns
+
+    total = sum(durations.values()) or 1
+
+    return sorted(
+        (
+            PhaseSummary(
+                name=name,
+                count=counts[name],
+                seconds=durations[name] / 1e9,
+                share=durations[name] / total,
+            )
+            for name in counts
+        ),
+        key=lambda phase_summary: -phase_summary.seconds,
+    )
+
+
+def format_summary(summaries: Sequence[PhaseSummary], title: str = "") -> str:
+    lines = [title] if title else list()
+    lines.append(f"{'phase':<12} {'calls':>9} {'total':>10} {'mean':>10} {'share':>7}")
+
+    for item in summaries:
+        lines.append(
+            f"{item.name:<12} {item.count:>9} {item.seconds:>9.2f}s "
+            f"{item.mean_us:>8.1f}us {100 * item.share:>6.1f}%"
+        )
+
+    return "\n".join(lines)
+
+
+def write_chrome_trace(events: Sequence[Event], path: Path):
+    """
+    Writes the events in the Chrome trace event format, one track per process
+    """
+    trace_events = [
+        {
+            "name": event.name,
+            "cat": "nes_ai",
+            "ph": "X",
+            "ts": event.start_ns / 1e3,
+            "dur": event.duration_ns / 1e3,
+            "pid": event.pid,
+            "tid": event.pid,
+        }
+        for event in events
+    ]
+    Path(path).write_text(json.dumps({"traceEvents": trace_events}))
+
+
+if os.environ.get(TRACE_VARIABLE):
+    enable(
+        None if os.environ[TRACE_VARIABLE] == "1" else Path(os.environ[TRACE_VARIABLE])
+    )
@@ -0,0 +1,86 @@
+"""
+Worker start time and memory per worker, with and without the worker bootstrap
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from typing import Tuple
+
+from nes_ai.bootstrap import booted_env, bootstrap_pool
+from nes_ai.util.memory import current_pss, current_rss
+
+logger = logging.getLogger()
+
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler())
+
+WORKERS = max((os.cpu_count() or 2) - 1, 1)
+TASKS_PER_WORKER = 3
+GAME = "tetris"
+
+
+def fresh_task(_) -> Tuple[float, int, int]:
+    """
+    What the scripts do today: import, create and boot an emulator per individual
+    """
+    start = time.perf_counter()
+
+    from nes_ai.tetris.env import Tetris
+
+    tetris = Tetris()
+    tetris.start()
+    elapsed = time.perf_counter() - start
+    rss, pss = current_rss(), current_pss()
+    tetris.close()
+
+    return elapsed, rss, pss
+
+
+def bootstrapped_task(_) -> Tuple[float, int, int]:
+    """
+    An individual using the emulator inherited from the bootstrapped parent
+    """
+    start = time.perf_counter()
+    booted_env(GAME)
+
+    return time.perf_counter() - start, current_rss(), current_pss()
+
+
+def report(name: str, pool_start: float, results):
+    elapsed = [result[0] for result in results]
+    rss = [result[1] for result in results]
+    pss = [result[2] for result in results]
+
+    logger.info(f"{name}:")
+    logger.info(f"  pool + first batch: {pool_start:.3f}s")
+    logger.info(f"  env ready per task: {1000 * sum(elapsed) / len(elapsed):.1f}ms")
+    logger.info(f"  rss per worker: {max(rss) / 2 ** 20:.1f}MiB")
+    logger.info(f"  pss per worker: {max(pss) / 2 ** 20:.1f}MiB")
+
+
+def main():
+    tasks = range(WORKERS * TASKS_PER_WORKER)
+
+    for method in ("spawn", "fork"):
+        start = time.perf_counter()
+        with multiprocessing.get_context(method).Pool(WORKERS) as pool:
+            results = pool.map(fresh_task, tasks, chunksize=1)
+        report(f"fresh ({method})", time.perf_counter() - start, results)
+
+    start = time.perf_counter()
+    with bootstrap_pool(WORKERS, games=(GAME,)) as pool:
+        results = pool.map(bootstrapped_task, tasks, chunksize=1)
+    report("bootstrap (fork)", time.perf_counter() - start, results)
+
+    # a second generation on the same pool only pays the reset
+    with bootstrap_pool(WORKERS, games=(GAME,)) as pool:
+        pool.map(bootstrapped_task, tasks, chunksize=1)
+        start = time.perf_counter()
+        results = pool.map(bootstrapped_task, tasks, chunksize=1)
+    report("bootstrap, reused pool", time.perf_counter() - start, results)
+
+
+if __name__ == "__main__":
+    main()
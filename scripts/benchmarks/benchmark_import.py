@@ -0,0 +1,69 @@
+"""
+Import time of the package and its modules, each measured in a fresh interpreter
+"""
+
+import logging
+import subprocess
+import sys
+
+logger = logging.getLogger()
+
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler())
+
+REPEATS = 5
+
+STATEMENTS = (
+    "import nes_ai",
+    "import nes_ai.input",
+    "import nes_ai.tetris.field",
+    "import nes_ai.tetris.env",
+    "import nes_ai.mario.env",
+    "import nes_ai; nes_ai.make('tetris')",
+)
+
+TEMPLATE = """
+import sys, time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start, "nes_py" in sys.modules)
+"""
+
+
+def measure(statement: str):
+    """
+    Best time over a few fresh interpreters and whether the emulator was imported
+    """
+    times = list()
+    emulator = False
+
+    for _ in range(REPEATS):
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-W",
+                "ignore",
+                "-c",
+                TEMPLATE.format(statement=statement),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        times.append(float(output[0]))
+        emulator = output[1] == "True"
+
+    return min(times), emulator
+
+
+def main():
+    for statement in STATEMENTS:
+        seconds, emulator = measure(statement)
+        logger.info(
+            f"{statement:<40} {1000 * seconds:8.1f}ms  "
+            f"{'emulator imported' if emulator else ''}"
+        )
+
+
+if __name__ == "__main__":
+    main()
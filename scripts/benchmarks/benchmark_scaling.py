@@ -0,0 +1,64 @@
+"""
+Scaling curve of a fixed Tetris or Mario workload against the number of workers.
+
+    python -m scripts.benchmarks.benchmark_scaling --game mario --tune
+"""
+
+import argparse
+import json
+import logging
+from dataclasses import asdict
+
+from nes_ai.util.scaling import TUNING_PATH, knee, scaling_curve, tune
+
+logger = logging.getLogger()
+
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler())
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--game", default="tetris", choices=("tetris", "mario"))
+    parser.add_argument("--max-workers", type=int, help="defaults to the cpu count")
+    parser.add_argument("--output", help="JSON file for the scaling curve")
+    parser.add_argument(
+        "--tune",
+        action="store_true",
+        help=f"store the best workers and episodes per task in {TUNING_PATH}",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    points = scaling_curve(args.game, args.max_workers)
+
+    logger.info(
+        f"{'workers':>8} {'frames/s':>10} {'decisions/s':>12} "
+        f"{'ipc':>9}  rss per worker"
+    )
+    for point in points:
+        rss = " ".join(f"{rss / 2 ** 20:.1f}Mi" for _, rss in sorted(point.rss.items()))
+        logger.info(
+            f"{point.workers:>8} {point.frames_per_second:>10.1f} "
+            f"{point.decisions_per_second:>12.1f} "
+            f"{1000 * point.ipc_seconds:>7.2f}ms  {rss}"
+        )
+    logger.info(f"knee: {knee(points).workers} workers")
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump([asdict(point) for point in points], handle, indent=2)
+
+    if args.tune:
+        tuning = tune(args.game, args.max_workers)
+        logger.info(
+            f"tuned {args.game}: {tuning.workers} workers, "
+            f"{tuning.chunksize} episodes per task in place of envs per worker"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""
+Micro and macro benchmarks of the emulators, the features and the decision loop.
+
+Results are written as JSON and, when a baseline is given, compared against it; the
+    exit code is 1 if any benchmark regressed more than its threshold.
+
+    python -m scripts.benchmarks.benchmark_suite --baseline scripts/benchmarks/baseline.json
+"""
+
+import argparse
+import logging
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+from nes_py.wrappers import JoypadSpace
+
+from nes_ai.bootstrap import booted_env
+from nes_ai.input import MOVEMENT, Button, Joypad, neat_result_to_buttons
+from nes_ai.mario.env import SuperMario
+from nes_ai.mario.observation import SparseObservation, input_layer
+from nes_ai.pipeline import play_pipelined
+from nes_ai.realtime import Press
+from nes_ai.tetris.env import Tetris
+from nes_ai.tetris.search import SearchAgent
+from nes_ai.util.benchmark import (
+    BenchmarkResult,
+    compare,
+    load_results,
+    run_benchmark,
+    save_results,
+)
+from nes_ai.util.corpus import CORPORA_FOLDER, load_corpus
+
+logger = logging.getLogger()
+
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler())
+
+BENCHMARKS_FOLDER = Path(__file__).parent
+
+FRAMES = 600
+DECISIONS = 100
+RESETS = 10
+SEED = 0
+
+MARIO_BUTTONS_MAP = {
+    0: Button.LEFT,
+    1: Button.RIGHT,
+    2: Button.A,
+    3: Button.B,
+    4: Button.DOWN,
+}
+MARIO_THRESHOLD_FRAME = 5
+
+
+class RandomPolicy:
+    """
+    A dense single layer network, a stand-in for a NEAT individual with the same inputs
+        and outputs
+    """
+
+    def __init__(self, n_inputs: int, n_outputs: int):
+        self._weights = np.random.default_rng(SEED).normal(size=(n_outputs, n_inputs))
+        # a row per input, for the sparse path
+        self._input_weights = np.ascontiguousarray(self._weights.T)
+
+    def evaluate(self, features) -> np.ndarray:
+        return np.tanh(self._weights @ np.asarray(features, dtype=float))
+
+    def evaluate_sparse(self, observation: SparseObservation) -> np.ndarray:
+        return np.tanh(input_layer(self._input_weights, observation))
+
+
+def emulator_benchmarks(repeat: int, scale: int) -> List[BenchmarkResult]:
+    results = list()
+
+    for game in ("tetris", "mario"):
+        env = booted_env(game)
+        player = Joypad(JoypadSpace(env, MOVEMENT))
+        frames = FRAMES // scale
+
+        def frame_advance():
+            for _ in range(frames):
+                env._frame_advance(0)
+
+        def press():
+            # each press steps 1 + BUTTON_DELAY frames
+            for _ in range(frames // 3):
+                player.press((Button.NONE,))
+
+        def reset():
+            for _ in range(RESETS):
+                env.reset()
+
+        results.append(
+            run_benchmark(f"{game}.emulator", frame_advance, frames, "frames", repeat)
+        )
+        results.append(
+            run_benchmark(
+                f"{game}.joypad_press", press, frames // 3, "presses", repeat, env.reset
+            )
+        )
+        results.append(run_benchmark(f"{game}.reset", reset, RESETS, "resets", repeat))
+
+    return results
+
+
+def feature_benchmarks(repeat: int) -> List[BenchmarkResult]:
+    _, tetris_rams = load_corpus(CORPORA_FOLDER / "tetris.npz")
+    _, mario_rams = load_corpus(CORPORA_FOLDER / "mario.npz")
+
+    tetrises = [Tetris.from_ram(ram) for ram in tetris_rams]
+    marios = [SuperMario.from_ram(ram) for ram in mario_rams]
+
+    def tetris_features():
+        for tetris in tetrises:
+            tetris.field.features(tetris.piece, tetris.next_piece)
+
+    def tetris_incremental_features():
+        # one env over the recorded frames, like an episode
+        tetris = Tetris.from_ram(tetris_rams[0].copy())
+
+        for ram in tetris_rams:
+            tetris.ram[:] = ram
+            tetris.features()
+
+    def tetris_piece_down():
+        for tetris in tetrises:
+            tetris.field._array_with_piece_down(tetris.piece)
+
+    # unbounded, so every run expands the same nodes
+    agent = SearchAgent(budget=float("inf"))
+    nodes = sum(agent.decide(tetris).nodes for tetris in tetrises)
+
+    def tetris_search():
+        for tetris in tetrises:
+            agent.decide(tetris)
+
+    def mario_input_array():
+        for mario in marios:
+            mario.get_input_array()
+
+    def mario_sparse_input():
+        for mario in marios:
+            mario.get_sparse_input()
+
+    # the network alone, on the observations of the recorded frames
+    policy = RandomPolicy(marios[0].n_inputs, 5)
+    dense_inputs = [mario.get_input_array() for mario in marios]
+    sparse_inputs = [mario.get_sparse_input() for mario in marios]
+
+    def mario_dense_network():
+        for inputs in dense_inputs:
+            policy.evaluate(inputs)
+
+    def mario_sparse_network():
+        for inputs in sparse_inputs:
+            policy.evaluate_sparse(inputs)
+
+    search = run_benchmark(
+        "tetris.search",
+        tetris_search,
+        len(tetrises),
+        "decisions",
+        repeat,
+        setup=agent.table.clear,
+    )
+    search_nodes = BenchmarkResult(
+        "tetris.search_nodes", nodes, "nodes", seconds=search.seconds
+    )
+    logger.info(
+        f"tetris.search mean latency {1e3 / search.ops_per_second:.2f}ms, "
+        f"{nodes / len(tetrises):.0f} nodes per decision"
+    )
+
+    return [
+        run_benchmark(
+            "tetris.field_features", tetris_features, len(tetrises), "boards", repeat
+        ),
+        run_benchmark(
+            "tetris.incremental_features",
+            tetris_incremental_features,
+            len(tetrises),
+            "boards",
+            repeat,
+        ),
+        run_benchmark(
+            "tetris.array_with_piece_down",
+            tetris_piece_down,
+            len(tetrises),
+            "boards",
+            repeat,
+        ),
+        search,
+        search_nodes,
+        run_benchmark(
+            "mario.get_input_array", mario_input_array, len(marios), "frames", repeat
+        ),
+        run_benchmark(
+            "mario.get_sparse_input", mario_sparse_input, len(marios), "frames", repeat
+        ),
+        run_benchmark(
+            "mario.dense_network", mario_dense_network, len(marios), "frames", repeat
+        ),
+        run_benchmark(
+            "mario.sparse_network", mario_sparse_network, len(marios), "frames", repeat
+        ),
+    ]
+
+
+def decision_benchmarks(repeat: int, scale: int) -> List[BenchmarkResult]:
+    """
+    The decision loop of the scripts: features, network, buttons and emulation
+    """
+    decisions = DECISIONS // scale
+
+    tetris = booted_env("tetris")
+    tetris_player = Joypad(JoypadSpace(tetris, MOVEMENT))
+    tetris_policy = RandomPolicy(74, 4)
+    tetris_buttons = (Button.LEFT, Button.RIGHT, Button.A, Button.DOWN)
+
+    mario = booted_env("mario")
+    mario_player = Joypad(JoypadSpace(mario, MOVEMENT))
+    mario_policy = RandomPolicy(169, 5)
+
+    def tetris_decisions():
+        for _ in range(decisions):
+            if tetris.field.is_full:
+                tetris.reset()
+
+            features = tetris.field.features(tetris.piece, tetris.next_piece)
+
+            if features:
+                button = tetris_buttons[
+                    int(np.argmax(tetris_policy.evaluate(features)))
+                ]
+                tetris_player.press((button,))
+            else:
+                tetris_player.press((Button.NONE,))
+
+    def mario_decisions():
+        for _ in range(decisions):
+            if mario.is_dying:
+                mario.reset()
+
+            buttons = neat_result_to_buttons(
+                mario_policy.evaluate(mario.get_input_array()), MARIO_BUTTONS_MAP, 0
+            )
+
+            if buttons:
+                mario_player.press(buttons, delay=MARIO_THRESHOLD_FRAME, replay=True)
+            else:
+                mario_player.press((Button.NONE,), delay=0)
+
+    def mario_press(observation) -> Press:
+        buttons = neat_result_to_buttons(
+            mario_policy.evaluate(observation), MARIO_BUTTONS_MAP, 0
+        )
+
+        if buttons:
+            return Press(buttons, delay=MARIO_THRESHOLD_FRAME, replay=True)
+        return Press((Button.NONE,), delay=0)
+
+    def mario_pipelined_decisions():
+        # the same loop, the next decision is evaluated while a press is held
+        remaining = decisions
+
+        while remaining > 0:
+            if mario.is_dying:
+                mario.reset()
+
+            remaining -= play_pipelined(
+                mario,
+                SuperMario.get_input_array,
+                mario_press,
+                lambda env: env.is_dying,
+                max_decisions=remaining,
+            ).decisions
+
+    results = [
+        run_benchmark(
+            "tetris.decisions", tetris_decisions, decisions, "decisions", repeat
+        ),
+        run_benchmark(
+            "mario.decisions", mario_decisions, decisions, "decisions", repeat
+        ),
+        run_benchmark(
+            "mario.pipelined_decisions",
+            mario_pipelined_decisions,
+            decisions,
+            "decisions",
+            repeat,
+        ),
+    ]
+
+    return results
+
+
+def parse_thresholds(values: List[str]) -> Dict[str, float]:
+    thresholds = dict()
+
+    for value in values:
+        name, threshold = value.split("=")
+        thresholds[name] = float(threshold)
+
+    return thresholds
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--output", default="benchmark.json", help="results file")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="allowed relative slowdown"
+    )
+    parser.add_argument(
+        "--threshold-for",
+        action="append",
+        default=list(),
+        metavar="NAME=VALUE",
+        help="allowed relative slowdown of a single benchmark",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--quick", action="store_true", help="fewer frames, for a smoke run"
+    )
+
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    random.seed(SEED)
+    scale = 10 if args.quick else 1
+
+    results = (
+        emulator_benchmarks(args.repeat, scale)
+        + feature_benchmarks(args.repeat)
+        + decision_benchmarks(args.repeat, scale)
+    )
+
+    for result in results:
+        logger.info(f"{result.name:<32} {result.ops_per_second:12.1f} {result.unit}/s")
+
+    save_results(results, args.output)
+    logger.info(f"Results written to {args.output}")
+
+    if not args.baseline:
+        return 0
+
+    regressions = compare(
+        current={result.name: result.ops_per_second for result in results},
+        baseline=load_results(args.baseline),
+        threshold=args.threshold,
+        thresholds=parse_thresholds(args.threshold_for),
+    )
+
+    for regression in regressions:
+        logger.error(f"Regression {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Records the RAM corpora used by the feature benchmarks, playing random moves
+"""
+
+import logging
+import random
+
+from nes_py.wrappers import JoypadSpace
+
+import nes_ai
+from nes_ai.input import MOVEMENT, Button, Joypad
+from nes_ai.tetris.info import GamePhase
+from nes_ai.util.corpus import CORPORA_FOLDER, record, save_corpus
+
+logger = logging.getLogger()
+
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler())
+
+FRAMES = 300
+SEED = 0
+
+TETRIS_MOVES = ((Button.LEFT,), (Button.RIGHT,), (Button.A,), (Button.DOWN,))
+MARIO_MOVES = (
+    (Button.RIGHT,),
+    (Button.RIGHT, Button.A),
+    (Button.RIGHT, Button.B),
+    (Button.A,),
+    (Button.LEFT,),
+    (Button.NONE,),
+)
+
+
+def record_tetris():
+    tetris = nes_ai.make("tetris")
+    tetris.start()
+    tetris.snapshot()
+    player = Joypad(JoypadSpace(tetris, MOVEMENT))
+
+    def step() -> bool:
+        if tetris.game_phase != GamePhase.PLAY or tetris.field.is_full:
+            tetris.reset()
+            return False
+
+        player.press(random.choice(TETRIS_MOVES))
+
+        # only keep the frames the agent decides on
+        return (
+            tetris.field.features(tetris.piece, tetris.next_piece) is not None
+            and random.random() < 0.5
+        )
+
+    save_corpus(
+        CORPORA_FOLDER / "tetris.npz", "tetris", record(step, tetris.ram, FRAMES)
+    )
+    tetris.close()
+
+
+def record_mario():
+    mario = nes_ai.make("mario")
+    mario.start()
+    mario.snapshot()
+    player = Joypad(JoypadSpace(mario, MOVEMENT))
+
+    def step() -> bool:
+        if mario.is_dying:
+            mario.reset()
+            return False
+
+        player.press(random.choice(MARIO_MOVES), delay=5, replay=True)
+        return True
+
+    save_corpus(CORPORA_FOLDER / "mario.npz", "mario", record(step, mario.ram, FRAMES))
+    mario.close()
+
+
+if __name__ == "__main__":
+    random.seed(SEED)
+    CORPORA_FOLDER.mkdir(exist_ok=True)
+
+    record_tetris()
+    record_mario()
+
+    logger.info(f"Corpora recorded in {CORPORA_FOLDER}")
@@ -5,6 +5,7 @@ A NEAT run on flappy bird
 import logging
 import pickle
 import random
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 
@@ -25,6 +26,9 @@ RUNS_PER_INDIVIDUAL = 1
 NUMBER_INDIVIDUALS = 500
 REDIRECTION_TRIES = 100
 
+# generations of fitness kept in memory, the whole history is appended to fitness.csv
+HISTORY = 1000
+
 NETWORK_INPUTS = 8
 NETWORK_OUTPUTS = 1
 
@@ -61,8 +65,11 @@ genetic = Genetic(
     mutation_type=MutationType.SINGLE,
 )
 
-average_fitness_list = list()
-max_fitness_list = list()
+average_fitness_list: deque = deque(maxlen=HISTORY)
+max_fitness_list: deque = deque(maxlen=HISTORY)
+
+with (folder / "fitness.csv").open("w") as history:
+    history.write("iteration,max_fitness,average_fitness\n")
 
 play = PLE(
     FlappyBird(width=WIDTH, height=HEIGHT, pipe_gap=100), fps=30, display_screen=display
@@ -118,6 +125,9 @@ while genetic.max_fitness < MAX_FITNESS:
 
     genetic.population = population
 
+    with (folder / "fitness.csv").open("a") as history:
+        history.write(f"{index},{max_fitness},{average_fitness}\n")
+
     logger.info("#----------#")
     logger.info(f"Iteration: {index}")
     logger.info(f"max fitness: {max_fitness}")
@@ -2,24 +2,32 @@
 A NEAT run on Tetris using openai api in parallel
 """
 
+import functools
 import logging
 import os
 import pickle
 import random
 from datetime import datetime
-from multiprocessing import Pool
 from pathlib import Path
+from typing import Optional
 
-import matplotlib.pyplot as plt
 import numpy as np
 from neats.genetic import Genetic, NetworkShape
 from neats.mutation import Mutation
 from neats.network import Network
 from nes_py.wrappers import JoypadSpace
 
+from nes_ai.bootstrap import booted_env
+from nes_ai.evaluation.racing import race
+from nes_ai.evaluation.watchdog import Watchdog
 from nes_ai.input import MOVEMENT, Button, Joypad
+from nes_ai.memo import CacheTotals, DecisionCache
+from nes_ai.render import RenderService
 from nes_ai.tetris.env import Tetris
-from nes_ai.tetris.info import GamePhase
+from nes_ai.tetris.info import Event, GamePhase
+from nes_ai.tetris.transposition import FeatureCache
+from nes_ai.util import memory, sampling, trace
+from nes_ai.util.scaling import Tuning, load_tuning
 
 logger = logging.getLogger()
 
@@ -29,13 +37,45 @@ logger.addHandler(logging.StreamHandler())
 # constants
 BUTTONS_MAP = {0: Button.LEFT, 1: Button.RIGHT, 2: Button.A, 3: Button.DOWN}
 
+# seeds raced per generation: after each seed only the best half plays the next one
 RUNS_PER_INDIVIDUAL = 3
+FITNESS_AGGREGATION = "mean"
+RACE_KEEP = 0.5
+
 ITERATIONS = 100
 NUMBER_INDIVIDUALS = 100
 
 NETWORK_INPUTS = 74
 NETWORK_OUTPUTS = 4
 
+# workers are replaced past these limits
+MAX_WORKER_RSS = 512 * 2**20
+MAX_WORKER_TASKS = 1000
+
+# an individual stuck past these limits gets another try and then the penalty fitness
+EPISODE_DEADLINE = 600
+EPISODE_FRAMES = 30 * 60 * 60
+PENALTY_FITNESS = 0
+
+# workers shown live, each pushes one frame out of DISPLAY_DECIMATION to the render
+# service, whether the window is open, off for headless runs, and whether their
+# episodes are also recorded to videos
+DISPLAY_SLOTS = 4
+DISPLAY_DECIMATION = 4
+SHOW = True
+RECORD = False
+
+# started by the parent before forking the workers
+display: Optional[RenderService] = None
+
+# decisions taken from the per episode caches by all workers
+decision_totals = CacheTotals()
+
+# features of the boards seen by any worker, the same boards recur across episodes,
+# created by the parent before forking the workers
+FEATURE_CACHE_CAPACITY = 2**14
+feature_cache: Optional[FeatureCache] = None
+
 mutation_probability = {
     Mutation.LINK: 0.30,
     Mutation.NODE: 0.20,
@@ -60,69 +100,94 @@ def not_in_play(tetris: Tetris, player: Joypad):
         player.press((Button.START,), delay=5)
 
 
+def decide_button(individual: Network, features) -> Button:
+    with trace.phase(trace.NETWORK):
+        result = individual.evaluate(features)
+
+    with trace.phase(trace.DECODING):
+        return BUTTONS_MAP[int(np.argmax(result))]
+
+
 def tetris_run(individual: Network, tetris: Tetris, player: Joypad):
     """
     A tetris run
     """
-    while True:
-        tetris.render()
+    # the features repeat while a piece falls, their decisions are evaluated once
+    decide = DecisionCache(functools.partial(decide_button, individual))
 
+    while True:
         if tetris.game_phase != GamePhase.PLAY:
             # deal with non play
             not_in_play(tetris, player)
             continue
 
-        if not tetris.piece or not tetris.next_piece:
-            continue
-
-        if tetris.field.is_full:
+        if tetris.is_game_over:
             if tetris.stats.lines > 0:
-                print(
+                logger.debug(
                     f"fitness: {individual.fitness} -> "
                     f"score: {tetris.stats.score}, "
                     f"pieces: {tetris.stats.pieces}, "
                     f"lines: {tetris.stats.lines}"
                 )
 
+            decision_totals.add(decide.stats)
+
             # fitness
             return tetris.stats.pieces * 100 + tetris.stats.score * 6
 
+        if tetris.play_state != tetris.ACTIVE_PIECE:
+            # line clears and the entry delay of the next piece need no decision
+            tetris.advance_until(Event.NEW_PIECE, Event.GAME_OVER, Event.PHASE_CHANGE)
+            continue
+
+        if not tetris.piece or not tetris.next_piece:
+            player.press((Button.NONE,), delay=0)
+            continue
+
         # play
         # features: holes and heights
-        features = tetris.field.features(tetris.piece, tetris.next_piece)
+        if feature_cache is not None:
+            features = feature_cache.features(tetris)
+        else:
+            features = tetris.features()
 
         if features:
-            button_result = BUTTONS_MAP[int(np.argmax(individual.evaluate(features)))]
+            button_result = decide(features)
 
-            # print(input_, "-> ", button_result)
             player.press((button_result,))
         else:
             player.press((Button.NONE,))
 
 
-def individual_run(individual: Network):
+def individual_episode(individual: Network, seed: int) -> float:
     """
-    An individual run
+    An individual run on a seed
     """
-    random.seed(datetime.now())
-    tetris = Tetris()
+    tetris = booted_env("tetris", seed)
     player = Joypad(JoypadSpace(tetris, MOVEMENT))
 
-    fitness = []
+    if display is not None:
+        display.attach(tetris)
 
-    for _ in range(RUNS_PER_INDIVIDUAL):
-        fitness.append(tetris_run(individual, tetris, player))
+    with memory.track():
+        fitness = tetris_run(individual, tetris, player)
 
-        tetris.reset()
-        player.press((Button.NONE,))
+    if feature_cache is not None:
+        feature_cache.flush()
+    trace.flush()
+    sampling.flush()
 
-    individual.fitness = sum(fitness) / len(fitness)
-    tetris.close()
+    return fitness
 
-    return individual
+
+def penalize(_task) -> float:
+    return PENALTY_FITNESS
 
 
 if __name__ == "__main__":
+    # only the parent plots, workers never pay for importing matplotlib
+    import matplotlib.pyplot as plt
+
     # prepare folder to store results
     run = f"openai_itr={ITERATIONS}_ind={NUMBER_INDIVIDUALS}"
     date_ = str(datetime.now().replace(microsecond=0)).replace(" ", "_")
@@ -141,11 +206,41 @@ if __name__ == "__main__":
     average_fitness_list = list()
     max_fitness_list = list()
 
+    feature_cache = FeatureCache(FEATURE_CACHE_CAPACITY)
+    display = RenderService(
+        DISPLAY_SLOTS,
+        DISPLAY_DECIMATION,
+        show=SHOW,
+        record=folder / "videos" if RECORD else None,
+    ).start()
+
+    # the workers are forked once with a game ready emulator and reused, their number
+    # comes from `benchmark_scaling --tune` when the machine was tuned
+    tuning = load_tuning("tetris", default=Tuning(workers=os.cpu_count() or 1))
+    pool = Watchdog(
+        tuning.workers,
+        games=("tetris",),
+        deadline=EPISODE_DEADLINE,
+        frame_budget=EPISODE_FRAMES,
+        penalty=penalize,
+        max_rss=MAX_WORKER_RSS,
+        max_tasks=MAX_WORKER_TASKS,
+    )
+
     for index in range(ITERATIONS):
         population = genetic.population
-
-        with Pool(os.cpu_count()) as pool:
-            population = pool.map(individual_run, population)
+        seeds = [random.randrange(2**16) for _ in range(RUNS_PER_INDIVIDUAL)]
+        result = race(
+            pool,
+            individual_episode,
+            population,
+            seeds,
+            aggregation=FITNESS_AGGREGATION,
+            keep=RACE_KEEP,
+        )
+
+        for individual, fitness in zip(population, result.fitness):
+            individual.fitness = fitness
 
         max_fitness = max(population).fitness
         max_fitness_list.append(max_fitness)
@@ -163,10 +258,36 @@ if __name__ == "__main__":
         logger.info(f"max fitness: {max_fitness}")
         logger.info(f"average fitness: {average_fitness}")
         logger.info(f"species: {len(genetic.species)}")
+        logger.info(f"episodes: {result.episodes}, saved by racing: {result.saved}")
+        logger.info(
+            f"max worker rss: {max(pool.worker_rss.values(), default=0) / 2 ** 20:.1f}Mi"
+        )
+        logger.info(f"worker recycles: {pool.recycled}")
+        logger.info(f"failed episodes: {len(pool.failures)}, killed: {pool.killed}")
+        logger.info(f"decision cache: {decision_totals.stats.describe()}")
+        logger.info(f"feature cache: {feature_cache.stats.describe()}")
         logger.info("#----------#\n")
 
+        if memory.enabled():
+            logger.info(memory.format_report(memory.collect()) + "\n")
+
+        if trace.enabled():
+            events = trace.collect()
+            logger.info(trace.format_summary(trace.summary(events)) + "\n")
+            trace.write_chrome_trace(events, folder / f"trace_iteration={index}.json")
+
+        if sampling.running():
+            sampling.write_folded(
+                sampling.collect(), folder / f"profile_iteration={index}.folded"
+            )
+
+        decision_totals.reset()
+        feature_cache.reset_stats()
         genetic = genetic.evolve()
 
+    pool.close()
+    display.close()
+
     best_individual = max(genetic.population)
     best_individual.draw()
 
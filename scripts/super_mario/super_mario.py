@@ -2,14 +2,14 @@
 Super Mario session
 """
 
+import functools
 import logging
 import os
 import pickle
-import random
 from datetime import datetime
 from pathlib import Path
+from typing import Optional, Tuple
 
-import matplotlib.pyplot as plt
 from neats.genetic import Genetic, NetworkShape
 from neats.genome import Activation
 from neats.mutation import Mutation
@@ -18,8 +18,15 @@ from neats.selection import TournamentSelection
 from neats.session import Session
 from nes_py.wrappers import JoypadSpace
 
+from nes_ai.evaluation.racing import AGGREGATIONS
 from nes_ai.input import MOVEMENT, Button, Joypad, neat_result_to_buttons
 from nes_ai.mario.env import SuperMario
+from nes_ai.mario.observation import ObservationSpec
+from nes_ai.mario.stages import boot_stages, stage_env
+from nes_ai.memo import CacheTotals, DecisionCache
+from nes_ai.render import RenderService
+from nes_ai.util import memory, sampling, trace
+from nes_ai.util.scaling import Tuning, load_tuning
 
 logger = logging.getLogger()
 
@@ -38,15 +45,33 @@ BUTTONS_MAP = {
 THRESHOLD_FRAME = 5
 TIMEOUT = 100
 BUTTON_THRESHOLD = 0
-INITIAL_THRESHOLD = 100
 
-RENDER = True
+# workers shown live, each pushes one frame out of DISPLAY_DECIMATION to the render
+# service, whether the window is open, off for headless runs, and whether their runs
+# are also recorded to videos
+DISPLAY_SLOTS = 4
+DISPLAY_DECIMATION = 4
+SHOW = True
+RECORD = False
+
+# started by the parent before the session forks the workers
+display: Optional[RenderService] = None
+
+# decisions taken from the per run caches by all workers
+decision_totals = CacheTotals()
+
+# stages played by every individual, each from its own game ready emulator
+STAGES = ((1, 1),)
+FITNESS_AGGREGATION = "mean"
+
+# cells around mario given to the network
+OBSERVATION = ObservationSpec()
 
 # neats constants
 ITERATIONS = 1000
 NUMBER_INDIVIDUALS = 300
 
-NETWORK_INPUTS = 169
+NETWORK_INPUTS = OBSERVATION.n_inputs
 NETWORK_OUTPUTS = 5
 
 MUTATION_PROBABILITY = {
@@ -67,37 +92,38 @@ run = None
 iteration = None
 
 
-def individual_run(individual: Network) -> Network:
+def decide_buttons(individual: Network, features) -> Tuple[Button, ...]:
+    with trace.phase(trace.NETWORK):
+        result = individual.evaluate(features)
+
+    return neat_result_to_buttons(result, BUTTONS_MAP, BUTTON_THRESHOLD)  # noqa
+
+
+def stage_run(individual: Network, mario: SuperMario) -> int:
     """
-    An individual run
+    A run on one stage
     """
-    random.seed(datetime.now())
-    mario = SuperMario()
     player = Joypad(JoypadSpace(mario, MOVEMENT))
 
-    while mario.ram[0x0009] < INITIAL_THRESHOLD:
-        player.press((Button.START,), delay=INITIAL_THRESHOLD)
-
     frame_count = 0
     fitness = 0
     timeout_ = TIMEOUT
     rightmost_mario = 0
 
-    while True:
-        if RENDER:
-            mario.render()
+    # mario often waits on the same cells, their decisions are evaluated once
+    decide = DecisionCache(functools.partial(decide_buttons, individual))
 
-        if mario.is_dying or (timeout_ < 0 and frame_count > TIMEOUT):
-            individual.fitness = fitness
+    if display is not None:
+        display.attach(mario)
 
-            mario.close()
-            return individual
+    while True:
+        if mario.is_dying or (timeout_ < 0 and frame_count > TIMEOUT):
+            decision_totals.add(decide.stats)
+            return fitness
 
         # play
         features = mario.get_input_array()
-        button_result = neat_result_to_buttons(
-            individual.evaluate(features), BUTTONS_MAP, BUTTON_THRESHOLD  # noqa
-        )
+        button_result = decide(features)
 
         x_mario, _ = mario.get_mario()
 
@@ -116,7 +142,27 @@ def individual_run(individual: Network) -> Network:
         timeout_ -= 1
 
 
+def individual_run(individual: Network) -> Network:
+    """
+    An individual run, on every stage
+    """
+    with memory.track():
+        fitness = [
+            stage_run(individual, stage_env(*stage, observation=OBSERVATION))
+            for stage in STAGES
+        ]
+
+    individual.fitness = AGGREGATIONS[FITNESS_AGGREGATION](fitness)
+    trace.flush()
+    sampling.flush()
+
+    return individual
+
+
 if __name__ == "__main__":
+    # only the parent plots, workers never pay for importing matplotlib
+    import matplotlib.pyplot as plt
+
     if run and iteration:
         folder = Path.cwd() / "runs" / run  # noqa
         folder.mkdir(parents=True, exist_ok=True)
@@ -143,11 +189,22 @@ if __name__ == "__main__":
         folder = Path.cwd() / "runs" / run
         folder.mkdir(parents=True, exist_ok=True)
 
+    # forked workers inherit a game ready emulator per stage
+    boot_stages(STAGES, observation=OBSERVATION)
+    display = RenderService(
+        DISPLAY_SLOTS,
+        DISPLAY_DECIMATION,
+        show=SHOW,
+        record=folder / "videos" if RECORD else None,
+    ).start()
+
     session = Session(
         individual_run=individual_run,
         genetic=genetic,
         folder=folder,
-        parallel_num=os.cpu_count() - 1,
+        parallel_num=load_tuning(
+            "mario", default=Tuning(workers=os.cpu_count() - 1)
+        ).workers,
     )
 
     average_fitness, max_fitness = session.start(
@@ -155,6 +212,21 @@ if __name__ == "__main__":
         evolve_properties={"disjoint": DISJOINT, "weight": WEIGHT},
     )
 
+    display.close()
+    logger.info(f"decision cache: {decision_totals.stats.describe()}")
+
+    # the session runs every generation, so the trace covers the whole run
+    if trace.enabled():
+        events = trace.collect()
+        logger.info(trace.format_summary(trace.summary(events)))
+        trace.write_chrome_trace(events, folder / "trace.json")
+
+    if sampling.running():
+        sampling.write_folded(sampling.collect(), folder / "profile.folded")
+
+    if memory.enabled():
+        logger.info(memory.format_report(memory.collect()))
+
     best_individual = max(session.genetic.population)
     best_individual.draw()
 
@@ -4,12 +4,10 @@ Super Mario replay
 
 import logging
 import pickle
-import time
 
-from nes_py.wrappers import JoypadSpace
-
-from nes_ai.input import MOVEMENT, Button, Joypad, neat_result_to_buttons
+from nes_ai.input import Button, neat_result_to_buttons
 from nes_ai.mario.env import SuperMario
+from nes_ai.realtime import Press, play_realtime
 from scripts.super_mario.super_mario import (
     BUTTON_THRESHOLD,
     BUTTONS_MAP,
@@ -30,20 +28,11 @@ individual = list(sorted(genetic.population, reverse=True))[0]
 individual.draw()
 
 mario = SuperMario()
-player = Joypad(JoypadSpace(mario, MOVEMENT))
-
-while mario.ram[0x0009] < 100:
-    player.press((Button.START,), delay=100)
-
-while True:
-    mario.render()
+mario.start()
 
-    if mario.is_dying:
-        mario.close()
-        break
 
-    # play
-    features = mario.get_input_array()
+def decide(env: SuperMario) -> Press:
+    features = env.get_input_array()
     indexes = individual.evaluate(features)
     button_result = neat_result_to_buttons(indexes, BUTTONS_MAP, BUTTON_THRESHOLD)
 
@@ -51,9 +40,12 @@ while True:
     logger.debug(button_result)
 
     if button_result:
-        player.press(button_result, delay=THRESHOLD_FRAME, replay=True)
-    else:
-        player.press((Button.NONE,), delay=0)
+        return Press(button_result, delay=THRESHOLD_FRAME, replay=True)
+    return Press((Button.NONE,), delay=0)
+
+
+# every frame is played at the pace of the NES, the policy must decide within a frame
+stats = play_realtime(mario, decide, done=lambda env: env.is_dying, render=True)
+mario.close()
 
-    x_mario, _ = mario.get_mario()
-    time.sleep(0.03)
+logger.info(stats.describe())
@@ -0,0 +1,30 @@
+"""
+Tetris boards shared by the tests
+"""
+
+import numpy as np
+
+from nes_ai.tetris.board import Board
+from nes_ai.tetris.field import CurrentPiece, Field, Point
+from nes_ai.tetris.piece import build_pieces
+
+PIECES = build_pieces()
+
+
+def well_board(column: int, x: int) -> Board:
+    """
+    Four full rows but for a well in the column, with an I piece above it at `x`
+    """
+    array = np.zeros((20, 10), dtype=int)
+    array[16:] = 1
+    array[16:, column] = 0
+
+    return Board(
+        field=Field(array),
+        piece=CurrentPiece(piece=PIECES[0x11], position=Point(x=x, y=1)),
+        next_piece=PIECES[0x0A],
+        level=5,
+        score=1234,
+        lines=12,
+        seed=1,
+    )
@@ -0,0 +1,33 @@
+"""
+Test the benchmark helpers and the regression gate
+"""
+
+import pytest
+
+from nes_ai.util.benchmark import compare, load_results, run_benchmark, save_results
+
+
+def test_run_benchmark():
+    result = run_benchmark("noop", lambda: None, operations=10, repeat=3)
+
+    assert len(result.seconds) == 3
+    assert result.ops_per_second > 0
+
+
+def test_compare():
+    baseline = {"fast": 100.0, "slow": 100.0, "custom": 100.0, "removed": 100.0}
+    current = {"fast": 130.0, "slow": 70.0, "custom": 70.0, "added": 1.0}
+
+    regressions = compare(current, baseline, threshold=0.2, thresholds={"custom": 0.5})
+
+    assert [regression.name for regression in regressions] == ["slow"]
+    assert regressions[0].change == pytest.approx(-0.3)
+
+
+def test_save_and_load(tmp_path):
+    result = run_benchmark("noop", lambda: None, operations=10, repeat=2)
+    path = tmp_path / "benchmark.json"
+
+    save_results([result], path)
+
+    assert load_results(path) == {"noop": result.ops_per_second}
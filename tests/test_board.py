@@ -0,0 +1,50 @@
+"""
+Test the boards loaded into the Tetris RAM
+"""
+
+from nes_py.wrappers import JoypadSpace
+
+from nes_ai.bootstrap import booted_env, bootstrap_pool
+from nes_ai.input import MOVEMENT, Button, Joypad
+from nes_ai.tetris.board import board_from_ram, play_boards
+from tests.boards import well_board
+
+
+def drop(tetris) -> int:
+    player = Joypad(JoypadSpace(tetris, MOVEMENT))
+
+    # held down, the piece soft drops a row every other frame
+    for _ in range(30):
+        player.press((Button.DOWN,), replay=True)
+
+    # and the cleared lines are removed after the animation
+    for _ in range(10):
+        player.press((Button.NONE,))
+
+    return int(tetris.field.array.sum())
+
+
+def test_load_board():
+    tetris = booted_env("tetris")
+    board = well_board(4, 4)
+    tetris.load_board(*board)
+
+    assert tetris.field == board.field
+    assert tetris.piece.piece == board.piece.piece
+    assert tetris.piece.position == board.piece.position
+    assert tetris.next_piece == board.next_piece
+    assert (tetris.stats.level, tetris.stats.score, tetris.stats.lines) == (5, 1234, 12)
+    assert board_from_ram(tetris.ram.copy()).field == board.field
+
+    # the I piece falls into the well and clears the four rows
+    assert drop(tetris) == 0
+
+
+def test_play_boards():
+    with bootstrap_pool(2, games=("tetris",)) as pool:
+        cells = play_boards(
+            pool, drop, [well_board(4, 4), well_board(4, 7)], chunksize=1
+        )
+
+    # beside the well the piece lands on the rows instead
+    assert cells == [0, 40]
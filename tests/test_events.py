@@ -0,0 +1,41 @@
+"""
+Test the event driven stepping of Tetris
+"""
+
+import numpy as np
+
+from nes_ai.bootstrap import booted_env
+from nes_ai.tetris.field import Field
+from nes_ai.tetris.info import Event
+from tests.boards import well_board
+
+DOWN = 0b00100000
+
+
+def test_piece_cycle():
+    tetris = booted_env("tetris")
+    tetris.load_board(*well_board(4, 4))
+    pieces = tetris.stats.pieces
+
+    assert tetris.advance_until(Event.PIECE_LOCKED, action=DOWN) == Event.PIECE_LOCKED
+    assert tetris.play_state == tetris.LOCKING_PIECE
+
+    assert tetris.advance_until(Event.LINES_CLEARED) == Event.LINES_CLEARED
+    assert tetris.field.array.sum() == 0
+
+    assert tetris.advance_until() == Event.NEW_PIECE
+    assert tetris.stats.pieces == pieces + 1
+    assert tetris.play_state == tetris.ACTIVE_PIECE
+    assert not tetris.is_game_over
+
+    assert tetris.advance_until(Event.PIECE_LOCKED, max_frames=5) is None
+
+
+def test_game_over():
+    tetris = booted_env("tetris")
+    array = np.ones((20, 10), dtype=int)
+    array[:, 0] = 0
+    tetris.load_board(Field(array))
+
+    assert tetris.advance_until(Event.GAME_OVER, Event.NEW_PIECE) == Event.GAME_OVER
+    assert tetris.is_game_over
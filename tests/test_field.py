@@ -7,8 +7,10 @@ import random
 import numpy as np
 import pytest
 
+from nes_ai.tetris.env import Tetris
 from nes_ai.tetris.field import FIELD_SHAPE, CurrentPiece, Field, Point
 from nes_ai.tetris.piece import build_pieces
+from nes_ai.util.corpus import CORPORA_FOLDER, load_corpus
 
 
 def test_field_size():
@@ -48,3 +50,15 @@ def test_laid_down_piece():
     array_with_piece = field._array_with_piece_down(current_piece)
 
     assert array_with_piece[expected_center[1], expected_center[0]] == 1
+
+
+def test_incremental_features():
+    _, rams = load_corpus(CORPORA_FOLDER / "tetris.npz")
+    tetris = Tetris.from_ram(rams[0].copy())
+
+    for ram in rams:
+        tetris.ram[:] = ram
+        expected = tetris.field.features(tetris.piece, tetris.next_piece)
+
+        assert tetris.features() == expected
+        assert tetris.field_state.field == tetris.field
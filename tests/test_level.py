@@ -0,0 +1,92 @@
+"""
+Test the map of the Super Mario level geometry
+"""
+
+import numpy as np
+
+import nes_ai.mario.env
+from nes_ai.mario.env import SuperMario
+from nes_ai.mario.level import (
+    AREA_POINTER,
+    PARSER_COLUMN,
+    PARSER_PAGE,
+    ROWS,
+    TILE_BUFFER,
+    LevelMap,
+)
+from nes_ai.mario.stages import stage_env
+
+
+def parsed_ram(column: int) -> np.ndarray:
+    # every buffered column holds a tile in the row of its index modulo 13
+    ram = np.zeros(0x800, dtype=np.uint8)
+    ram[PARSER_PAGE], ram[PARSER_COLUMN] = divmod(column, 16)
+
+    for absolute in range(max(0, column - 32), column):
+        page, sub_x = divmod(absolute % 32, 16)
+        ram[TILE_BUFFER + page * ROWS * 16 + absolute % ROWS * 16 + sub_x] = 0x54
+
+    return ram
+
+
+def test_level_map_keeps_scrolled_columns():
+    level_map = LevelMap()
+
+    # the parser writes a column every 8 pixels of scroll at most
+    for column in range(24, 301, 4):
+        level_map.update(parsed_ram(column))
+
+    assert level_map.columns == 300
+    assert level_map.tiles.shape[1] >= 300
+    assert (level_map.tiles[:, :300].sum(axis=0) == 1).all()
+    assert level_map.tiles[5, 5] == 1
+
+    window = level_map.window(-2, 295, 4, 10)
+    assert window.shape == (4, 10)
+    assert (window[:2] == 0).all()
+    assert (window[:, 5:] == 0).all()
+
+    level_map.clear()
+    assert level_map.columns == 0
+    assert level_map.tiles.sum() == 0
+
+
+def test_level_window():
+    mario = stage_env(1, 1)
+    window = mario.level_window(behind=2, ahead=20)
+
+    # the ground of the start of 1-1, nothing before the start of the level
+    assert window.shape == (ROWS, 23)
+    assert window[-2:].all()
+
+    inputs = np.reshape(mario.get_input_array(), (13, 13))
+    assert inputs[8:10, 3:].all()
+    assert not inputs[:, :3].any()
+
+
+def test_level_map_of_a_new_area(monkeypatch):
+    # from the intro of 1-2, Mario walks into the pipe to the underground area
+    monkeypatch.setattr(nes_ai.mario.env, "INTRO_WORLDS", ())
+    mario = SuperMario(1, 2)
+    mario.start()
+    intro = mario.ram[AREA_POINTER]
+
+    for _ in range(400):
+        mario.step(0)
+        mario.level_map.update(mario.ram)
+
+        if mario.ram[AREA_POINTER] != intro:
+            break
+
+    assert mario.ram[AREA_POINTER] != intro
+
+    # nothing left of the intro while the new area is parsed, the map is the one of
+    # the buffer
+    for _ in range(20):
+        mario.step(0)
+        mario.level_map.update(mario.ram)
+
+        fresh = LevelMap()
+        fresh.update(mario.ram)
+        assert mario.level_map.columns == fresh.columns
+        assert (mario.level_map.tiles == fresh.tiles).all()
@@ -0,0 +1,39 @@
+"""
+Test the memoization of decisions
+"""
+
+import numpy as np
+
+from nes_ai.memo import CacheStats, CacheTotals, DecisionCache
+
+
+def test_decision_cache():
+    evaluated = list()
+
+    def decide(observation):
+        evaluated.append(list(observation))
+        return int(np.sum(observation))
+
+    cache = DecisionCache(decide, size=2)
+    observations = [[0, 1], [0, 1], [1, 1], [0, 1], [2, 1], [1, 1], [1, 1]]
+
+    assert [cache(observation) for observation in observations] == [1, 1, 2, 1, 3, 2, 2]
+    # [1, 1] was the least recently used when [2, 1] came in
+    assert evaluated == [[0, 1], [1, 1], [2, 1], [1, 1]]
+    assert cache.stats == CacheStats(hits=3, misses=4)
+    assert cache.stats.hit_rate == 3 / 7
+
+    # observations of different types but equal values share the decision
+    assert cache(np.array([1, 1], dtype=np.int8)) == 2
+    assert cache.hits == 4
+
+
+def test_totals():
+    totals = CacheTotals()
+    totals.add(CacheStats(3, 1))
+    totals.add(CacheStats(1, 3))
+
+    assert totals.stats == CacheStats(4, 4)
+
+    totals.reset()
+    assert totals.stats == CacheStats()
@@ -0,0 +1,88 @@
+"""
+Test the memory reports and the recycling of workers
+"""
+
+import os
+import time
+
+import pytest
+
+from nes_ai.bootstrap import RecyclingPool
+from nes_ai.evaluation.watchdog import Watchdog
+from nes_ai.util import memory
+
+
+def square(value: int) -> int:
+    return value * value
+
+
+def test_track_and_report(tmp_path):
+    memory.enable(tmp_path, trace_allocations=True)
+
+    try:
+        with memory.track("episode"):
+            garbage = [bytearray(1024) for _ in range(100)]
+        records = memory.collect()
+    finally:
+        memory.disable()
+
+    assert len(records) == 1
+    assert records[0].pid == os.getpid()
+    assert records[0].traced_growth > 0
+    assert len(records[0].top) > 0
+    assert str(os.getpid()) in memory.format_report(records)
+    assert len(garbage) == 100
+
+
+def test_track_failed_episode(tmp_path):
+    memory.enable(tmp_path)
+
+    try:
+        with pytest.raises(RuntimeError):
+            with memory.track("failed"):
+                raise RuntimeError("episode failed")
+        records = memory.collect()
+    finally:
+        memory.disable()
+
+    assert [record.label for record in records] == ["failed"]
+
+
+def stuck_episode(value: int):
+    with memory.track():
+        # held until the watchdog kills the worker
+        garbage = bytearray(value)
+
+        while garbage:
+            time.sleep(0.01)
+
+
+def test_track_killed_episode(tmp_path):
+    memory.enable(tmp_path)
+
+    try:
+        with Watchdog(1, games=(), deadline=0.5, retries=0) as pool:
+            pool.map(stuck_episode, (2**20,))
+            assert pool.killed == 1
+        records = memory.collect()
+    finally:
+        memory.disable()
+
+    assert [record.label for record in records] == ["episode (killed)"]
+    assert records[0].rss_after > 0
+
+
+def test_recycling_pool():
+    with RecyclingPool(2, games=(), max_rss=1) as pool:
+        assert pool.map(square, range(4)) == [0, 1, 4, 9]
+        first_workers = set(pool.worker_rss)
+
+        assert pool.recycled == 1
+        assert pool.map(square, range(4)) == [0, 1, 4, 9]
+        assert not first_workers & set(pool.worker_rss)
+
+    with RecyclingPool(2, games=()) as pool:
+        pool.map(square, range(4))
+        pool.map(square, range(4))
+
+        assert pool.recycled == 0
@@ -0,0 +1,68 @@
+"""
+Test the configurable Super Mario observation
+"""
+
+import numpy as np
+import pytest
+
+from nes_ai.mario.env import SuperMario
+from nes_ai.mario.observation import ObservationSpec, input_layer
+from nes_ai.mario.stages import stage_env
+
+
+@pytest.fixture(scope="module")
+def ram():
+    mario = stage_env(1, 1)
+
+    for _ in range(120):
+        mario.step(0b10000001)
+
+    return mario.ram.copy()
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        ObservationSpec(),
+        ObservationSpec(behind=2, ahead=14, above=5, below=5, channels=True),
+        ObservationSpec(cell=8),
+    ],
+)
+def test_input_count(ram, spec):
+    inputs = SuperMario.from_ram(ram, observation=spec).get_input_array()
+
+    assert len(inputs) == spec.n_inputs
+    assert set(inputs) <= ({0, 1} if spec.channels else {-1, 0, 1})
+
+
+def test_window_is_part_of_a_wider_one(ram):
+    wide = ObservationSpec(behind=8, ahead=12)
+
+    cells = SuperMario.from_ram(ram).get_input_array()
+    wide_cells = SuperMario.from_ram(ram, observation=wide).get_input_array()
+
+    assert SuperMario.from_ram(ram).n_inputs == 169
+    assert np.array_equal(
+        np.reshape(cells, (13, 13)), np.reshape(wide_cells, (13, 21))[:, 2:15]
+    )
+    assert np.reshape(cells, (13, 13)).any()
+
+
+def test_invalid_spec():
+    with pytest.raises(ValueError):
+        SuperMario.from_ram(np.zeros(0x800, np.uint8), ObservationSpec(cell=0))
+
+
+def test_sparse_parity(ram):
+    rng = np.random.default_rng(0)
+
+    for spec in (ObservationSpec(), ObservationSpec(channels=True)):
+        mario = SuperMario.from_ram(ram, observation=spec)
+        cells = mario.get_input_array()
+        sparse = mario.get_sparse_input()
+
+        assert np.array_equal(sparse.dense(), cells)
+        assert 0 < len(sparse.indices) < len(cells)
+
+        weights = rng.normal(size=(spec.n_inputs, 5))
+        assert np.allclose(input_layer(weights, sparse), np.dot(cells, weights))
@@ -0,0 +1,49 @@
+"""
+Test the pipelined decision loop
+"""
+
+import numpy as np
+from nes_py.wrappers import JoypadSpace
+
+from nes_ai.input import MOVEMENT, Button, Joypad
+from nes_ai.mario.stages import stage_env
+from nes_ai.pipeline import play_pipelined
+from nes_ai.realtime import Press
+
+DECISIONS = 60
+
+WEIGHTS = np.random.default_rng(0).normal(size=169)
+
+
+def policy(observation) -> Press:
+    # runs right and jumps depending on the cells
+    if np.dot(observation, WEIGHTS) > 0:
+        return Press((Button.RIGHT, Button.A), delay=5, replay=True)
+    return Press((Button.RIGHT,), delay=5, replay=True)
+
+
+def observe(mario):
+    return mario.get_input_array()
+
+
+def test_pipelined_episode_is_the_sequential_one():
+    mario = stage_env(1, 1)
+    mario.recording = bytearray()
+
+    try:
+        player = Joypad(JoypadSpace(mario, MOVEMENT))
+        for _ in range(DECISIONS):
+            player.press(*policy(observe(mario)))
+        sequential, ram = bytes(mario.recording), mario.ram.copy()
+
+        mario = stage_env(1, 1)
+        stats = play_pipelined(
+            mario, observe, policy, lambda _env: False, max_decisions=DECISIONS
+        )
+
+        assert bytes(mario.recording) == sequential
+        assert np.array_equal(mario.ram, ram)
+        assert stats.decisions == DECISIONS
+        assert 0 < stats.hits <= stats.speculations
+    finally:
+        mario.recording = None
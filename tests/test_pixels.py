@@ -0,0 +1,47 @@
+"""
+Test the pixel observation of the envs
+"""
+
+import numpy as np
+import pytest
+
+from nes_ai.bootstrap import booted_env
+from nes_ai.pixels import GRAY_WEIGHTS, FrameStack, PixelSpec
+
+
+def test_frame_stack_order():
+    stack = FrameStack(PixelSpec(scale=1, frames=3), (2, 2, 3))
+
+    for value in range(1, 6):
+        stack.push(np.full((2, 2, 3), value, dtype=np.uint8))
+
+        frames = stack.stacked()[:, 0, 0].tolist()
+        assert frames == [max(1, value - 2), max(1, value - 1), value]
+        assert stack.latest[0, 0] == value
+
+    stack.clear()
+    stack.push(np.full((2, 2, 3), 9, dtype=np.uint8))
+    assert (stack.stacked() == 9).all()
+
+
+@pytest.mark.parametrize("spec", [PixelSpec(), PixelSpec(scale=3, grayscale=False)])
+def test_env_pixels(spec):
+    env = booted_env("tetris")
+
+    try:
+        pixels = env.observe_pixels(spec)
+
+        for _ in range(10):
+            env.step(0)
+
+        screen = env.screen[:: spec.scale, :: spec.scale].astype(np.int64)
+        if spec.grayscale:
+            screen = screen @ GRAY_WEIGHTS >> 8
+
+        assert pixels.stacked().shape == (spec.frames, *screen.shape)
+        assert np.array_equal(pixels.stacked()[-1], screen)
+
+        env.reset()
+        assert pixels.count == 1
+    finally:
+        env.pixels = None
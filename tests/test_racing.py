@@ -0,0 +1,39 @@
+"""
+Test the racing evaluation and the seeded episodes it relies on
+"""
+
+import pytest
+
+from nes_ai.bootstrap import booted_env
+from nes_ai.evaluation.racing import race
+
+
+class SerialPool:
+    @staticmethod
+    def map(func, iterable):
+        return [func(item) for item in iterable]
+
+
+def episode(individual: int, seed: int) -> float:
+    return individual * 10 - seed
+
+
+@pytest.mark.parametrize("aggregation, best_fitness", [("mean", 39.0), ("min", 38.0)])
+def test_race(aggregation, best_fitness):
+    result = race(SerialPool(), episode, range(5), (0, 1, 2), aggregation=aggregation)
+
+    assert result.seeds_played == [1, 1, 2, 3, 3]
+    assert result.fitness[0] == 0
+    assert result.fitness[-1] == best_fitness
+    assert result.episodes == 5 + 3 + 2
+    assert result.saved == 15 - 10
+
+
+def test_seeded_reset_is_repeatable():
+    tetris = booted_env("tetris", seed=7)
+    ram = tetris.ram.copy()
+
+    assert (booted_env("tetris", seed=7).ram == ram).all()
+    assert any(
+        (booted_env("tetris", seed=seed).ram != ram).any() for seed in range(8, 12)
+    )
@@ -0,0 +1,60 @@
+"""
+Test the real-time playback
+"""
+
+import pytest
+
+from nes_ai.bootstrap import booted_env
+from nes_ai.input import Button
+from nes_ai.realtime import NES_FPS, FrameClock, Press, play_realtime
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+def test_frame_clock():
+    fake = FakeTime()
+    frame_clock = FrameClock(fps=10, clock=fake.clock, sleep=fake.sleep)
+
+    assert frame_clock.tick() and fake.now == 0
+    assert frame_clock.tick() and fake.now == pytest.approx(0.1)
+
+    # a late frame restarts the schedule from itself
+    fake.now = 0.35
+    assert not frame_clock.tick()
+    assert frame_clock.tick() and fake.now == pytest.approx(0.45)
+
+
+def test_play_realtime():
+    fake = FakeTime()
+    costs = iter([0.001, 0.001, 0.05, 0.001, 0.001])
+
+    def decide(_env) -> Press:
+        fake.now += next(costs)
+        return Press((Button.NONE,), delay=2)
+
+    stats = play_realtime(
+        booted_env("tetris"),
+        decide,
+        done=lambda _env: False,
+        max_decisions=5,
+        clock=fake.clock,
+        sleep=fake.sleep,
+    )
+
+    assert stats.frames == 15
+    assert stats.budget == pytest.approx(1 / NES_FPS)
+    assert stats.missed_decisions == 1
+    assert stats.missed_frames == 1
+    assert stats.p50 == pytest.approx(0.001)
+    assert stats.histogram()[0].sum() == 5
+    # every frame but the missed one was on time
+    assert fake.now == pytest.approx(0.001 + 0.05 + 13 / NES_FPS)
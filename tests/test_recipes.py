@@ -0,0 +1,75 @@
+"""
+Test the library of state recipes
+"""
+
+from nes_py.wrappers import JoypadSpace
+
+from nes_ai.bootstrap import booted_env
+from nes_ai.input import MOVEMENT, Button, Joypad
+from nes_ai.recipes import RecipeLibrary
+
+
+def test_library_round_trip(tmp_path):
+    tetris = booted_env("tetris")
+    tetris.recording = bytearray()
+    player = Joypad(JoypadSpace(tetris, MOVEMENT))
+
+    try:
+        tetris.reset(seed=5)
+        library = RecipeLibrary(tmp_path / "states.bin")
+
+        for buttons in ((Button.LEFT,), (Button.A,), (Button.RIGHT,)):
+            for _ in range(10):
+                player.press(buttons)
+            library.add("tetris", tetris, section=1)
+
+        rams = [library.ram(state).copy() for state in library.states]
+        assert library.add("tetris", tetris) is library.states[-1]
+        library.save()
+    finally:
+        tetris.recording = None
+
+    library = RecipeLibrary(tmp_path / "states.bin")
+    assert len(library.states) == 3
+    assert library.find("tetris", section=1, height=0) == library.states
+    assert library.find("mario") == []
+
+    for state, ram in zip(library.states, rams):
+        library.restore(tetris, state)
+        assert (tetris.ram == ram).all()
+        assert tetris.frame_count == state.frames
+
+
+def test_start_rewinds(tmp_path):
+    tetris = booted_env("tetris")
+    tetris.recording = bytearray()
+    player = Joypad(JoypadSpace(tetris, MOVEMENT))
+
+    try:
+        tetris.reset(seed=2)
+        library = RecipeLibrary(tmp_path / "states.bin", envs=1)
+
+        for _ in range(2):
+            for _ in range(5):
+                player.press((Button.LEFT,))
+            library.add("tetris", tetris)
+    finally:
+        tetris.recording = None
+
+    first, second = library.states
+    env = library.start(first)
+    ram = library.ram(first)
+    assert (env.ram == ram).all()
+    assert env.frame_count == first.frames
+
+    for _ in range(20):
+        env.step(0)
+
+    # the same emulator, back at the state
+    assert library.start(first) is env
+    assert (env.ram == ram).all()
+    assert env.frame_count == first.frames
+
+    # past the bound, the emulator of the first state is dropped
+    assert library.start(second) is not env
+    assert (library.start(second).ram == library.ram(second)).all()
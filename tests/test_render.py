@@ -0,0 +1,74 @@
+"""
+Test the render and record service
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from nes_ai.bootstrap import booted_env
+from nes_ai.render import SCREEN_SHAPE, RenderService
+
+
+class DumpSink:
+    # saves the last view it was given, from the background process
+    path: Path
+
+    def __init__(self, shape):
+        self.view = np.zeros(shape, dtype=np.uint8)
+        self.writes = 0
+
+    def write(self, frame: np.ndarray):
+        self.view[:] = frame
+        self.writes += 1
+
+    def close(self):
+        np.save(self.path, self.view)
+
+
+def test_tiled_view(tmp_path):
+    DumpSink.path = tmp_path / "view.npy"
+    service = RenderService(
+        slots=3, decimation=2, fps=100, show=False, sinks=[DumpSink]
+    )
+
+    with service:
+        first, second = service.claim(), service.slot(2)
+
+        for value in range(1, 5):
+            first.push(np.full(SCREEN_SHAPE, value, dtype=np.uint8))
+        second.push(np.full(SCREEN_SHAPE, 7, dtype=np.uint8))
+
+    view = np.load(DumpSink.path)
+    height, width, _ = SCREEN_SHAPE
+
+    # 2 by 2 tiles, the second slot pushed a single frame, skipped by the decimation
+    assert view.shape == (2 * height, 2 * width, 3)
+    assert (view[:height, :width] == 4).all()
+    assert (view[height:, :width] == 0).all()
+    assert (view[:, width:] == 0).all()
+
+
+def test_env_pushes_to_its_slot():
+    env = booted_env("tetris")
+    service = RenderService(slots=1, decimation=5, show=False)
+
+    try:
+        service.attach(env)
+        slot = env.display
+
+        for frame in range(1, 13):
+            env.step(0)
+
+            if frame == 10:
+                screen = env.screen.copy()
+
+        # every process keeps the slot it claimed first
+        service.attach(env)
+        assert env.display is slot
+
+        assert slot.frame_count == 12
+        assert service._sequences[0] == 4
+        assert np.array_equal(service._frames[0], screen)
+    finally:
+        env.display = None
@@ -0,0 +1,41 @@
+"""
+Test the sampling profiler
+"""
+
+import sys
+import time
+
+from nes_ai.util import sampling
+
+
+def busy(seconds: float):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+def test_fold():
+    frame = sys._getframe()
+    stack = sampling.fold(frame).split(";")
+
+    assert stack[-1] == f"test_fold (test_sampling.py:{frame.f_code.co_firstlineno})"
+    assert len(stack) > 1
+
+
+def test_collect_and_write(tmp_path):
+    sampling.start(tmp_path / "samples", interval=0.001)
+
+    try:
+        busy(0.2)
+        stacks = sampling.collect()
+    finally:
+        sampling.stop()
+
+    assert sum(stacks.values()) > 0
+    assert any("busy" in stack for stack in stacks)
+
+    sampling.write_folded(stacks, tmp_path / "profile.folded")
+    lines = (tmp_path / "profile.folded").read_text().splitlines()
+
+    assert len(lines) == len(stacks)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
@@ -0,0 +1,37 @@
+"""
+Test the knee of the scaling curve and the tuning cache
+"""
+
+from nes_ai.util.scaling import ScalingPoint, Tuning, knee, load_tuning, save_tuning
+
+
+def point(workers: int, decisions: int) -> ScalingPoint:
+    return ScalingPoint(
+        workers=workers,
+        chunksize=1,
+        seconds=1.0,
+        frames=decisions * 3,
+        decisions=decisions,
+        rss={100 + worker: 2**20 * (worker + 1) for worker in range(workers)},
+        ipc_seconds=0.0,
+    )
+
+
+def test_knee():
+    points = [point(1, 100), point(2, 195), point(3, 280), point(4, 285), point(5, 400)]
+
+    assert knee(points).workers == 3
+    assert knee(points[:1]).workers == 1
+    assert points[2].max_rss == 3 * 2**20
+
+
+def test_tuning_cache(tmp_path):
+    path = tmp_path / "tuning.json"
+    default = Tuning(workers=8)
+
+    assert load_tuning("tetris", default, path) == default
+
+    save_tuning("tetris", Tuning(workers=3, chunksize=2), path)
+
+    assert load_tuning("tetris", default, path) == Tuning(workers=3, chunksize=2)
+    assert load_tuning("mario", default, path) == default
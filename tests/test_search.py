@@ -0,0 +1,49 @@
+"""
+Test the two piece lookahead search of Tetris
+"""
+
+import numpy as np
+
+from nes_ai.bootstrap import booted_env
+from nes_ai.tetris.search import Placement, SearchAgent, heuristic, play
+from tests.boards import well_board
+
+
+def test_fills_the_well():
+    board = well_board(4, 4)
+    agent = SearchAgent()
+
+    result = agent.search(board.field.array, 0x11, 0x0A)
+
+    assert result.placement == Placement(0x11, 4, 18)
+    assert result.complete
+    # and the O of the next piece against a wall of the empty field
+    leaf = np.zeros((20, 10), dtype=bool)
+    leaf[18:, :2] = True
+    assert result.score == heuristic(leaf, 4)
+
+
+def test_budget():
+    board = np.zeros((20, 10), dtype=bool)
+    board[15:, 1:] = True
+
+    complete = SearchAgent(budget=float("inf")).search(board, 0x00, 0x11)
+    bounded = SearchAgent(budget=0).search(board, 0x00, 0x11)
+
+    assert complete.complete and not bounded.complete
+    assert bounded.nodes < complete.nodes
+    assert bounded.placement is not None
+    # no board was expanded, the placement is the one of the first piece alone
+    alone = SearchAgent(budget=0).search(board, 0x00, None)
+    assert (bounded.nodes, bounded.placement) == (alone.nodes, alone.placement)
+
+
+def test_play():
+    tetris = booted_env("tetris")
+    tetris.load_board(*well_board(4, 4))
+    lines = tetris.stats.lines
+
+    searches = play(tetris, SearchAgent(), max_pieces=2)
+
+    assert len(searches) == 2
+    assert tetris.stats.lines == lines + 4
@@ -0,0 +1,46 @@
+"""
+Test the Super Mario stage selection and the evaluation over stages
+"""
+
+from nes_ai.bootstrap import bootstrap_pool
+from nes_ai.mario.stages import boot_stages, play_stages, stage_env
+
+STAGES = ((1, 1), (4, 2))
+
+# area type the game loads for the stage, 1-1 is overground and 4-2 underground
+AREA_TYPE = 0x074E
+AREA_TYPES = {(1, 1): 1, (4, 2): 2}
+
+
+def episode(offset: int, mario) -> float:
+    tags = mario.state_tags()
+    return offset + 10 * tags["world"] + tags["stage"]
+
+
+def test_stage_env():
+    windows = list()
+
+    for world, stage in STAGES:
+        mario = stage_env(world, stage)
+        assert mario.ram[AREA_TYPE] == AREA_TYPES[(world, stage)]
+        windows.append(mario.level_window(behind=0, ahead=16))
+
+        # still the stage once in play
+        for _ in range(60):
+            mario.step(0)
+
+        assert mario.state_tags()["world"] == world
+        assert mario.state_tags()["stage"] == stage
+        assert not mario.is_dying
+
+    assert stage_env(1, 1) is not stage_env(4, 2)
+    assert not (windows[0] == windows[1]).all()
+
+
+def test_play_stages():
+    boot_stages(STAGES)
+
+    with bootstrap_pool(2, games=()) as pool:
+        fitness = play_stages(pool, episode, (0, 100), STAGES, aggregation="min")
+
+    assert fitness == [11, 111]
@@ -0,0 +1,43 @@
+"""
+Test the phase timers and their exports
+"""
+
+import json
+
+from nes_ai.util import trace
+
+
+def test_disabled_phase_records_nothing():
+    with trace.phase(trace.NETWORK):
+        pass
+
+    assert not trace.enabled()
+    assert trace.collect() == list()
+
+
+def test_collect_and_export(tmp_path):
+    @trace.timed(trace.FEATURES)
+    def features():
+        return 1
+
+    trace.enable(tmp_path)
+
+    try:
+        with trace.phase(trace.NETWORK):
+            assert features() == 1
+        trace.flush()
+        events = trace.collect()
+    finally:
+        trace.disable()
+
+    assert [event.name for event in events] == [trace.NETWORK, trace.FEATURES]
+    assert list(tmp_path.glob("*.jsonl")) == list()
+
+    summaries = {item.name: item for item in trace.summary(events)}
+    assert summaries[trace.NETWORK].count == 1
+    assert summaries[trace.NETWORK].seconds >= summaries[trace.FEATURES].seconds
+
+    trace.write_chrome_trace(events, tmp_path / "trace.json")
+    trace_events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+
+    assert {event["ph"] for event in trace_events} == {"X"}
@@ -0,0 +1,58 @@
+"""
+Test the transposition cache of the Tetris features
+"""
+
+import os
+
+import numpy as np
+
+from nes_ai.tetris.env import Tetris
+from nes_ai.tetris.transposition import FeatureCache, TranspositionStats
+from nes_ai.util.corpus import CORPORA_FOLDER, load_corpus
+
+
+def test_cached_features_are_the_computed_ones():
+    _, rams = load_corpus(CORPORA_FOLDER / "tetris.npz")
+    tetris = Tetris.from_ram(rams[0].copy())
+    cache = FeatureCache(capacity=1024)
+
+    for _ in range(2):
+        for ram in rams[:50]:
+            tetris.ram[:] = ram
+            assert cache.features(tetris) == tetris.features()
+
+    stats = cache.stats
+    assert stats.hits >= 50
+    assert stats.hits + stats.misses == 100
+
+
+def test_eviction_and_sharing():
+    cache = FeatureCache(capacity=1, n_features=3, stripes=1)
+    field = np.zeros((20, 10), dtype=int)
+    first = cache.key(field, 1, 5, 0, 2)
+    second = cache.key(field, 1, 6, 0, 2)
+
+    assert len(first) == 32 and first != second
+
+    pid = os.fork()
+    if pid == 0:
+        # written by a forked worker, read by the parent, which sees its miss once
+        # flushed
+        cache.get(first)
+        cache.put(first, (1.0, 2.0, 3.0))
+        cache.flush()
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert cache.get(first) == (1.0, 2.0, 3.0)
+    assert cache.get(second) is None
+
+    cache.put(second, (4.0, 5.0, 6.0))
+    assert cache.get(first) is None
+    assert cache.stats == TranspositionStats(hits=1, misses=3, stores=2, evictions=1)
+
+    cache.flush()
+    assert cache.stats == TranspositionStats(hits=1, misses=3, stores=2, evictions=1)
+
+    cache.reset_stats()
+    assert cache.stats == TranspositionStats()
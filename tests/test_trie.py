@@ -0,0 +1,99 @@
+"""
+Test that sharing decision prefixes gives the fitness of separate episodes
+"""
+
+import os
+
+import pytest
+from nes_py.wrappers import JoypadSpace
+
+from nes_ai.bootstrap import booted_env
+from nes_ai.evaluation.trie import evaluate_shared
+from nes_ai.input import MOVEMENT, Button, Joypad
+
+FRAMES = 60
+
+# the first individuals share a long prefix, the last one diverges at once
+POPULATION = (
+    (Button.LEFT,) * 8 + (Button.A,) * 12,
+    (Button.LEFT,) * 8 + (Button.RIGHT,) * 12,
+    (Button.LEFT,) * 12 + (Button.A,) * 8,
+    (Button.RIGHT,) * 20,
+)
+
+
+def decide(individual, env):
+    return (individual[env.frame_count // 3 % len(individual)],)
+
+
+def done(env) -> bool:
+    return env.frame_count >= FRAMES
+
+
+def fitness(env) -> float:
+    # horizontal position and orientation of the piece
+    return float(env.ram[0x40] * 100 + env.ram[0x42])
+
+
+@pytest.mark.parametrize("max_processes", [1, 2])
+def test_shared_matches_separate_episodes(max_processes):
+    result = evaluate_shared(
+        "tetris",
+        POPULATION,
+        decide,
+        done,
+        fitness,
+        seed=3,
+        max_processes=max_processes,
+    )
+    expected = list()
+
+    for individual in POPULATION:
+        tetris = booted_env("tetris", seed=3)
+        player = Joypad(JoypadSpace(tetris, MOVEMENT))
+
+        while not done(tetris):
+            player.press(decide(individual, tetris))
+        expected.append(fitness(tetris))
+
+    assert result.fitness == expected
+    assert len(set(expected)) > 1
+    assert result.branches == 3
+    assert result.individual_frames == len(POPULATION) * FRAMES
+    assert result.frames < result.individual_frames
+
+
+def failing_decide(individual, env):
+    if individual is POPULATION[0] and env.frame_count >= 30:
+        raise RuntimeError("decision failed")
+    return decide(individual, env)
+
+
+def test_failed_root_reaps_branches(monkeypatch):
+    # branches forked by this process, theirs are reaped by them
+    forked = list()
+    fork = os.fork
+
+    def tracked_fork():
+        pid = fork()
+        forked.append(pid)
+        return pid
+
+    monkeypatch.setattr(os, "fork", tracked_fork)
+
+    with pytest.raises(RuntimeError, match="decision failed"):
+        evaluate_shared(
+            "tetris",
+            POPULATION,
+            failing_decide,
+            lambda env: env.frame_count >= 100 * FRAMES,
+            fitness,
+            seed=3,
+            max_processes=4,
+        )
+
+    # no branch left running or as a zombie
+    assert len(forked) > 0
+    for pid in forked:
+        with pytest.raises(ChildProcessError):
+            os.waitpid(pid, os.WNOHANG)
@@ -0,0 +1,50 @@
+"""
+Test the watchdog that kills and replaces stuck workers
+"""
+
+import time
+
+import pytest
+
+from nes_ai.bootstrap import booted_env
+from nes_ai.evaluation.watchdog import DEADLINE, ERROR, FRAMES, Watchdog
+
+
+def episode(value: int) -> int:
+    if value == 1:
+        while True:
+            time.sleep(0.01)
+    if value == 2:
+        raise RuntimeError("bad genome")
+    return value * 10
+
+
+def long_episode(frames: int) -> int:
+    tetris = booted_env("tetris")
+
+    for _ in range(frames):
+        tetris.step(0)
+
+    return frames
+
+
+def test_watchdog_penalizes_and_keeps_results():
+    with Watchdog(2, games=(), deadline=1.0, retries=1, penalty=lambda _: -1) as pool:
+        assert pool.map(episode, range(4)) == [0, -1, -1, 30]
+
+        reasons = sorted(failure.reason for failure in pool.failures)
+        assert reasons == [DEADLINE, DEADLINE, ERROR, ERROR]
+        assert pool.killed == 2
+
+        assert pool.map(episode, (0, 3)) == [0, 30]
+        assert pool.failures == []
+
+
+@pytest.mark.parametrize("frames, expected", [(5, 5), (50, None)])
+def test_watchdog_frame_budget(frames, expected):
+    with Watchdog(1, games=("tetris",), frame_budget=10, retries=0) as pool:
+        assert pool.map(long_episode, (frames,)) == [expected]
+
+        if expected is None:
+            assert pool.failures[0].reason == FRAMES
+            assert pool.failures[0].ram is not None